@@ -0,0 +1,86 @@
+"""
+Benchmark and check: the financial research agent graph is built once, not per request.
+
+First times what every report used to pay up front: wrapping the two analyst agents as tools
+(generating their JSON schemas) and cloning the writer with them. Then runs research jobs
+through the shared pipeline on the offline mock model while counting `Agent.as_tool` and
+`Agent.clone` calls, and exits non-zero if any run still constructs agents.
+
+Usage:
+    python -m examples.benchmarks.agent_graph_bench --builds 2000 --runs 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any
+
+# Must be set before the app module is imported, since it reads them at import time
+os.environ.update(MOCK_MODEL="1", MOCK_MODEL_LATENCY="0", MOCK_MODEL_TOKENS_PER_SECOND="0")
+# Keep the mock reports out of the persistent report archive
+os.environ.setdefault("REPORT_ARCHIVE_BACKEND", "memory")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from agents import Agent
+
+from examples.common.pipeline import EventSink
+from examples.financial_research_agent.agents.registry import FinancialAgents
+from examples.financial_research_agent.pipeline import FinancialResearchPipeline, agent_graph
+
+
+def _time_builds(builds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(builds):
+        FinancialAgents.build()
+    return (time.perf_counter() - started) / builds
+
+
+async def _count_constructions(runs: int) -> Counter[str]:
+    calls: Counter[str] = Counter()
+    originals = {name: getattr(Agent, name) for name in ("as_tool", "clone")}
+
+    def counting(name: str) -> Any:
+        def wrapper(self: Agent[Any], *args: Any, **kwargs: Any) -> Any:
+            calls[name] += 1
+            return originals[name](self, *args, **kwargs)
+
+        return wrapper
+
+    for name in originals:
+        setattr(Agent, name, counting(name))
+    try:
+        for _ in range(runs):
+            pipeline = FinancialResearchPipeline(EventSink(lambda update_type, content, is_done: None))
+            await pipeline.run("Quarterly results of Acme Corp")
+    finally:
+        for name, original in originals.items():
+            setattr(Agent, name, original)
+    return calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--builds", type=int, default=2000, help="graph builds to time")
+    parser.add_argument("--runs", type=int, default=20, help="mock research runs to check")
+    args = parser.parse_args()
+
+    per_build = _time_builds(args.builds)
+    print(f"Startup build: {agent_graph.metrics()}")
+    print(f"Per-request construction avoided: {per_build * 1e6:.1f} µs (mean of {args.builds} builds)")
+
+    calls = asyncio.run(_count_constructions(args.runs))
+    print(
+        f"{args.runs} research runs: {calls['as_tool']} as_tool calls, "
+        f"{calls['clone']} clone calls (expected 0)"
+    )
+    if calls:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
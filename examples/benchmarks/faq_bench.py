@@ -0,0 +1,120 @@
+"""
+Microbenchmark: FAQ lookups through the BM25 FAQIndex versus a linear keyword scan.
+
+The linear scan is the approach the old `faq_lookup_tool` used (substring checks such as
+`"bag" in question`, tried one entry after another), generalised to every entry in the
+file. Both are run over faq.json padded with synthetic entries up to --entries, and the
+script reports microseconds per lookup and how often each returns the expected entry.
+
+Usage:
+    python -m examples.benchmarks.faq_bench --entries 500 --lookups 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from examples.common.faq import FAQEntry, FAQIndex
+
+FAQ_PATH = os.path.join(os.path.dirname(__file__), "..", "customer_service", "faq.json")
+
+# Realistic phrasings, with the id of the entry that should answer them
+QUERIES = [
+    ("How many bags can I take with me?", "baggage-carry-on"),
+    ("what does a checked suitcase cost", "baggage-checked"),
+    ("my luggage is overweight", "baggage-overweight"),
+    ("the airline lost my bag", "baggage-lost"),
+    ("How many seats does the plane have?", "seats-layout"),
+    ("Is there wifi on board?", "wifi"),
+    ("can I charge my laptop", "power-outlets"),
+    ("are movies available during the flight", "entertainment"),
+    ("do you serve vegan meals", "special-meals"),
+    ("can I bring my dog", "pets"),
+    ("when does online check-in open", "check-in"),
+    ("what time does the gate close", "boarding"),
+    ("I want to cancel and get a refund", "cancel-booking"),
+    ("how do I reschedule my flight", "change-flight"),
+    ("my flight was delayed, do I get compensation", "delays"),
+    ("can I fly with a baby", "infants"),
+    ("do I need a passport", "documents"),
+    ("where is my booking reference", "confirmation-number"),
+]
+
+
+def linear_scan(entries: list[FAQEntry], question: str) -> FAQEntry | None:
+    """The old lookup strategy: the first entry with a keyword contained in the question."""
+    question = question.lower()
+    for entry in entries:
+        if any(keyword in question for keyword in entry.keywords):
+            return entry
+    return None
+
+
+def _padded_entries(entries: list[FAQEntry], count: int, rng: random.Random) -> list[FAQEntry]:
+    vocabulary = sorted({word for entry in entries for word in entry.answer.lower().split()})
+    padded = list(entries)
+    while len(padded) < count:
+        words = rng.sample(vocabulary, 12)
+        padded.append(
+            FAQEntry(
+                id=f"synthetic-{len(padded)}",
+                question=" ".join(words[:6]) + "?",
+                answer=" ".join(words),
+                keywords=[f"{words[6]} {words[7]}", f"synthetic {len(padded)}"],
+            )
+        )
+    # Real entries end up scattered through the file, as they would in a large FAQ
+    rng.shuffle(padded)
+    return padded
+
+
+def _time_per_call(function, lookups: int) -> float:
+    started = time.perf_counter()
+    for i in range(lookups):
+        function(QUERIES[i % len(QUERIES)][0])
+    return (time.perf_counter() - started) / lookups * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(FAQ_PATH) as f:
+        base = [FAQEntry(**entry) for entry in json.load(f)]
+    entries = _padded_entries(base, args.entries, random.Random(args.seed))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "faq.json")
+        with open(path, "w") as f:
+            json.dump([entry.__dict__ for entry in entries], f)
+        started = time.perf_counter()
+        index = FAQIndex(path, check_interval=float("inf"))
+        build_ms = (time.perf_counter() - started) * 1000
+
+        def index_lookup(question: str) -> FAQEntry | None:
+            matches = index.lookup(question, k=1)
+            return matches[0].entry if matches else None
+
+        print(f"{len(entries)} entries, {args.lookups} lookups, index built in {build_ms:.1f}ms "
+              f"({'numpy' if index.metrics()['vectorized'] else 'pure Python'} scoring)")
+        for name, function in (
+            ("linear scan", lambda q: linear_scan(entries, q)),
+            ("bm25 index", index_lookup),
+        ):
+            correct = sum(
+                1 for query, expected in QUERIES if (function(query) or FAQEntry("", "", "")).id == expected
+            )
+            per_call = _time_per_call(function, args.lookups)
+            print(f"  {name:<12} {per_call:8.2f} us/lookup   top-1 correct {correct}/{len(QUERIES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+End-to-end load test for the example web apps, runnable offline.
+
+The app is served in-process by uvicorn with MOCK_MODEL=1 (see examples/common/mock_model.py),
+so every agent answers locally with a configurable latency and token rate. N simulated
+clients then drive it concurrently over HTTP and SSE, and the script reports:
+
+- end-to-end latency percentiles (POST until the run's stream ends, or the turn returns)
+- time to first update and time to first content (first report chunk or reply token)
+- SSE fan-out throughput (events and bytes received per second across all subscribers)
+- memory per session (process RSS growth, and the state backend's own byte count)
+
+Usage:
+    python -m examples.benchmarks.load_test research_bot --clients 50 --viewers 2
+    python -m examples.benchmarks.load_test financial_research_agent --clients 20
+    python -m examples.benchmarks.load_test customer_service --clients 100 --turns 3
+
+Pass --live to use the real OpenAI models instead (needs OPENAI_API_KEY, and costs money).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import socket
+import time
+from typing import Any
+
+from examples.common.metrics import LatencyStats
+
+APPS = {
+    "research_bot": "examples.research_bot.api",
+    "financial_research_agent": "examples.financial_research_agent.api",
+    "customer_service": "examples.customer_service.api",
+}
+
+
+class LoadResults:
+    def __init__(self) -> None:
+        self.latency = LatencyStats(window=100_000)
+        self.first_update = LatencyStats(window=100_000)
+        self.first_content = LatencyStats(window=100_000)
+        self.events = 0
+        self.bytes = 0
+        self.rejected = 0
+        self.errors = 0
+
+    def summary(self, wall_time: float) -> dict[str, Any]:
+        return {
+            "latency": self.latency.summary(),
+            "time_to_first_update": self.first_update.summary(),
+            "time_to_first_content": self.first_content.summary(),
+            "sse_events": self.events,
+            "sse_events_per_second": round(self.events / wall_time, 1),
+            "sse_bytes_per_second": round(self.bytes / wall_time, 1),
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "wall_time_s": round(wall_time, 3),
+        }
+
+
+async def _read_sse(client: Any, url: str, results: LoadResults, on_event: Any) -> None:
+    """Read an SSE stream until it ends, calling `on_event(data)` for each event."""
+    async with client.stream("GET", url) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            results.events += 1
+            results.bytes += len(line) + 2
+            on_event(json.loads(line[len("data: "):]))
+
+
+async def _research_client(client: Any, query: str, viewers: int, results: LoadResults) -> None:
+    started = time.perf_counter()
+    response = await client.post("/research", json={"query": query})
+    if response.status_code == 429:
+        results.rejected += 1
+        return
+    research_id = response.json()["research_id"]
+    marks: dict[str, float] = {}
+
+    def on_event(update: dict[str, Any]) -> None:
+        marks.setdefault("update", time.perf_counter())
+        if update.get("type") == "report_chunk":
+            marks.setdefault("content", time.perf_counter())
+
+    url = f"/research/{research_id}/updates"
+    await asyncio.gather(*(_read_sse(client, url, results, on_event) for _ in range(viewers)))
+    results.latency.record(time.perf_counter() - started)
+    if "update" in marks:
+        results.first_update.record(marks["update"] - started)
+    if "content" in marks:
+        results.first_content.record(marks["content"] - started)
+
+
+async def _customer_service_client(client: Any, message: str, turns: int, results: LoadResults) -> None:
+    conversation_id = (await client.post("/conversation")).json()["conversation_id"]
+    marks: dict[str, float] = {}
+
+    def on_event(message: dict[str, Any]) -> None:
+        marks.setdefault("update", time.perf_counter())
+        if message.get("type") == "delta":
+            marks.setdefault("content", time.perf_counter())
+
+    reader = asyncio.create_task(
+        _read_sse(client, f"/conversation/{conversation_id}/stream", results, on_event)
+    )
+    try:
+        for turn in range(turns):
+            marks.clear()
+            started = time.perf_counter()
+            await client.post(
+                f"/conversation/{conversation_id}/message",
+                json={"message": f"{message} (turn {turn + 1})", "stream": True},
+            )
+            results.latency.record(time.perf_counter() - started)
+            if "update" in marks:
+                results.first_update.record(marks["update"] - started)
+            if "content" in marks:
+                results.first_content.record(marks["content"] - started)
+    finally:
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+
+
+def _rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_load_test(args: argparse.Namespace) -> dict[str, Any]:
+    import httpx
+    import uvicorn
+
+    app = importlib.import_module(APPS[args.app]).app
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    results = LoadResults()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    rss_before = _rss_bytes()
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits
+        ) as client:
+            started = time.perf_counter()
+
+            async def one_client(index: int) -> None:
+                try:
+                    if args.app == "customer_service":
+                        await _customer_service_client(client, args.message, args.turns, results)
+                    else:
+                        query = f"{args.query} #{index % args.distinct_queries}"
+                        await _research_client(client, query, args.viewers, results)
+                except Exception:
+                    results.errors += 1
+
+            await asyncio.gather(*(one_client(i) for i in range(args.clients)))
+            wall_time = time.perf_counter() - started
+            app_metrics = (await client.get("/metrics")).json()
+    finally:
+        server.should_exit = True
+        await serving
+
+    rss_after = _rss_bytes()
+    sessions = next(
+        (value for key, value in app_metrics.items() if key in ("research_sessions", "conversations")),
+        {},
+    )
+    summary = results.summary(wall_time)
+    summary["memory"] = {
+        "rss_growth_per_session_bytes": (
+            (rss_after - rss_before) // args.clients if rss_before and rss_after else None
+        ),
+        "backend_bytes_per_session": (
+            sessions.get("bytes", 0) // sessions["sessions"] if sessions.get("sessions") else None
+        ),
+    }
+    summary["app_metrics"] = app_metrics
+    return summary
+
+
+def _print_summary(app: str, clients: int, summary: dict[str, Any]) -> None:
+    print(f"\n{app}: {clients} clients in {summary['wall_time_s']}s")
+    for name in ("latency", "time_to_first_update", "time_to_first_content"):
+        stats = summary[name]
+        print(
+            f"  {name:<22} n={stats['count']:<5} p50={stats['p50_ms']}ms "
+            f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms"
+        )
+    print(
+        f"  sse                    {summary['sse_events']} events, "
+        f"{summary['sse_events_per_second']} events/s, {summary['sse_bytes_per_second']} bytes/s"
+    )
+    memory = summary["memory"]
+    print(
+        f"  memory per session     rss={memory['rss_growth_per_session_bytes']} bytes, "
+        f"backend={memory['backend_bytes_per_session']} bytes"
+    )
+    print(f"  rejected={summary['rejected']} errors={summary['errors']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("app", choices=sorted(APPS))
+    parser.add_argument("--clients", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--viewers", type=int, default=1, help="SSE subscribers per research run")
+    parser.add_argument("--turns", type=int, default=2, help="messages per customer service conversation")
+    parser.add_argument("--query", default="Impact of interest rates on regional banks")
+    parser.add_argument("--distinct-queries", type=int, default=1_000_000,
+                        help="cycle through this many distinct queries (lower it to exercise the caches)")
+    parser.add_argument("--message", default="Hi, my name is Jane Smith. Can I change my seat?")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock time to first token (s)")
+    parser.add_argument("--latency-jitter", type=float, default=0.0,
+                        help="up to this much extra mock latency per call (s), to model slow searches")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="mock output rate")
+    parser.add_argument("--report-words", type=int, default=1000, help="mock report length")
+    parser.add_argument("--live", action="store_true", help="use the real models instead of the mock")
+    parser.add_argument("--json", metavar="PATH", help="also write the full results to this file")
+    args = parser.parse_args()
+
+    # Must be set before the app module is imported, since it reads them at import time
+    if not args.live:
+        os.environ["MOCK_MODEL"] = "1"
+        os.environ["MOCK_MODEL_LATENCY"] = str(args.latency)
+        os.environ["MOCK_MODEL_LATENCY_JITTER"] = str(args.latency_jitter)
+        os.environ["MOCK_MODEL_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+        os.environ["MOCK_MODEL_REPORT_WORDS"] = str(args.report_words)
+    os.environ.setdefault("RESEARCH_WORKERS", str(args.clients))
+    os.environ.setdefault("RESEARCH_QUEUE_SIZE", str(args.clients))
+    # Keep each load test's reports to itself, so a repeat run is not answered from the last one's
+    os.environ.setdefault("REPORT_ARCHIVE_BACKEND", "memory")
+
+    summary = asyncio.run(run_load_test(args))
+    _print_summary(args.app, args.clients, summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
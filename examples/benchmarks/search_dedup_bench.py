@@ -0,0 +1,105 @@
+"""
+Microbenchmark: merging near-duplicate planner searches with SearchDeduplicator.
+
+Runs the deduplicator over search plans written the way the planners tend to write them
+(several wordings of the same search among distinct ones) and reports how many search
+agent calls it saves, whether it kept apart the searches that must stay separate, and
+microseconds per plan for the NumPy and the plain-Python similarity paths.
+
+Usage:
+    python -m examples.benchmarks.search_dedup_bench --threshold 0.7 --rounds 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from pydantic import BaseModel
+
+from examples.common import dedup
+from examples.common.dedup import SearchDeduplicator
+
+
+class SearchItem(BaseModel):
+    reason: str
+    query: str
+
+
+# Each plan is a list of groups; the searches in one group are wordings of the same search
+PLANS = [
+    [
+        ["Apple Q4 2024 earnings", "Apple fourth quarter 2024 earnings", "Apple earnings Q4 2024"],
+        ["Apple Q3 2024 earnings"],
+        ["AAPL fourth quarter 2024 results"],
+        ["Apple iPhone sales trends", "iPhone sales trend Apple"],
+        ["Apple services revenue growth", "Apple services revenue"],
+        ["Apple gross margin outlook"],
+    ],
+    [
+        ["impact of interest rates on regional banks", "regional banks interest rate impact"],
+        ["regional bank deposit outflows 2023", "deposit outflows regional banks 2023"],
+        ["regional bank deposit outflows 2024"],
+        ["commercial real estate exposure of regional banks"],
+        ["net interest margin regional banks", "regional bank net interest margins"],
+        ["Federal Reserve rate path forecast"],
+    ],
+    [
+        ["Tesla fiscal year 2024 deliveries", "Tesla FY 2024 deliveries", "Tesla deliveries FY2024"],
+        ["Tesla energy storage business"],
+        ["Tesla China market share", "Tesla market share in China"],
+        ["BYD vs Tesla competition"],
+        ["Tesla autonomous driving progress"],
+    ],
+]
+
+
+def _items(plan: list[list[str]]) -> list[SearchItem]:
+    return [
+        SearchItem(reason=f"group-{group}", query=query)
+        for group, wordings in enumerate(plan)
+        for query in wordings
+    ]
+
+
+def _time(threshold: float, rounds: int) -> float:
+    deduplicator = SearchDeduplicator(threshold)
+    plans = [_items(plan) for plan in PLANS]
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for items in plans:
+            deduplicator.dedupe(items)
+    return (time.perf_counter() - started) / (rounds * len(plans))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=0.7, help="similarity needed to merge")
+    parser.add_argument("--rounds", type=int, default=2000, help="passes over the plans to time")
+    args = parser.parse_args()
+
+    deduplicator = SearchDeduplicator(args.threshold)
+    wrongly_merged = unmerged = 0
+    for plan in PLANS:
+        items = _items(plan)
+        kept = deduplicator.dedupe(items)
+        # A merged search's reason lists the groups of every search merged into it
+        groups = [set(item.reason.split()) for item in kept]
+        wrongly_merged += sum(len(reasons) - 1 for reasons in groups)
+        unmerged += len(kept) - len(set().union(*groups))
+        print(f"{len(items)} planned -> {len(kept)} searched: {[item.query for item in kept]}")
+
+    print(f"\nThreshold {args.threshold}: {deduplicator.metrics()}")
+    print(f"Distinct searches merged together: {wrongly_merged}, duplicate wordings left unmerged: {unmerged}")
+
+    numpy_us = _time(args.threshold, args.rounds) * 1e6 if dedup.np is not None else None
+    np, dedup.np = dedup.np, None
+    try:
+        python_us = _time(args.threshold, args.rounds) * 1e6
+    finally:
+        dedup.np = np
+    print(f"Per plan: NumPy {numpy_us and f'{numpy_us:.1f} µs'}, plain Python {python_us:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
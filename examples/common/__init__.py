@@ -0,0 +1,2 @@
+# Infrastructure shared by the web examples (research_bot, financial_research_agent and
+# customer_service). Nothing in here talks to a model; it only moves updates around.
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from .cache import normalize_query
+from .faq import tokenize
+from .mock_model import mock_models_enabled
+
+_WORD = re.compile(r"\w+")
+
+
+def _dump(value: Any) -> Any:
+    return value.model_dump() if hasattr(value, "model_dump") else value
+
+
+def query_similarity(a: str, b: str) -> float:
+    """
+    Jaccard similarity of the two queries' word sets (stopwords and plurals ignored), or 0
+    when they mention different numbers: "Q3 2023 results" is not a repeat of "Q3 2024 results".
+    """
+    words_a, words_b = set(tokenize(a)), set(tokenize(b))
+    if not words_a or not words_b:
+        return 0.0
+    if {w for w in words_a if w.isdigit()} != {w for w in words_b if w.isdigit()}:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+@dataclass
+class ArchivedReport:
+    id: int
+    query: str
+    created: float
+    plan: list[Any]
+    """The planned searches, as dicts."""
+
+    report: dict[str, Any]
+    """The report model's fields (`short_summary`, `markdown_report`, ...)."""
+
+    verification: str | None = None
+    similarity: float = 1.0
+    """How closely the query it was found for matches `query`; 1 unless from `find_recent`."""
+
+
+class ReportArchive:
+    """
+    Every finished report with its query, search plan and verification result, in SQLite with
+    an FTS5 index over the query, summary and report text.
+
+    `find_recent` finds a report written within the last `fresh_seconds` for a query that is
+    a near-duplicate of the given one, so it can be served again instead of researched anew;
+    `search` finds past reports by their content. The oldest reports beyond `max_reports`
+    are pruned every `prune_every` writes.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        path: str,
+        fresh_seconds: float = 3600.0,
+        similarity: float = 0.8,
+        max_reports: int = 10_000,
+        prune_every: int = 64,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.namespace = namespace
+        self.fresh_seconds = fresh_seconds
+        self.similarity = similarity
+        self.max_reports = max_reports
+        self.prune_every = prune_every
+        self._clock = clock
+        self._writes = 0
+        self.repeat_hits = 0
+        self.repeat_misses = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY, namespace TEXT NOT NULL, query TEXT NOT NULL,
+                normalized TEXT NOT NULL, created REAL NOT NULL, summary TEXT NOT NULL,
+                report TEXT NOT NULL, data TEXT NOT NULL, plan TEXT NOT NULL, verification TEXT
+            );
+            CREATE INDEX IF NOT EXISTS reports_recent ON reports (namespace, created);
+            CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+                query, summary, report, content='reports', content_rowid='id',
+                tokenize='porter unicode61'
+            );
+            """
+        )
+
+    def store(self, query: str, plan: Sequence[Any], report: Any, verification: str | None = None) -> int:
+        """Archive a finished `report` (a report model) and return its id."""
+        data = _dump(report)
+        summary, markdown = data.get("short_summary", ""), data.get("markdown_report", "")
+        with self._db:
+            cursor = self._db.execute(
+                "INSERT INTO reports (namespace, query, normalized, created, summary, report, data, plan, "
+                "verification) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.namespace,
+                    query,
+                    normalize_query(query),
+                    self._clock(),
+                    summary,
+                    markdown,
+                    json.dumps(data),
+                    json.dumps([_dump(item) for item in plan]),
+                    verification,
+                ),
+            )
+            report_id = cursor.lastrowid
+            self._db.execute(
+                "INSERT INTO reports_fts (rowid, query, summary, report) VALUES (?, ?, ?, ?)",
+                (report_id, query, summary, markdown),
+            )
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self._prune()
+        return report_id
+
+    def get(self, report_id: int) -> ArchivedReport | None:
+        row = self._db.execute(
+            "SELECT id, query, created, plan, data, verification FROM reports WHERE id = ? AND namespace = ?",
+            (report_id, self.namespace),
+        ).fetchone()
+        return None if row is None else self._archived(row)
+
+    def find_recent(self, query: str) -> ArchivedReport | None:
+        """The most similar report written within `fresh_seconds` for a near-duplicate query."""
+        if self.fresh_seconds <= 0:
+            return None
+        since = self._clock() - self.fresh_seconds
+        columns = "r.id, r.query, r.created, r.plan, r.data, r.verification"
+        row = self._db.execute(
+            f"SELECT {columns} FROM reports r WHERE namespace = ? AND normalized = ? AND created >= ? "
+            "ORDER BY created DESC LIMIT 1",
+            (self.namespace, normalize_query(query), since),
+        ).fetchone()
+        if row is not None:
+            self.repeat_hits += 1
+            return self._archived(row)
+
+        # Otherwise score the recent reports whose query shares any word with this one
+        words = sorted(set(tokenize(query)))
+        best: ArchivedReport | None = None
+        if words:
+            rows = self._db.execute(
+                f"SELECT {columns} FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid "
+                "WHERE reports_fts MATCH ? AND r.namespace = ? AND r.created >= ? "
+                "ORDER BY reports_fts.rank LIMIT 20",
+                (" OR ".join(f'query:"{word}"' for word in words), self.namespace, since),
+            ).fetchall()
+            for row in rows:
+                score = query_similarity(query, row[1])
+                if score >= self.similarity and (best is None or score > best.similarity):
+                    best = self._archived(row, score)
+        if best is None:
+            self.repeat_misses += 1
+        else:
+            self.repeat_hits += 1
+        return best
+
+    def search(self, text: str, limit: int = 10) -> list[dict[str, Any]]:
+        """Past reports containing every word of `text`, best match first."""
+        words = _WORD.findall(text)
+        if not words:
+            return []
+        rows = self._db.execute(
+            "SELECT r.id, r.query, r.created, r.summary, "
+            "snippet(reports_fts, 2, '**', '**', ' … ', 24), reports_fts.rank "
+            "FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid "
+            "WHERE reports_fts MATCH ? AND r.namespace = ? ORDER BY reports_fts.rank LIMIT ?",
+            (" ".join(f'"{word}"' for word in words), self.namespace, limit),
+        ).fetchall()
+        return [
+            {"id": report_id, "query": query, "created": created, "summary": summary, "snippet": snippet,
+             "score": round(-rank, 4)}
+            for report_id, query, created, summary, snippet, rank in rows
+        ]
+
+    def _archived(self, row: tuple[Any, ...], similarity: float = 1.0) -> ArchivedReport:
+        report_id, query, created, plan, data, verification = row
+        return ArchivedReport(
+            id=report_id,
+            query=query,
+            created=created,
+            plan=json.loads(plan),
+            report=json.loads(data),
+            verification=verification,
+            similarity=similarity,
+        )
+
+    def _prune(self) -> None:
+        with self._db:
+            stale = self._db.execute(
+                "SELECT id, query, summary, report FROM reports WHERE namespace = ? "
+                "ORDER BY created DESC LIMIT -1 OFFSET ?",
+                (self.namespace, self.max_reports),
+            ).fetchall()
+            # External-content FTS rows are removed by re-supplying the indexed values
+            self._db.executemany(
+                "INSERT INTO reports_fts (reports_fts, rowid, query, summary, report) "
+                "VALUES ('delete', ?, ?, ?, ?)",
+                stale,
+            )
+            self._db.executemany("DELETE FROM reports WHERE id = ?", [(row[0],) for row in stale])
+
+    def __len__(self) -> int:
+        return self._db.execute(
+            "SELECT COUNT(*) FROM reports WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+
+    def metrics(self) -> dict[str, Any]:
+        lookups = self.repeat_hits + self.repeat_misses
+        return {
+            "reports": len(self),
+            "repeat_hits": self.repeat_hits,
+            "repeat_misses": self.repeat_misses,
+            "repeat_hit_rate": round(self.repeat_hits / lookups, 4) if lookups else None,
+            "fresh_seconds": self.fresh_seconds,
+            "similarity": self.similarity,
+        }
+
+
+def create_archive(namespace: str, env_prefix: str = "REPORT_ARCHIVE") -> ReportArchive | None:
+    """
+    Build a ReportArchive configured from `<PREFIX>_BACKEND` (`sqlite`, `memory` or `off`),
+    `<PREFIX>_PATH`, `<PREFIX>_FRESH_SECONDS` (0 never serves a report again),
+    `<PREFIX>_SIMILARITY` and `<PREFIX>_MAX_REPORTS`. None when it is off.
+
+    With MOCK_MODEL=1 the default is `memory`, so mock reports are never kept on disk and
+    served to later real runs as answers.
+    """
+    env = os.environ
+    default = "memory" if mock_models_enabled() else "sqlite"
+    kind = env.get(f"{env_prefix}_BACKEND", default).lower()
+    if kind == "off":
+        return None
+    if kind == "sqlite":
+        path = env.get(f"{env_prefix}_PATH", f".state/{env_prefix.lower()}.sqlite3")
+    elif kind == "memory":
+        path = ":memory:"
+    else:
+        raise ValueError(f"Unknown {env_prefix}_BACKEND: {kind!r} (expected sqlite, memory or off)")
+    return ReportArchive(
+        namespace,
+        path,
+        fresh_seconds=float(env.get(f"{env_prefix}_FRESH_SECONDS", 3600)),
+        similarity=float(env.get(f"{env_prefix}_SIMILARITY", 0.8)),
+        max_reports=int(env.get(f"{env_prefix}_MAX_REPORTS", 10_000)),
+    )
@@ -0,0 +1,523 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+from .pubsub import Broker
+from .session_store import SessionStore
+from .sse import encode_json, sse_frame, sse_payload_frame
+
+
+class StateBackend(abc.ABC):
+    """
+    Storage and event bus behind the web apps.
+
+    A backend holds two kinds of per-session data under the same key:
+
+    - a *stream*: an append-only list of JSON-serializable dicts (research updates, chat
+      messages) that SSE endpoints replay and then follow. Each item is stamped with its
+      index in the stream as `seq`, which clients use to resume, and
+    - a *state* document: a JSON-serializable dict (e.g. a conversation's agent, history
+      and context) that request handlers load and save.
+
+    With a backend that lives outside the process, any worker can serve any endpoint.
+    """
+
+    shared = False
+    """Whether other worker processes see the same streams and states."""
+
+    @abc.abstractmethod
+    def create(self, key: str) -> None:
+        """Start an empty, open stream for `key`."""
+
+    @abc.abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether a stream exists for `key`."""
+
+    @abc.abstractmethod
+    def publish(self, key: str, item: dict[str, Any]) -> int | None:
+        """
+        Append `item` to the stream, stamped with its sequence number as `seq`, and wake its
+        subscribers. Returns the sequence number, or None if the stream no longer exists.
+        """
+
+    @abc.abstractmethod
+    def broadcast(self, key: str, item: dict[str, Any]) -> None:
+        """
+        Deliver a transient `item` (e.g. a token delta) to current subscribers. It is not
+        replayed and is discarded once the next item is published.
+        """
+
+    @abc.abstractmethod
+    def close(self, key: str) -> None:
+        """Mark the stream as complete. Subscribers drain it and stop."""
+
+    @abc.abstractmethod
+    def is_closed(self, key: str) -> bool:
+        """Whether the stream for `key` has been closed, or does not exist."""
+
+    @abc.abstractmethod
+    def items(self, key: str, start: int = 0) -> list[dict[str, Any]]:
+        """Return the stream's items from index `start` on."""
+
+    @abc.abstractmethod
+    def subscribe(self, key: str, start: int = 0) -> AsyncIterator[dict[str, Any]]:
+        """Yield the stream's items from `start`, then each new item until it is closed."""
+
+    @abc.abstractmethod
+    def subscribe_frames(self, key: str, start: int = 0) -> AsyncIterator[bytes]:
+        """
+        Like `subscribe`, but yield each item as its encoded SSE frame (see `sse_frame`).
+        Items are encoded once when they are published, not once per subscriber.
+        """
+
+    @abc.abstractmethod
+    def get_state(self, key: str) -> dict[str, Any] | None:
+        """Load the state document for `key`, or None if there is none."""
+
+    @abc.abstractmethod
+    def put_state(self, key: str, state: dict[str, Any]) -> None:
+        """Store the state document for `key`."""
+
+    @abc.abstractmethod
+    def remove(self, key: str) -> None:
+        """Drop the stream and state for `key`."""
+
+    @abc.abstractmethod
+    def metrics(self) -> dict[str, Any]:
+        """Occupancy figures for the metrics endpoint."""
+
+
+class _Entry:
+    """A published item together with its SSE frame, shared by every subscriber."""
+
+    __slots__ = ("item", "frame")
+
+    def __init__(self, item: dict[str, Any]) -> None:
+        self.item = item
+        self.frame = sse_frame(item)
+
+
+class MemoryBackend(StateBackend):
+    """
+    Process-local backend: a `Broker` of topics bounded by a `SessionStore`.
+
+    Fastest option, but only usable with a single worker process.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore | None = None,
+        sizeof: Callable[[dict[str, Any]], int] | None = None,
+    ) -> None:
+        self.broker = Broker(
+            store, sizeof=(lambda entry: sizeof(entry.item)) if sizeof is not None else None
+        )
+        self.store = self.broker.store
+        self._states: dict[str, tuple[dict[str, Any], int]] = {}
+        previous_on_evict = self.store.on_evict
+
+        def on_evict(key: str, value: Any) -> None:
+            self._states.pop(key, None)
+            if previous_on_evict is not None:
+                previous_on_evict(key, value)
+
+        self.store.on_evict = on_evict
+
+    def create(self, key: str) -> None:
+        self.broker.create(key)
+
+    def exists(self, key: str) -> bool:
+        return key in self.broker
+
+    def publish(self, key: str, item: dict[str, Any]) -> int | None:
+        topic = self.broker.get(key)
+        if topic is None:
+            return None
+        seq = len(topic)
+        self.broker.publish(key, _Entry({**item, "seq": seq}))
+        return seq
+
+    def broadcast(self, key: str, item: dict[str, Any]) -> None:
+        self.broker.broadcast(key, _Entry(item))
+
+    def close(self, key: str) -> None:
+        self.broker.close(key)
+
+    def is_closed(self, key: str) -> bool:
+        topic = self.broker.get(key)
+        return topic is None or topic.closed
+
+    def items(self, key: str, start: int = 0) -> list[dict[str, Any]]:
+        topic = self.broker.get(key)
+        return [entry.item for entry in topic.items[start:]] if topic is not None else []
+
+    async def subscribe(self, key: str, start: int = 0) -> AsyncIterator[dict[str, Any]]:
+        topic = self.broker.get(key)
+        if topic is None:
+            return
+        async for entry in topic.subscribe(start):
+            yield entry.item
+
+    async def subscribe_frames(self, key: str, start: int = 0) -> AsyncIterator[bytes]:
+        topic = self.broker.get(key)
+        if topic is None:
+            return
+        async for entry in topic.subscribe(start):
+            yield entry.frame
+
+    def get_state(self, key: str) -> dict[str, Any] | None:
+        if key not in self.store:
+            return None
+        entry = self._states.get(key)
+        return entry[0] if entry is not None else None
+
+    def put_state(self, key: str, state: dict[str, Any]) -> None:
+        if key not in self.store:
+            return
+        size = len(json.dumps(state, default=str))
+        _, previous_size = self._states.get(key, (None, 0))
+        self._states[key] = (state, size)
+        self.store.grow(key, size - previous_size)
+
+    def remove(self, key: str) -> None:
+        self._states.pop(key, None)
+        self.broker.remove(key)
+
+    def metrics(self) -> dict[str, Any]:
+        return {"backend": "memory", **self.store.metrics()}
+
+
+class SQLiteBackend(StateBackend):
+    """
+    File-backed backend that several worker processes on one machine can share.
+
+    Writes are committed immediately. Subscribers in the writing process are woken directly;
+    changes committed by other processes are picked up by a single watcher task per process
+    that polls SQLite's `data_version` every `poll_interval` seconds while anyone is
+    subscribed, and stops when nobody is.
+
+    Like `SessionStore`, the backend is bounded: sessions not written to for `ttl_seconds`
+    are purged, and beyond `max_sessions` sessions or `max_bytes` of stored payload the least
+    recently written ones are dropped, finished sessions first. Limits are enforced by a
+    sweep that writes run at most every `sweep_interval` seconds.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        ttl_seconds: float = 3600.0,
+        max_sessions: int = 1000,
+        max_bytes: int = 256 * 1024 * 1024,
+        poll_interval: float = 0.05,
+        sweep_interval: float = 1.0,
+    ) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self._evictions = {"ttl": 0, "finished": 0, "active": 0}
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS streams (
+                key TEXT PRIMARY KEY, closed INTEGER NOT NULL DEFAULT 0, updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                key TEXT NOT NULL, seq INTEGER NOT NULL, payload TEXT NOT NULL,
+                PRIMARY KEY (key, seq)
+            );
+            CREATE TABLE IF NOT EXISTS transients (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS transients_key ON transients (key, id);
+            CREATE TABLE IF NOT EXISTS states (
+                key TEXT PRIMARY KEY, payload TEXT NOT NULL, updated REAL NOT NULL
+            );
+            """
+        )
+        self._changed = asyncio.Event()
+        self._waiters = 0
+        self._version = 0
+        self._watcher: asyncio.Task[None] | None = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def create(self, key: str) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO streams (key, closed, updated) VALUES (?, 0, ?)",
+            (self._key(key), time.time()),
+        )
+        self._notify()
+        self._maybe_sweep(key)
+
+    def exists(self, key: str) -> bool:
+        row = self._db.execute("SELECT 1 FROM streams WHERE key = ?", (self._key(key),)).fetchone()
+        return row is not None
+
+    def publish(self, key: str, item: dict[str, Any]) -> int | None:
+        full_key = self._key(key)
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            seq = self._db.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM events WHERE key = ?", (full_key,)
+            ).fetchone()[0]
+            self._db.execute(
+                "INSERT INTO events (key, seq, payload) VALUES (?, ?, ?)",
+                (full_key, seq, encode_json({**item, "seq": seq}).decode()),
+            )
+            self._db.execute("UPDATE streams SET updated = ? WHERE key = ?", (time.time(), full_key))
+            self._db.execute("DELETE FROM transients WHERE key = ?", (full_key,))
+        self._notify()
+        self._maybe_sweep(key)
+        return seq
+
+    def broadcast(self, key: str, item: dict[str, Any]) -> None:
+        self._db.execute(
+            "INSERT INTO transients (key, payload) VALUES (?, ?)", (self._key(key), encode_json(item).decode())
+        )
+        self._notify()
+
+    def close(self, key: str) -> None:
+        self._db.execute(
+            "UPDATE streams SET closed = 1, updated = ? WHERE key = ?", (time.time(), self._key(key))
+        )
+        self._notify()
+
+    def is_closed(self, key: str) -> bool:
+        row = self._db.execute("SELECT closed FROM streams WHERE key = ?", (self._key(key),)).fetchone()
+        return row is None or bool(row[0])
+
+    def items(self, key: str, start: int = 0) -> list[dict[str, Any]]:
+        rows = self._db.execute(
+            "SELECT payload FROM events WHERE key = ? AND seq >= ? ORDER BY seq",
+            (self._key(key), start),
+        ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    async def subscribe(self, key: str, start: int = 0) -> AsyncIterator[dict[str, Any]]:
+        async for _, payload in self._subscribe_payloads(key, start):
+            yield json.loads(payload)
+
+    async def subscribe_frames(self, key: str, start: int = 0) -> AsyncIterator[bytes]:
+        # Payloads are stored already encoded, so a frame only needs its SSE framing
+        async for seq, payload in self._subscribe_payloads(key, start):
+            yield sse_payload_frame(payload.encode(), seq)
+
+    async def _subscribe_payloads(self, key: str, start: int) -> AsyncIterator[tuple[int | None, str]]:
+        """Yield `(seq, payload)` for each item; transient items have no `seq`."""
+        full_key = self._key(key)
+        idx = start
+        transient_seen = self._db.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM transients WHERE key = ?", (full_key,)
+        ).fetchone()[0]
+        while True:
+            # Take the data version before reading so that a commit from another worker
+            # landing between the reads and the wait below is not missed.
+            version = self._data_version()
+            # Read everything in one snapshot. Transients are deleted in the same transaction
+            # that publishes the item superseding them, so those read here all follow the
+            # last event read here, and are sent once the events are.
+            self._db.execute("BEGIN")
+            try:
+                row = self._db.execute("SELECT closed FROM streams WHERE key = ?", (full_key,)).fetchone()
+                if row is None:
+                    return
+                rows = self._db.execute(
+                    "SELECT seq, payload FROM events WHERE key = ? AND seq >= ? ORDER BY seq",
+                    (full_key, idx),
+                ).fetchall()
+                transients = self._db.execute(
+                    "SELECT id, payload FROM transients WHERE key = ? AND id > ? ORDER BY id",
+                    (full_key, transient_seen),
+                ).fetchall()
+            finally:
+                self._db.execute("COMMIT")
+            for seq, payload in rows:
+                yield seq, payload
+            idx += len(rows)
+            for transient_id, payload in transients:
+                transient_seen = transient_id
+                yield None, payload
+            if row[0]:
+                return
+            await self._wait_for_change(version)
+
+    def get_state(self, key: str) -> dict[str, Any] | None:
+        row = self._db.execute("SELECT payload FROM states WHERE key = ?", (self._key(key),)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put_state(self, key: str, state: dict[str, Any]) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO states (key, payload, updated) VALUES (?, ?, ?)",
+            (self._key(key), json.dumps(state, default=str), time.time()),
+        )
+        self._maybe_sweep(key)
+
+    def remove(self, key: str) -> None:
+        full_key = self._key(key)
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute("DELETE FROM events WHERE key = ?", (full_key,))
+            self._db.execute("DELETE FROM transients WHERE key = ?", (full_key,))
+            self._db.execute("DELETE FROM streams WHERE key = ?", (full_key,))
+            self._db.execute("DELETE FROM states WHERE key = ?", (full_key,))
+        self._notify()
+
+    def _maybe_sweep(self, protect: str) -> None:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.enforce_limits(protect)
+
+    def evict_expired(self) -> int:
+        """Purge every session not written to for longer than the TTL. Returns the number purged."""
+        cutoff = time.time() - self.ttl_seconds
+        pattern = f"{self.namespace}:%"
+        expired = [
+            key
+            for (key,) in self._db.execute(
+                "SELECT key FROM streams WHERE key LIKE ? AND updated < ? "
+                "UNION SELECT key FROM states WHERE key LIKE ? AND updated < ?",
+                (pattern, cutoff, pattern, cutoff),
+            ).fetchall()
+        ]
+        prefix_len = len(self.namespace) + 1
+        for key in expired:
+            self.remove(key[prefix_len:])
+        self._evictions["ttl"] += len(expired)
+        return len(expired)
+
+    def enforce_limits(self, protect: str | None = None) -> int:
+        """
+        Purge expired sessions, then drop sessions until both caps hold: least recently
+        written finished sessions first, then active ones, never `protect`. Returns the
+        number of sessions removed.
+        """
+        evicted = self.evict_expired()
+        sessions = self._sessions()
+        count = len(sessions)
+        total = sum(size for _, _, size in sessions)
+        protected = self._key(protect) if protect is not None else None
+        prefix_len = len(self.namespace) + 1
+        for key, closed, size in sessions:
+            if count <= self.max_sessions and total <= self.max_bytes:
+                break
+            if key == protected:
+                continue
+            self.remove(key[prefix_len:])
+            self._evictions["finished" if closed else "active"] += 1
+            count -= 1
+            total -= size
+            evicted += 1
+        return evicted
+
+    def _sessions(self) -> list[tuple[str, int, int]]:
+        """`(key, closed, bytes)` of every stream, in eviction order."""
+        return self._db.execute(
+            """
+            SELECT s.key, s.closed,
+                   COALESCE((SELECT SUM(LENGTH(e.payload)) FROM events e WHERE e.key = s.key), 0)
+                   + COALESCE(LENGTH(st.payload), 0)
+            FROM streams s LEFT JOIN states st ON st.key = s.key
+            WHERE s.key LIKE ?
+            ORDER BY s.closed DESC, MAX(s.updated, COALESCE(st.updated, 0))
+            """,
+            (f"{self.namespace}:%",),
+        ).fetchall()
+
+    def metrics(self) -> dict[str, Any]:
+        pattern = f"{self.namespace}:%"
+        streams, finished = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(closed), 0) FROM streams WHERE key LIKE ?", (pattern,)
+        ).fetchone()
+        event_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM events WHERE key LIKE ?", (pattern,)
+        ).fetchone()[0]
+        state_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM states WHERE key LIKE ?", (pattern,)
+        ).fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "sessions": streams,
+            "finished_sessions": finished,
+            "active_sessions": streams - finished,
+            "bytes": event_bytes + state_bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": dict(self._evictions),
+        }
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _data_version(self) -> int:
+        return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    async def _wait_for_change(self, version: int) -> None:
+        if self._watcher is None or self._watcher.done():
+            self._version = version
+            self._watcher = asyncio.create_task(self._watch())
+        elif self._version != version:
+            # The watcher has seen a commit since `version` was read; re-read right away.
+            return
+        self._waiters += 1
+        try:
+            await self._changed.wait()
+        finally:
+            self._waiters -= 1
+
+    async def _watch(self) -> None:
+        # One poller per process regardless of the number of subscribers. `data_version`
+        # only changes when another connection (i.e. another worker) commits.
+        while self._waiters > 0:
+            await asyncio.sleep(self.poll_interval)
+            current = self._data_version()
+            if current != self._version:
+                self._version = current
+                self._notify()
+
+
+def create_backend(
+    namespace: str, sizeof: Callable[[dict[str, Any]], int] | None = None
+) -> StateBackend:
+    """
+    Build the backend selected by the `STATE_BACKEND` environment variable.
+
+    `memory` (the default) keeps everything in process. `sqlite` stores everything in
+    `STATE_SQLITE_PATH` (default `.state/examples.sqlite3`) so that `uvicorn --workers N` can
+    share it. Both are bounded by the `<NAMESPACE>_*` SessionStore limits.
+    """
+    kind = os.environ.get("STATE_BACKEND", "memory").lower()
+    limits = SessionStore.from_env(namespace.upper())
+    if kind == "memory":
+        return MemoryBackend(limits, sizeof=sizeof)
+    if kind == "sqlite":
+        return SQLiteBackend(
+            os.environ.get("STATE_SQLITE_PATH", ".state/examples.sqlite3"),
+            namespace=namespace.lower(),
+            ttl_seconds=limits.ttl_seconds,
+            max_sessions=limits.max_sessions,
+            max_bytes=limits.max_bytes,
+        )
+    raise ValueError(f"Unknown STATE_BACKEND: {kind!r} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from examples.common.log import fields, get_logger
+from examples.common.mock_model import mock_models_enabled
+from examples.common.pipeline import ResearchPipeline, ResultSink
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BatchQuery:
+    id: str
+    query: str
+
+
+def read_queries(path: str) -> list[BatchQuery]:
+    """
+    Queries from a JSONL file (one `{"query": ..., "id": ...}` object or JSON string per line)
+    or a CSV file with a `query` column and an optional `id` column. Queries without an id
+    are identified by their text, so a query listed twice is researched once.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows: list[Any] = list(csv.DictReader(f))
+            if rows and "query" not in rows[0]:
+                raise ValueError(f"{path}: CSV input needs a 'query' column")
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    queries = []
+    for row in rows:
+        if isinstance(row, str):
+            row = {"query": row}
+        query = (row.get("query") or "").strip()
+        if query:
+            queries.append(BatchQuery(id=str(row.get("id") or query), query=query))
+    return queries
+
+
+class Checkpoint:
+    """
+    Finished queries, one JSON object per line, appended (and flushed) as each one completes.
+    Reading it back tells a rerun which queries are already done; failed ones are retried, and
+    so is one whose line a crash left half-written.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.done: set[str] = set()
+        if os.path.exists(path):
+            self._load(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self, path: str) -> None:
+        with open(path, "rb+") as f:
+            lines = f.read().splitlines(keepends=True)
+            offset = 0
+            for number, line in enumerate(lines, start=1):
+                try:
+                    entry = json.loads(line) if line.strip() else {}
+                except ValueError:
+                    if number < len(lines):
+                        raise
+                    # A crash mid-write leaves a partial last line; drop it so the next
+                    # entry starts on a line of its own, and rerun that query
+                    logger.warning("Discarding truncated checkpoint line", extra=fields(path=path, line=number))
+                    f.truncate(offset)
+                    return
+                if entry.get("status") == "ok":
+                    self.done.add(entry["id"])
+                offset += len(line)
+            if lines and not lines[-1].endswith(b"\n"):
+                f.write(b"\n")
+
+    def record(self, entry: dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if entry.get("status") == "ok":
+            self.done.add(entry["id"])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+@dataclass
+class BatchSummary:
+    queries: int = 0
+    duplicates: int = 0
+    """Repeats of a query earlier in the file, which share its run."""
+
+    skipped: int = 0
+    """Already in the checkpoint from an earlier run."""
+
+    completed: int = 0
+    failed: int = 0
+    tokens: int = 0
+    wall_time: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        minutes = self.wall_time / 60
+        return {
+            "queries": self.queries,
+            "duplicates": self.duplicates,
+            "skipped": self.skipped,
+            "completed": self.completed,
+            "failed": self.failed,
+            "wall_time_s": round(self.wall_time, 1),
+            "queries_per_min": round(self.completed / minutes, 2) if minutes else None,
+            "tokens": self.tokens,
+            "tokens_per_min": round(self.tokens / minutes) if minutes else None,
+        }
+
+
+async def run_batch(
+    pipeline_class: type[ResearchPipeline],
+    queries: list[BatchQuery],
+    checkpoint: Checkpoint,
+    concurrency: int,
+) -> BatchSummary:
+    """
+    Research every query not yet in `checkpoint`, at most `concurrency` at a time. All runs
+    share the pipeline's search cache and search limiter, so a search term that comes up for
+    several queries is searched once and SEARCH_CONCURRENCY bounds the whole batch.
+    """
+    unique = {query.id: query for query in queries}
+    pending = [query for key, query in unique.items() if key not in checkpoint.done]
+    summary = BatchSummary(
+        queries=len(queries), duplicates=len(queries) - len(unique), skipped=len(unique) - len(pending)
+    )
+    slots = asyncio.Semaphore(concurrency)
+
+    async def research(query: BatchQuery) -> None:
+        async with slots:
+            sink = ResultSink()
+            pipeline = pipeline_class(sink, log_fields={"query_id": query.id})
+            started = time.perf_counter()
+            entry: dict[str, Any] = {"id": query.id, "query": query.query}
+            try:
+                await pipeline.run(query.query)
+            except Exception as exc:
+                logger.warning("Query failed", extra=fields(query_id=query.id, error=repr(exc)))
+                entry.update(status="error", error=repr(exc))
+                summary.failed += 1
+            else:
+                entry.update(status="ok", results=sink.results)
+                summary.completed += 1
+            entry.update(
+                duration_s=round(time.perf_counter() - started, 2),
+                tokens=pipeline.usage.total_tokens,
+                searches_saved=pipeline.searches_saved,
+            )
+            summary.tokens += pipeline.usage.total_tokens
+            checkpoint.record(entry)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(research(query) for query in pending))
+    summary.wall_time = time.perf_counter() - started
+    return summary
+
+
+def main(pipeline_class: type[ResearchPipeline], description: str | None = None) -> None:
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL or CSV file of queries")
+    parser.add_argument("--output", help="JSONL checkpoint of results (default: <input>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="queries researched at once")
+    args = parser.parse_args()
+
+    if not os.environ.get("OPENAI_API_KEY") and not mock_models_enabled():
+        print("ERROR: OPENAI_API_KEY environment variable is not set.")
+        sys.exit(1)
+
+    queries = read_queries(args.input)
+    checkpoint = Checkpoint(args.output or f"{os.path.splitext(args.input)[0]}.results.jsonl")
+    try:
+        summary = asyncio.run(run_batch(pipeline_class, queries, checkpoint, args.concurrency))
+    finally:
+        checkpoint.close()
+
+    print(f"\nResults in {checkpoint.path}")
+    for key, value in summary.as_dict().items():
+        print(f"  {key}: {value}")
+    print(f"  search_cache: {pipeline_class.cache.metrics()}")
+    print(f"  plan_cache: {pipeline_class.plan_cache.metrics()}")
+    if pipeline_class.dedup is not None:
+        print(f"  search_dedup: {pipeline_class.dedup.metrics()}")
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .log import fields, get_logger
+
+logger = get_logger(__name__)
+
+_NON_WORD = re.compile(r"[^\w$%.\-]+")
+
+
+def normalize_query(text: str) -> str:
+    """Case-fold and collapse punctuation/whitespace so trivially different queries match."""
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split()).strip(" .-")
+
+
+def cache_key(namespace: str, text: str) -> str:
+    """Content address for `text` within `namespace`: a hash of its normalized form."""
+    return hashlib.sha256(f"{namespace}\0{normalize_query(text)}".encode()).hexdigest()
+
+
+class CacheBackend(abc.ABC):
+    """Storage for cached JSON-serializable values with an absolute expiry time."""
+
+    @abc.abstractmethod
+    def get(self, key: str, now: float) -> Any | None:
+        """Return the live value for `key` (refreshing its LRU position), or None."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        """Store `value`, evicting least recently used entries beyond the size bound."""
+
+    @abc.abstractmethod
+    def __len__(self) -> int: ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, max_entries: int = 10_000) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str, now: float) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk backend; survives restarts and can be shared by several processes.
+
+    The size bound is enforced every `prune_every` writes rather than on each one, so the
+    table may briefly hold slightly more than `max_entries` rows.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, prune_every: int = 64) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def get(self, key: str, now: float) -> Any | None:
+        row = self._db.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        self._db.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), expires_at, time.time()),
+        )
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self._db.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class ResultCache:
+    """
+    TTL cache of expensive async results keyed on a normalized query string.
+
+    Concurrent lookups of the same key share a single in-flight computation, and failed or
+    empty (None) results are never cached. The computation runs in its own task, so it is
+    not aborted when one of the callers waiting on it is cancelled; it is cancelled only once
+    every caller waiting on it has been.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        backend: CacheBackend | None = None,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.namespace = namespace
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._in_flight: dict[str, asyncio.Task[Any]] = {}
+        self._waiters: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, query: str) -> Any | None:
+        return self.backend.get(cache_key(self.namespace, query), self._clock())
+
+    def set(self, query: str, value: Any) -> None:
+        self.backend.set(cache_key(self.namespace, query), value, self._clock() + self.ttl_seconds)
+
+    def warm_start(self, path: str, validate: Callable[[Any], Any] | None = None) -> int:
+        """
+        Seed the cache from a JSONL file of `{"query": ..., "value": ...}` lines and return how
+        many entries were loaded. Lines whose value `validate` rejects are skipped.
+        """
+        loaded = 0
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    if validate is not None:
+                        validate(entry["value"])
+                    self.set(entry["query"], entry["value"])
+                except (ValueError, KeyError, TypeError) as exc:
+                    logger.warning(
+                        "Skipped warm-start entry", extra=fields(path=path, line=number, error=repr(exc))
+                    )
+                    continue
+                loaded += 1
+        logger.info("Cache warmed", extra=fields(namespace=self.namespace, path=path, entries=loaded))
+        return loaded
+
+    async def get_or_compute(self, query: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        key = cache_key(self.namespace, query)
+        value = self.backend.get(key, self._clock())
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._compute(key, compute))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1 and not task.done():
+                # Unregister it now: a caller arriving before the task has finished
+                # cancelling must start a fresh computation, not join the cancelled one
+                self._forget(key, task)
+                task.cancel()
+            raise
+        finally:
+            remaining = self._waiters.pop(key) - 1
+            if remaining:
+                self._waiters[key] = remaining
+
+    def _forget(self, key: str, task: asyncio.Task[Any]) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await compute()
+        if value is not None:
+            self.backend.set(key, value, self._clock() + self.ttl_seconds)
+        return value
+
+    def metrics(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+def create_cache(
+    namespace: str,
+    env_prefix: str,
+    default_ttl: float = 3600.0,
+    validate: Callable[[Any], Any] | None = None,
+) -> ResultCache:
+    """
+    Build a ResultCache configured from `<PREFIX>_BACKEND` (`memory`, `sqlite` or `off`),
+    `<PREFIX>_TTL_SECONDS`, `<PREFIX>_MAX_ENTRIES` and `<PREFIX>_PATH`, and seeded from the
+    JSONL file named by `<PREFIX>_WARM_START`, if set (see `ResultCache.warm_start`).
+
+    `off` gives a cache with a zero TTL: nothing is reused, but concurrent identical lookups
+    are still coalesced.
+    """
+    env = os.environ
+    kind = env.get(f"{env_prefix}_BACKEND", "memory").lower()
+    ttl = float(env.get(f"{env_prefix}_TTL_SECONDS", default_ttl))
+    max_entries = env.get(f"{env_prefix}_MAX_ENTRIES")
+    if kind == "memory":
+        backend: CacheBackend = MemoryCacheBackend(int(max_entries or 10_000))
+    elif kind == "sqlite":
+        path = env.get(f"{env_prefix}_PATH", f".state/{env_prefix.lower()}.sqlite3")
+        backend = SQLiteCacheBackend(path, int(max_entries or 100_000))
+    elif kind == "off":
+        backend, ttl = MemoryCacheBackend(0), 0.0
+    else:
+        raise ValueError(f"Unknown {env_prefix}_BACKEND: {kind!r} (expected memory, sqlite or off)")
+    cache = ResultCache(namespace, backend, ttl_seconds=ttl)
+    warm_start = env.get(f"{env_prefix}_WARM_START")
+    if warm_start:
+        cache.warm_start(warm_start, validate)
+    return cache
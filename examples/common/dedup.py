@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Sequence
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; similarities fall back to plain Python
+    np = None
+
+from .faq import tokenize
+
+# Spelled-out periods the planner uses interchangeably with their short forms, and periods
+# run together with their year ("FY2024" is "FY 2024")
+_ALIASES = [
+    (re.compile(rf"\b{word}[\s-]+quarter\b"), f"q{n}")
+    for n, word in enumerate(("first", "second", "third", "fourth"), start=1)
+] + [
+    (re.compile(r"\bfiscal[\s-]+year\b"), "fy"),
+    (re.compile(r"\b(fy|q[1-4])(\d{4})\b"), r"\1 \2"),
+]
+
+
+def _words(text: str) -> list[str]:
+    text = text.lower()
+    for pattern, short in _ALIASES:
+        text = pattern.sub(short, text)
+    return tokenize(text)
+
+
+def shingles(text: str) -> set[str]:
+    """
+    Character trigrams of each word (stopwords and plurals dropped, "fourth quarter" read as
+    "q4"), so reworded, reordered or re-inflected search terms still share most of them.
+    """
+    grams = set()
+    for word in _words(text):
+        padded = f"#{word}#"
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _numbers(text: str) -> frozenset[str]:
+    """Words with a digit in them ("2024", "q3"), which two duplicates must agree on."""
+    return frozenset(word for word in _words(text) if any(c.isdigit() for c in word))
+
+
+def similarity_matrix(texts: Sequence[str]) -> Any:
+    """
+    Pairwise Jaccard similarity of the texts' shingle sets: a NumPy array if NumPy is
+    installed (one matrix product over the texts' shingle incidence matrix), else nested lists.
+    """
+    sets = [shingles(text) for text in texts]
+    if np is not None:
+        vocabulary = {gram: i for i, gram in enumerate(set().union(*sets))}
+        incidence = np.zeros((len(sets), len(vocabulary)), dtype=np.float32)
+        for row, grams in enumerate(sets):
+            incidence[row, [vocabulary[gram] for gram in grams]] = 1.0
+        overlap = incidence @ incidence.T
+        sizes = np.diag(overlap)
+        union = sizes[:, None] + sizes[None, :] - overlap
+        return np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+    return [
+        [len(a & b) / len(a | b) if a | b else 0.0 for b in sets]
+        for a in sets
+    ]
+
+
+class SearchDeduplicator:
+    """
+    Merges planned searches whose terms are near-identical wordings of one another, so each
+    is searched once. Two searches are merged when the Jaccard similarity of their shingles
+    is at least `threshold` and they mention the same numbers (years, quarters), since
+    "Apple Q3 2024 earnings" and "Apple Q4 2024 earnings" differ by only a few characters.
+
+    Later searches are merged into the first one they duplicate, which keeps its term and
+    picks up their reasons. A threshold of 0 turns merging off.
+    """
+
+    def __init__(self, threshold: float = 0.7) -> None:
+        self.threshold = threshold
+        self.runs = 0
+        self.planned = 0
+        self.merged = 0
+
+    @classmethod
+    def from_env(cls) -> SearchDeduplicator:
+        threshold = float(os.environ.get("SEARCH_DEDUP_THRESHOLD", 0.7))
+        if not 0 <= threshold <= 1:
+            raise ValueError(f"SEARCH_DEDUP_THRESHOLD must be in [0, 1], got {threshold}")
+        return cls(threshold)
+
+    def dedupe(self, items: Sequence[Any]) -> list[Any]:
+        """`items` (search items with `query` and `reason`) without their near-duplicates."""
+        self.runs += 1
+        self.planned += len(items)
+        if self.threshold <= 0 or len(items) < 2:
+            return list(items)
+
+        queries = [item.query for item in items]
+        similar = similarity_matrix(queries)
+        numbers = [_numbers(query) for query in queries]
+        kept: list[int] = []
+        reasons: dict[int, list[str]] = {}
+        for i in range(len(items)):
+            target = next(
+                (j for j in kept if similar[i][j] >= self.threshold and numbers[i] == numbers[j]), None
+            )
+            if target is None:
+                kept.append(i)
+            else:
+                reasons.setdefault(target, []).append(items[i].reason)
+        self.merged += len(items) - len(kept)
+
+        deduped = []
+        for i in kept:
+            item = items[i]
+            if i in reasons:
+                merged_reasons = [item.reason, *(r for r in reasons[i] if r != item.reason)]
+                item = item.model_copy(update={"reason": " ".join(merged_reasons)})
+            deduped.append(item)
+        return deduped
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "runs": self.runs,
+            "planned": self.planned,
+            "merged": self.merged,
+            "saved_rate": round(self.merged / self.planned, 4) if self.planned else None,
+        }
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, fields
+
+# One alternation for every entity, so a message is scanned once. Each branch has a single
+# named group, which `match.lastgroup` reports. Lead-in phrases are case-insensitive; the
+# captured values keep their case rules (names capitalised, codes upper case). The shared
+# word-start check up front lets most positions fail before any branch is tried. The flight
+# branch comes before the bare codes, since "FLT123" is also a six-character code.
+_ENTITIES = re.compile(
+    r"""
+    \b(?=\w)(?:
+      (?i:my\s+name\s+is|name\s+is|i\s+am|i'm|this\s+is)\s+
+        (?P<passenger_name>[A-Z][a-z]+\s[A-Z][a-z]+)
+    | (?i:confirmation|booking|reference|record\s+locator)
+        (?i:\s+(?:number|code|no\.?))?(?i:\s+is)?\s*[:#]?\s*
+        (?P<confirmation_number>(?=[A-Za-z]*\d)[A-Za-z0-9]{6})\b
+    | (?i:FLT)-?(?P<flight_number>\d{3})\b
+    | (?P<bare_confirmation_number>(?=[A-Z]*\d)(?=\d*[A-Z])[A-Z0-9]{6})\b
+    | (?i:seat)(?i:\s+number)?(?i:\s+(?:is|to))?\s+(?P<seat_number>\d{1,2}[A-Fa-f])\b
+    | (?P<bare_seat_number>\d{1,2}[A-F])\b
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+@dataclass
+class Entities:
+    """Booking details mentioned in a message; fields not mentioned are None."""
+
+    passenger_name: str | None = None
+    confirmation_number: str | None = None
+    seat_number: str | None = None
+    flight_number: str | None = None
+
+    def apply(self, context: object, exclude: tuple[str, ...] = ()) -> list[str]:
+        """
+        Copy the found values onto the matching attributes of `context` that are still
+        unset, except those named in `exclude`. Returns the names of the attributes filled in.
+        """
+        filled = []
+        for field in fields(self):
+            if field.name in exclude:
+                continue
+            value = getattr(self, field.name)
+            if value is not None and getattr(context, field.name, None) is None:
+                setattr(context, field.name, value)
+                filled.append(field.name)
+        return filled
+
+
+def extract_entities(message: str) -> Entities:
+    """
+    Find the passenger name, confirmation number, seat and flight number in `message` in a
+    single pass. The first mention of each wins, and a value introduced by a lead-in
+    ("confirmation number is ...", "seat ...") wins over a bare code-like token.
+    """
+    found: dict[str, str] = {}
+    bare: dict[str, str] = {}
+    for match in _ENTITIES.finditer(message):
+        name = match.lastgroup
+        if name.startswith("bare_"):
+            bare.setdefault(name[5:], match.group(name))
+        else:
+            found.setdefault(name, match.group(name))
+    for name, value in bare.items():
+        found.setdefault(name, value)
+
+    entities = Entities(passenger_name=found.get("passenger_name"))
+    if "confirmation_number" in found:
+        entities.confirmation_number = found["confirmation_number"].upper()
+    if "seat_number" in found:
+        entities.seat_number = found["seat_number"].upper()
+    if "flight_number" in found:
+        entities.flight_number = f"FLT-{found['flight_number']}"
+    return entities
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; scoring falls back to plain Python
+    np = None
+
+from .entities import extract_entities
+from .metrics import LatencyStats
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can could do does for from have how i if in is it me my of on or "
+    "our so that the there this to was we what when where which who will with would you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lower-case word tokens without stopwords or stray letters ("what's"), and with a plural
+    "s" stripped ("bags" -> "bag").
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS or (len(token) == 1 and token.isalpha()):
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+@dataclass
+class FAQEntry:
+    id: str
+    question: str
+    answer: str
+    keywords: list[str] = field(default_factory=list)
+
+    def document(self) -> list[str]:
+        # The question and keywords describe what the entry is about, so they count double.
+        about = tokenize(" ".join([self.question, *self.keywords]))
+        return about + about + tokenize(self.answer)
+
+
+@dataclass
+class FAQMatch:
+    entry: FAQEntry
+    score: float
+    confidence: float = 0.0
+    """0-1; only filled in by `FAQIndex.best_match`."""
+
+
+class _Index:
+    """Immutable BM25 index over a fixed list of entries; rebuilt rather than updated."""
+
+    def __init__(self, entries: list[FAQEntry], k1: float, b: float) -> None:
+        self.entries = entries
+        documents = [entry.document() for entry in entries]
+        self.terms = {entry.id: frozenset(document) for entry, document in zip(entries, documents)}
+        lengths = [len(document) for document in documents]
+        average = sum(lengths) / len(lengths) if lengths else 1.0
+
+        occurrences: dict[str, tuple[list[int], list[int]]] = {}
+        for doc_id, document in enumerate(documents):
+            for term, tf in Counter(document).items():
+                ids, tfs = occurrences.setdefault(term, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        # Each posting holds the term's final BM25 contribution per document, so a query
+        # only has to add up precomputed weights.
+        n = len(entries)
+        self.postings: dict[str, Any] = {}
+        if np is not None:
+            doc_lengths = np.asarray(lengths, dtype=np.float32)
+            for term, (ids, tfs) in occurrences.items():
+                idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+                ids_array = np.asarray(ids, dtype=np.int32)
+                tf = np.asarray(tfs, dtype=np.float32)
+                norm = k1 * (1 - b + b * doc_lengths[ids_array] / average)
+                self.postings[term] = (ids_array, (idf * tf * (k1 + 1) / (tf + norm)).astype(np.float32))
+        else:
+            for term, (ids, tfs) in occurrences.items():
+                idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+                self.postings[term] = [
+                    (doc_id, idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[doc_id] / average)))
+                    for doc_id, tf in zip(ids, tfs)
+                ]
+
+    def search(self, query: str, k: int) -> list[FAQMatch]:
+        terms = set(tokenize(query))
+        if np is not None:
+            scores = np.zeros(len(self.entries), dtype=np.float32)
+            for term in terms:
+                posting = self.postings.get(term)
+                if posting is not None:
+                    scores[posting[0]] += posting[1]
+            if k < len(scores):
+                top = np.argpartition(-scores, k)[:k]
+            else:
+                top = np.arange(len(scores))
+            ranked = top[np.argsort(-scores[top], kind="stable")]
+            return [FAQMatch(self.entries[i], float(scores[i])) for i in ranked if scores[i] > 0]
+
+        totals: dict[int, float] = {}
+        for term in terms:
+            for doc_id, weight in self.postings.get(term, ()):
+                totals[doc_id] = totals.get(doc_id, 0.0) + weight
+        ranked_ids = sorted(totals, key=totals.__getitem__, reverse=True)[:k]
+        return [FAQMatch(self.entries[i], totals[i]) for i in ranked_ids]
+
+
+class FAQIndex:
+    """
+    FAQ knowledge base loaded from a JSON file and ranked with BM25.
+
+    The file holds a list of `{"id", "question", "answer", "keywords"}` objects. All
+    per-document term weights are computed once when the file is loaded (vectorized with
+    NumPy when it is installed), so a lookup only sums a few precomputed postings. The file's
+    modification time is checked at most every `check_interval` seconds and the index is
+    rebuilt and swapped in when it changes; if the new file cannot be parsed the old index
+    stays in use.
+    """
+
+    def __init__(
+        self, path: str, k1: float = 1.2, b: float = 0.75, check_interval: float = 2.0
+    ) -> None:
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.check_interval = check_interval
+        self.reloads = 0
+        self.reload_errors = 0
+        self._mtime: int | None = None
+        self._checked = 0.0
+        self._index = _Index([], k1, b)
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self._index.entries)
+
+    def reload(self) -> bool:
+        """Rebuild the index if the file changed since it was last loaded. Returns True if it was."""
+        self._checked = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+            with open(self.path) as f:
+                entries = [FAQEntry(**entry) for entry in json.load(f)]
+        except (OSError, ValueError, TypeError):
+            self.reload_errors += 1
+            return False
+        self._index = _Index(entries, self.k1, self.b)
+        self._mtime = mtime
+        self.reloads += 1
+        return True
+
+    def lookup(self, query: str, k: int = 3) -> list[FAQMatch]:
+        """The `k` best matching entries, best first. Entries sharing no term are left out."""
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.reload()
+        return self._index.search(query, k)
+
+    def best_match(self, query: str) -> FAQMatch | None:
+        """
+        The best match with a confidence: the share of query terms it contains times its
+        margin over the runner-up, so vague or ambiguous questions score low.
+        """
+        terms = set(tokenize(query))
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.reload()
+        index = self._index
+        matches = index.search(query, 2)
+        if not matches:
+            return None
+        best = matches[0]
+        coverage = len(terms & index.terms[best.entry.id]) / len(terms)
+        margin = 1 - matches[1].score / best.score if len(matches) > 1 else 1.0
+        best.confidence = coverage * margin
+        return best
+
+    def answer(self, query: str, min_score: float = 0.0) -> str | None:
+        """The answer of the best match scoring above `min_score`, or None."""
+        matches = self.lookup(query, k=1)
+        if matches and matches[0].score > min_score:
+            return matches[0].entry.answer
+        return None
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "entries": len(self),
+            "terms": len(self._index.postings),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "vectorized": np is not None,
+        }
+
+
+_ACTIONS = r"(?:book|reserve|change|switch|move|update|upgrade|cancel|reschedule|rebook|refund|add|arrange)"
+
+# Messages asking us to do something rather than asking how something works: "can you book me
+# a wheelchair?", "please cancel my flight", "I'd like to change my seat", "move me to 14C"
+BOOKING_REQUEST = re.compile(
+    rf"\b(?:can|could|would|will)\s+you\s+(?:please\s+)?{_ACTIONS}\b"
+    rf"|\bplease\s+{_ACTIONS}\b"
+    rf"|\b(?:i\s+(?:want|need|would\s+like)|i'd\s+like)\s+to\s+{_ACTIONS}\b"
+    rf"|^\W*(?:hi|hello|hey)?\W*{_ACTIONS}\s+(?:me|my|the|a|an|this|it)\b"
+    rf"|\b{_ACTIONS}\b.*\bseat\b|\bseat\s+\d+[a-f]\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class FastPathDecision:
+    action: str | None
+    """Either "answer" (reply without the model), "route" (skip triage) or None (run normally)."""
+
+    match: FAQMatch | None = None
+
+
+class FAQFastPath:
+    """
+    Pre-routing stage that keeps clear-cut FAQ questions away from the model.
+
+    A question whose best FAQ match has a confidence of at least `answer_threshold` is
+    answered straight from the knowledge base with no model call; one at or above
+    `route_threshold` goes directly to the FAQ agent, skipping the triage hop. Messages
+    that supply booking details (a confirmation number, seat or flight) or match `exclude`
+    (by default, requests to act on a booking) always take the normal path: they need an
+    agent, even when they read like an FAQ question.
+
+    `record` keeps latency per path, from which the time saved is estimated as the
+    difference to the mean latency of turns that ran the full agent path.
+    """
+
+    def __init__(
+        self,
+        index: FAQIndex,
+        answer_threshold: float = 0.5,
+        route_threshold: float = 0.35,
+        exclude: re.Pattern[str] | None = BOOKING_REQUEST,
+        enabled: bool = True,
+    ) -> None:
+        self.index = index
+        self.answer_threshold = answer_threshold
+        self.route_threshold = route_threshold
+        self.exclude = exclude
+        self.enabled = enabled
+        self.latency = {action: LatencyStats() for action in ("answer", "route", "agent")}
+
+    @classmethod
+    def from_env(cls, index: FAQIndex, prefix: str = "FAQ_FAST_PATH", **kwargs: Any) -> FAQFastPath:
+        """Read `<PREFIX>` (on/off), `<PREFIX>_ANSWER_THRESHOLD` and `<PREFIX>_ROUTE_THRESHOLD`."""
+        env = os.environ
+        kwargs.setdefault("enabled", env.get(prefix, "on").lower() not in ("0", "off", "false"))
+        if f"{prefix}_ANSWER_THRESHOLD" in env:
+            kwargs["answer_threshold"] = float(env[f"{prefix}_ANSWER_THRESHOLD"])
+        if f"{prefix}_ROUTE_THRESHOLD" in env:
+            kwargs["route_threshold"] = float(env[f"{prefix}_ROUTE_THRESHOLD"])
+        return cls(index, **kwargs)
+
+    def classify(self, message: str) -> FastPathDecision:
+        if not self.enabled or (self.exclude is not None and self.exclude.search(message)):
+            return FastPathDecision(None)
+        entities = extract_entities(message)
+        if entities.confirmation_number or entities.seat_number or entities.flight_number:
+            return FastPathDecision(None)
+        match = self.index.best_match(message)
+        if match is None:
+            return FastPathDecision(None)
+        if match.confidence >= self.answer_threshold:
+            return FastPathDecision("answer", match)
+        if match.confidence >= self.route_threshold:
+            return FastPathDecision("route", match)
+        return FastPathDecision(None, match)
+
+    def record(self, action: str | None, seconds: float) -> None:
+        """Record the latency of a turn that took the `action` path (None: the agent path)."""
+        self.latency[action or "agent"].record(seconds)
+
+    def metrics(self) -> dict[str, Any]:
+        counts = {action: stats.count for action, stats in self.latency.items()}
+        turns = sum(counts.values())
+        baseline = self.latency["agent"]
+        saved = 0.0
+        if baseline.count:
+            for action in ("answer", "route"):
+                stats = self.latency[action]
+                if stats.count:
+                    saved += stats.count * (baseline.total / baseline.count - stats.total / stats.count)
+        return {
+            "enabled": self.enabled,
+            "answer_threshold": self.answer_threshold,
+            "route_threshold": self.route_threshold,
+            "turns": counts,
+            "hit_rate": round((counts["answer"] + counts["route"]) / turns, 4) if turns else None,
+            "latency": {action: stats.summary() for action, stats in self.latency.items()},
+            "estimated_saved_ms": round(saved * 1000, 1),
+        }
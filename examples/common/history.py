@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from agents import Agent, Runner, TResponseInputItem
+
+from .metrics import LatencyStats
+
+_SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def estimate_tokens(items: list[Any]) -> int:
+    """Cheap token estimate (about four characters per token) for a list of input items."""
+    return sum(len(json.dumps(item, default=str)) for item in items) // 4
+
+
+@dataclass
+class HistoryBudget:
+    max_tokens: int = 2000
+    """Compact the history once the verbatim window is estimated to exceed this."""
+
+    target_ratio: float = 0.5
+    """Compaction shrinks the window to this fraction of `max_tokens`, so it happens rarely."""
+
+    min_turns: int = 2
+    """Most recent turns that are always kept verbatim, even over budget."""
+
+    @classmethod
+    def from_env(cls, prefix: str, **defaults: Any) -> HistoryBudget:
+        """Read `<PREFIX>_MAX_TOKENS` and `<PREFIX>_MIN_TURNS`, falling back to `defaults`."""
+        budget = cls(**defaults)
+        env = os.environ
+        if f"{prefix}_MAX_TOKENS" in env:
+            budget.max_tokens = int(env[f"{prefix}_MAX_TOKENS"])
+        if f"{prefix}_MIN_TURNS" in env:
+            budget.min_turns = int(env[f"{prefix}_MIN_TURNS"])
+        return budget
+
+
+@dataclass
+class ConversationWindow:
+    """The part of a conversation sent to the model: a rolling summary plus recent items."""
+
+    items: list[TResponseInputItem] = field(default_factory=list)
+    summary: str | None = None
+
+    def to_input(self) -> list[TResponseInputItem]:
+        if not self.summary:
+            return list(self.items)
+        return [{"role": "system", "content": _SUMMARY_PREFIX + self.summary}, *self.items]
+
+    def after_run(self, input_list: list[TResponseInputItem]) -> None:
+        """Take `result.to_input_list()` of a run started from `to_input()` as the new items."""
+        self.items = list(input_list[1:] if self.summary else input_list)
+
+
+class HistoryManager:
+    """
+    Keeps the input sent to customer service agents from growing with every turn.
+
+    After each turn, tool outputs the assistant has already answered from are replaced by a
+    short placeholder. If the remaining items exceed the budget of the agent that will take
+    the next turn, the oldest turns are folded into a rolling summary written by a cheap
+    `summarizer` agent, and only the most recent turns are kept verbatim. If summarizing
+    fails, the old turns are dropped and the previous summary is kept.
+    """
+
+    def __init__(
+        self,
+        summarizer: Agent[Any],
+        budgets: dict[str, HistoryBudget] | None = None,
+        default_budget: HistoryBudget | None = None,
+        prune_tool_outputs_over: int = 80,
+    ) -> None:
+        self.summarizer = summarizer
+        self.budgets = budgets or {}
+        self.default_budget = default_budget or HistoryBudget()
+        self.prune_tool_outputs_over = prune_tool_outputs_over
+        self.compactions = 0
+        self.summaries_failed = 0
+        self.pruned_tool_outputs = 0
+        self.tokens_dropped = 0
+        self.summarizer_latency = LatencyStats()
+
+    def budget_for(self, agent_name: str) -> HistoryBudget:
+        return self.budgets.get(agent_name, self.default_budget)
+
+    async def compact(self, window: ConversationWindow, agent_name: str) -> None:
+        """Prune consumed tool outputs, then summarize old turns if over `agent_name`'s budget."""
+        self._prune_tool_outputs(window.items)
+        budget = self.budget_for(agent_name)
+        if estimate_tokens(window.items) <= budget.max_tokens:
+            return
+
+        turns = _split_turns(window.items)
+        target = int(budget.max_tokens * budget.target_ratio)
+        keep = min(budget.min_turns, len(turns))
+        while keep < len(turns) and estimate_tokens(_flatten(turns[-(keep + 1):])) <= target:
+            keep += 1
+        old, recent = _flatten(turns[: len(turns) - keep]), _flatten(turns[len(turns) - keep :])
+        if not old:
+            return
+
+        self.compactions += 1
+        self.tokens_dropped += estimate_tokens(old)
+        window.summary = await self._summarize(window.summary, old)
+        window.items = recent
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "compactions": self.compactions,
+            "summaries_failed": self.summaries_failed,
+            "pruned_tool_outputs": self.pruned_tool_outputs,
+            "tokens_dropped": self.tokens_dropped,
+            "summarizer_latency": self.summarizer_latency.summary(),
+        }
+
+    def _prune_tool_outputs(self, items: list[TResponseInputItem]) -> None:
+        answered = False
+        for i in range(len(items) - 1, -1, -1):
+            item: Any = items[i]
+            if _is_assistant_message(item):
+                answered = True
+            elif (
+                answered
+                and item.get("type") == "function_call_output"
+                and len(str(item.get("output", ""))) > self.prune_tool_outputs_over
+            ):
+                items[i] = {**item, "output": "[tool output omitted, already used in a reply]"}
+                self.pruned_tool_outputs += 1
+
+    async def _summarize(self, summary: str | None, items: list[TResponseInputItem]) -> str | None:
+        prompt = (
+            f"Summary so far:\n{summary or '(none)'}\n\n"
+            f"Conversation turns to add:\n{_transcript(items)}"
+        )
+        started = time.perf_counter()
+        try:
+            result = await Runner.run(self.summarizer, prompt)
+        except Exception:
+            self.summaries_failed += 1
+            return summary
+        self.summarizer_latency.record(time.perf_counter() - started)
+        return str(result.final_output)
+
+
+def _is_user_message(item: Any) -> bool:
+    return item.get("role") == "user" and item.get("type", "message") == "message"
+
+
+def _is_assistant_message(item: Any) -> bool:
+    return item.get("role") == "assistant" and item.get("type", "message") == "message"
+
+
+def _split_turns(items: list[TResponseInputItem]) -> list[list[TResponseInputItem]]:
+    """Group items into turns, each starting at a user message."""
+    turns: list[list[TResponseInputItem]] = []
+    for item in items:
+        if not turns or _is_user_message(item):
+            turns.append([])
+        turns[-1].append(item)
+    return turns
+
+
+def _flatten(turns: list[list[TResponseInputItem]]) -> list[TResponseInputItem]:
+    return [item for turn in turns for item in turn]
+
+
+def _transcript(items: list[TResponseInputItem]) -> str:
+    lines = []
+    for item in items:
+        entry: Any = item
+        kind = entry.get("type", "message")
+        if kind == "message":
+            content = entry.get("content")
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            lines.append(f"{entry.get('role')}: {content}")
+        elif kind == "function_call":
+            lines.append(f"tool call: {entry.get('name')}({entry.get('arguments')})")
+        elif kind == "function_call_output":
+            lines.append(f"tool result: {entry.get('output')}")
+    return "\n".join(lines)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+import os
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+
+class ConcurrencyLimiter:
+    """
+    Process-wide cap on how many calls of one kind (e.g. web searches) run at once.
+
+    A single instance is shared by every in-flight job, so one heavy query cannot take all
+    of the event loop or the upstream rate limit.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.peak_active = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "peak_active": self.peak_active,
+        }
+
+
+@dataclass
+class SearchLimits:
+    concurrency: int = 8
+    """Maximum number of searches running at once across all research jobs."""
+
+    search_timeout: float = 60.0
+    """Seconds a single search may take before it is abandoned."""
+
+    phase_budget: float = 180.0
+    """Seconds the whole search phase of one job may take; unfinished searches are dropped."""
+
+    quorum: float = 1.0
+    """Share of a job's searches that must finish before the report is started."""
+
+    quorum_wait: float | None = None
+    """Seconds after which the report is started with whatever results are in (at least one)."""
+
+    late_results: str = "drop"
+    """What happens to searches still running when the report starts: "drop" or "refine"."""
+
+    @classmethod
+    def from_env(cls) -> SearchLimits:
+        env = os.environ
+        quorum_wait = env.get("SEARCH_QUORUM_WAIT_SECONDS")
+        limits = cls(
+            concurrency=int(env.get("SEARCH_CONCURRENCY", cls.concurrency)),
+            search_timeout=float(env.get("SEARCH_TIMEOUT_SECONDS", cls.search_timeout)),
+            phase_budget=float(env.get("SEARCH_PHASE_BUDGET_SECONDS", cls.phase_budget)),
+            quorum=float(env.get("SEARCH_QUORUM", cls.quorum)),
+            quorum_wait=float(quorum_wait) if quorum_wait else None,
+            late_results=env.get("SEARCH_LATE_RESULTS", cls.late_results).lower(),
+        )
+        if not 0 < limits.quorum <= 1:
+            raise ValueError(f"SEARCH_QUORUM must be in (0, 1], got {limits.quorum}")
+        if limits.late_results not in ("drop", "refine"):
+            raise ValueError(
+                f"Unknown SEARCH_LATE_RESULTS: {limits.late_results!r} (expected 'drop' or 'refine')"
+            )
+        return limits
+
+
+class SearchPhase:
+    """
+    The searches of one research job, started together and collected as they finish.
+
+    `quorum()` returns as soon as the writer can start: once a `quorum` share of the searches
+    has finished, or once `quorum_wait` seconds have passed and at least one search has
+    produced a result. Searches still running at that point are either collected later with
+    `rest()`, for a refinement pass, or dropped with `cancel()`. Nothing is waited for past
+    `phase_budget`.
+    """
+
+    def __init__(self, searches: Iterable[Awaitable[str | None]], limits: SearchLimits) -> None:
+        self.limits = limits
+        self._tasks = [asyncio.ensure_future(search) for search in searches]
+        self._pending = set(self._tasks)
+        self._started = time.monotonic()
+        self.total = len(self._tasks)
+        self.completed = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of searches still running."""
+        return len(self._pending)
+
+    @property
+    def budget_spent(self) -> bool:
+        return time.monotonic() - self._started >= self.limits.phase_budget
+
+    async def quorum(self, on_progress: Callable[[int, int], None] | None = None) -> list[str]:
+        """
+        Results (failed searches excluded) of the searches that finished before the quorum
+        was reached. `on_progress(completed, total)` is called as searches finish.
+        """
+        needed = math.ceil(self.total * self.limits.quorum)
+        results: list[str] = []
+        while self._pending and self.completed < needed:
+            deadline = self.limits.phase_budget
+            if self.limits.quorum_wait is not None and results:
+                deadline = min(deadline, self.limits.quorum_wait)
+            finished = await self._wait(deadline)
+            if finished is None:
+                break
+            results.extend(finished)
+            if on_progress is not None:
+                on_progress(self.completed, self.total)
+        return results
+
+    async def rest(self) -> list[str]:
+        """Results of the searches still running after `quorum()`, within the phase budget."""
+        results: list[str] = []
+        try:
+            while self._pending:
+                finished = await self._wait(self.limits.phase_budget)
+                if finished is None:
+                    break
+                results.extend(finished)
+        finally:
+            self.cancel()
+        return results
+
+    def cancel(self) -> None:
+        """Drop the searches that are still running."""
+        for task in self._pending:
+            task.cancel()
+        self._pending = set()
+
+    async def _wait(self, deadline: float) -> list[str] | None:
+        # None once `deadline` (seconds since the phase started) has passed
+        timeout = deadline - (time.monotonic() - self._started)
+        if timeout <= 0:
+            return None
+        done, self._pending = await asyncio.wait(
+            self._pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            return None
+        self.completed += len(done)
+        # A search cancelled from outside this phase counts as one that found nothing
+        return [
+            result for task in done if not task.cancelled() and (result := task.result()) is not None
+        ]
+
+
+class SubscriberTracker:
+    """
+    Counts SSE subscribers per session and calls `on_abandoned(key)` once the last one has
+    been gone for `grace_seconds`, so work nobody is watching can be cancelled. A client
+    that reconnects within the grace period keeps the session alive.
+
+    Only subscribers connected to this process are seen.
+    """
+
+    def __init__(self, on_abandoned: Callable[[str], None], grace_seconds: float = 10.0) -> None:
+        self.on_abandoned = on_abandoned
+        self.grace_seconds = grace_seconds
+        self._counts: dict[str, int] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+
+    def connect(self, key: str) -> None:
+        self._counts[key] = self._counts.get(key, 0) + 1
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+    def disconnect(self, key: str) -> None:
+        remaining = self._counts.get(key, 0) - 1
+        if remaining > 0:
+            self._counts[key] = remaining
+            return
+        self._counts.pop(key, None)
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(self.grace_seconds, self._abandon, key)
+
+    def _abandon(self, key: str) -> None:
+        self._timers.pop(key, None)
+        if key not in self._counts:
+            self.on_abandoned(key)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Any
+
+# Every logger handed out by `get_logger` lives under this one, so the examples can be
+# configured without touching the levels of uvicorn, httpx or the agents SDK
+ROOT = "examples"
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def fields(sample: bool = False, **values: Any) -> dict[str, Any]:
+    """
+    `extra=` argument attaching structured key/value fields to a log call. With
+    `sample=True` the record is a high-volume event (one per streamed message, say) and is
+    only kept for a `LOG_SAMPLE_RATE` fraction of calls.
+    """
+    return {"fields": values, "sample": sample}
+
+
+class _SampleFilter(logging.Filter):
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not getattr(record, "sample", False) or random.random() < self.rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread untouched. The stock handler formats the message
+    in the caller, which would put the formatting (and any large dict in the arguments)
+    back on the event loop.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    """`time level logger message key=value ...`"""
+
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        values = getattr(record, "fields", None)
+        if values:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in values.items())
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with the structured fields at the top level."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure() -> None:
+    """
+    Route all `examples.*` logging through a queue to a background thread that writes to
+    stderr, so a log call on the event loop never blocks on I/O. Runs once; later calls do
+    nothing. Configured from the environment:
+
+    - `LOG_LEVEL`: level of the `examples` loggers (default `INFO`)
+    - `LOG_LEVELS`: per-logger overrides, e.g. `examples.customer_service.api=DEBUG,examples.common=WARNING`
+    - `LOG_FORMAT`: `text` (default) or `json`
+    - `LOG_SAMPLE_RATE`: share of sampled high-volume events that is kept (default 0.01)
+    """
+    global _listener
+    if _listener is not None:
+        return
+    env = os.environ
+    root = logging.getLogger(ROOT)
+    root.setLevel(env.get("LOG_LEVEL", "INFO").upper())
+    for override in filter(None, env.get("LOG_LEVELS", "").split(",")):
+        name, _, level = override.partition("=")
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JSONFormatter() if env.get("LOG_FORMAT", "text") == "json" else TextFormatter())
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    # Sampling happens before the record is queued, so dropped events cost almost nothing
+    handler.addFilter(_SampleFilter(float(env.get("LOG_SAMPLE_RATE", "0.01"))))
+    root.addHandler(handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """The logger for module `name` (pass `__name__`), with logging configured on first use."""
+    configure()
+    if name != ROOT and not name.startswith(f"{ROOT}."):
+        name = f"{ROOT}.{name}"
+    return logging.getLogger(name)
+
+
+def elapsed_ms(started: float) -> float:
+    """Milliseconds since `started` (a `time.perf_counter()` value), for log fields."""
+    return round((time.perf_counter() - started) * 1000, 1)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Any
+
+
+class LatencyStats:
+    """
+    Rolling latency samples (in seconds) with percentile summaries for metrics endpoints.
+
+    Only the most recent `window` samples are kept, so memory stays constant and the
+    percentiles describe current behaviour rather than the whole process lifetime.
+    """
+
+    def __init__(self, window: int = 2048) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, pct: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+        return ordered[rank]
+
+    def summary(self) -> dict[str, Any]:
+        def ms(value: float | None) -> float | None:
+            return None if value is None else round(value * 1000, 2)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+        }
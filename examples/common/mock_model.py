@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import random
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from agents import Agent, Model, ModelProvider, ModelResponse, Usage, set_tracing_disabled
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseCreatedEvent,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+_WORDS = (
+    "market revenue growth margin guidance quarter analyst outlook demand supply pricing "
+    "segment forecast risk regulation competition capital cash flow product customers "
+    "strategy operating expense investment earnings trend signal data source policy"
+).split()
+
+# ModelResponse's id field was renamed between SDK releases.
+_RESPONSE_ID_FIELD = (
+    "response_id"
+    if "response_id" in {field.name for field in dataclasses.fields(ModelResponse)}
+    else "referenceable_id"
+)
+
+
+@dataclass
+class MockModelSettings:
+    latency: float = 0.2
+    """Seconds before the first token (time to first token)."""
+
+    latency_jitter: float = 0.0
+    """Up to this many extra seconds of latency, drawn per prompt, to model slow calls."""
+
+    tokens_per_second: float = 200.0
+    """Output pace once generation has started. 0 means instant."""
+
+    report_words: int = 1000
+    """Length of generated `markdown_report` fields."""
+
+    list_items: int = 5
+    """Number of items in generated lists (e.g. `WebSearchPlan.searches`)."""
+
+    text_words: int = 60
+    """Length of plain-text answers and other string fields (roughly)."""
+
+    @classmethod
+    def from_env(cls) -> MockModelSettings:
+        env = os.environ
+        return cls(
+            latency=float(env.get("MOCK_MODEL_LATENCY", cls.latency)),
+            latency_jitter=float(env.get("MOCK_MODEL_LATENCY_JITTER", cls.latency_jitter)),
+            tokens_per_second=float(env.get("MOCK_MODEL_TOKENS_PER_SECOND", cls.tokens_per_second)),
+            report_words=int(env.get("MOCK_MODEL_REPORT_WORDS", cls.report_words)),
+            list_items=int(env.get("MOCK_MODEL_LIST_ITEMS", cls.list_items)),
+            text_words=int(env.get("MOCK_MODEL_TEXT_WORDS", cls.text_words)),
+        )
+
+
+class MockModel(Model):
+    """
+    Deterministic local stand-in for an OpenAI model, for load tests and offline runs.
+
+    Structured outputs (WebSearchPlan, ReportData, FinancialReportData, VerificationResult,
+    AnalysisSummary, ...) are generated from the agent's output JSON schema; plain-text
+    agents get a few sentences. The same input always yields the same output. It never
+    calls tools or hands off, and simulates latency and token rate with `asyncio.sleep`.
+    """
+
+    def __init__(self, settings: MockModelSettings | None = None) -> None:
+        self.settings = settings or MockModelSettings()
+
+    async def get_response(
+        self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+        **kwargs: Any,
+    ) -> ModelResponse:
+        text = self._generate(input, output_schema)
+        tokens = _tokenize(text)
+        delay = self._latency(input)
+        if self.settings.tokens_per_second > 0:
+            delay += len(tokens) / self.settings.tokens_per_second
+        await asyncio.sleep(delay)
+        return ModelResponse(
+            output=[_message(text)],
+            usage=_usage(input, tokens),
+            **{_RESPONSE_ID_FIELD: None},
+        )
+
+    async def stream_response(
+        self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        text = self._generate(input, output_schema)
+        tokens = _tokenize(text)
+        sequence = 0
+        yield ResponseCreatedEvent.model_construct(
+            type="response.created", response=_response([]), sequence_number=sequence
+        )
+        await asyncio.sleep(self._latency(input))
+        interval = 1 / self.settings.tokens_per_second if self.settings.tokens_per_second > 0 else 0
+        for token in tokens:
+            sequence += 1
+            yield ResponseTextDeltaEvent.model_construct(
+                type="response.output_text.delta",
+                item_id="mock_message",
+                output_index=0,
+                content_index=0,
+                delta=token,
+                logprobs=[],
+                sequence_number=sequence,
+            )
+            if interval:
+                await asyncio.sleep(interval)
+        yield ResponseCompletedEvent.model_construct(
+            type="response.completed",
+            response=_response([_message(text)], _usage(input, tokens)),
+            sequence_number=sequence + 1,
+        )
+
+    def _latency(self, input: Any) -> float:
+        if not self.settings.latency_jitter:
+            return self.settings.latency
+        # Drawn from the prompt like the output, so the same call is always equally slow
+        prompt = input if isinstance(input, str) else json.dumps(input, default=str)
+        rng = random.Random(hashlib.sha256(b"latency:" + prompt.encode()).digest())
+        return self.settings.latency + rng.random() * self.settings.latency_jitter
+
+    def _generate(self, input: Any, output_schema: Any) -> str:
+        prompt = input if isinstance(input, str) else json.dumps(input, default=str)
+        rng = random.Random(hashlib.sha256(prompt.encode()).digest())
+        topic = _topic(_last_user_text(input))
+        if output_schema is None or output_schema.is_plain_text():
+            return _sentences(rng, topic, self.settings.text_words)
+        schema = output_schema.json_schema()
+        # Non-object output types are wrapped by the SDK, so the schema already covers that.
+        return json.dumps(_from_schema(schema, schema, "", rng, topic, self.settings))
+
+
+class MockModelProvider(ModelProvider):
+    """Returns the same MockModel whatever model name an agent asks for."""
+
+    def __init__(self, settings: MockModelSettings | None = None) -> None:
+        self.model = MockModel(settings)
+
+    def get_model(self, model_name: str | None) -> Model:
+        return self.model
+
+
+def use_mock_models(agents: Iterable[Agent[Any]], settings: MockModelSettings | None = None) -> None:
+    """
+    Point every agent in `agents` at a shared MockModel, so existing `Runner.run` calls work
+    offline without threading a `RunConfig(model_provider=MockModelProvider())` through them.
+    Trace export is disabled too, since it would need an API key.
+    """
+    set_tracing_disabled(True)
+    model = MockModel(settings or MockModelSettings.from_env())
+    for agent in agents:
+        agent.model = model
+
+
+def mock_models_enabled() -> bool:
+    """Whether the `MOCK_MODEL` environment variable asks for the offline mock model."""
+    return os.environ.get("MOCK_MODEL", "").lower() in ("1", "true", "yes")
+
+
+def _from_schema(
+    schema: dict[str, Any], root: dict[str, Any], name: str, rng: random.Random, topic: str,
+    settings: MockModelSettings,
+) -> Any:
+    if "$ref" in schema:
+        target: Any = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            target = target[part]
+        return _from_schema(target, root, name, rng, topic, settings)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [option for option in schema[combinator] if option.get("type") != "null"]
+            return _from_schema(options[0], root, name, rng, topic, settings)
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            key: _from_schema(value, root, key, rng, topic, settings)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [
+            _from_schema(schema.get("items", {}), root, name, rng, f"{topic} {i + 1}", settings)
+            for i in range(settings.list_items)
+        ]
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        return rng.randint(1, 100)
+    if "markdown" in name or "report" in name:
+        return _markdown(rng, topic, settings.report_words)
+    if name == "query":
+        return f"{topic} {rng.choice(_WORDS)} {rng.choice(_WORDS)}"
+    return _sentences(rng, topic, min(settings.text_words, 40))
+
+
+def _last_user_text(input: Any) -> str:
+    if isinstance(input, str):
+        return input
+    for item in reversed(input):
+        if isinstance(item, dict) and item.get("role") == "user" and isinstance(item.get("content"), str):
+            return item["content"]
+    return ""
+
+
+def _topic(prompt: str) -> str:
+    for marker in ("Query:", "Search term:", "Original query:"):
+        if marker in prompt:
+            prompt = prompt.split(marker, 1)[1]
+            break
+    lines = prompt.strip().splitlines() or [""]
+    return " ".join(lines[0].split()[:6]).strip(" .,:;!?\"'") or "topic"
+
+
+def _sentences(rng: random.Random, topic: str, words: int) -> str:
+    sentences = []
+    count = 0
+    while count < words:
+        length = rng.randint(8, 16)
+        body = " ".join(rng.choice(_WORDS) for _ in range(length))
+        sentences.append(f"The {topic} {body}.")
+        count += length + 2
+    return " ".join(sentences)
+
+
+def _markdown(rng: random.Random, topic: str, words: int) -> str:
+    sections = [f"# Report: {topic}\n"]
+    per_section = max(50, words // 5)
+    written = 0
+    index = 1
+    while written < words:
+        sections.append(f"## Section {index}\n\n{_sentences(rng, topic, per_section)}\n")
+        written += per_section
+        index += 1
+    return "\n".join(sections)
+
+
+def _tokenize(text: str) -> list[str]:
+    # Roughly four characters per token, like real BPE output.
+    return [text[i : i + 4] for i in range(0, len(text), 4)]
+
+
+def _message(text: str) -> ResponseOutputMessage:
+    return ResponseOutputMessage(
+        id="mock_message",
+        type="message",
+        role="assistant",
+        status="completed",
+        content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+    )
+
+
+def _response(output: list[Any], usage: Usage | None = None) -> Response:
+    return Response.model_construct(
+        id="mock_response",
+        object="response",
+        created_at=0,
+        model="mock",
+        output=output,
+        tool_choice="auto",
+        tools=[],
+        top_p=None,
+        parallel_tool_calls=False,
+        usage=None if usage is None else ResponseUsage.model_construct(
+            input_tokens=usage.input_tokens,
+            input_tokens_details=InputTokensDetails.model_construct(cached_tokens=0),
+            output_tokens=usage.output_tokens,
+            output_tokens_details=OutputTokensDetails.model_construct(reasoning_tokens=0),
+            total_tokens=usage.total_tokens,
+        ),
+    )
+
+
+def _usage(input: Any, tokens: list[str]) -> Usage:
+    prompt = input if isinstance(input, str) else json.dumps(input, default=str)
+    input_tokens = len(prompt) // 4
+    return Usage(
+        requests=1,
+        input_tokens=input_tokens,
+        output_tokens=len(tokens),
+        total_tokens=input_tokens + len(tokens),
+    )
@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import contextlib
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Callable, Iterable, Sequence
+from typing import Any
+
+from agents import Agent, Runner, RunResult, custom_span, gen_trace_id, trace
+from agents.usage import Usage
+
+from examples.common.archive import ArchivedReport, ReportArchive
+from examples.common.cache import ResultCache
+from examples.common.dedup import SearchDeduplicator
+from examples.common.limits import ConcurrencyLimiter, SearchLimits, SearchPhase
+from examples.common.log import elapsed_ms, fields, get_logger
+from examples.common.metrics import LatencyStats
+from examples.common.report_stream import ReportStream
+
+
+class ProgressSink(abc.ABC):
+    """
+    Where a pipeline run reports to: a live Rich display for the CLIs (`PrinterSink`) or the
+    SSE update stream for the web apps (`EventSink`).
+    """
+
+    chunk_interval = 0.25
+    """Seconds between report chunks handed to `report_chunk` while the writer streams."""
+
+    @abc.abstractmethod
+    def update(self, stage: str, content: str, is_done: bool = False) -> None:
+        """Progress of `stage` ("planning", "searching", ...); replaces its previous message."""
+
+    @abc.abstractmethod
+    def result(self, kind: str, content: str) -> None:
+        """
+        A result for the user: "final_report", "full_report", "follow_up_questions" or
+        "verification". A refined report sends its results again, replacing the first ones.
+        """
+
+    def report_chunk(self, chunk: str, words: int) -> None:
+        """The next piece of the report's markdown; `words` is the total written so far."""
+
+    def close(self) -> None:
+        """The run is over, successfully or not."""
+
+
+class PrinterSink(ProgressSink):
+    """Progress on a live Rich `Printer`; the report is printed to stdout once the run is over."""
+
+    chunk_interval = 0.5
+
+    def __init__(self, printer: Any, quiet: Iterable[str] = ("trace_id",)) -> None:
+        self.printer = printer
+        self.quiet = set(quiet)
+        self.results: dict[str, str] = {}
+
+    def update(self, stage: str, content: str, is_done: bool = False) -> None:
+        self.printer.update_item(stage, content, is_done=is_done, hide_checkmark=stage in self.quiet)
+
+    def report_chunk(self, chunk: str, words: int) -> None:
+        self.printer.update_item("writing", f"Writing report... ~{words} words")
+
+    def result(self, kind: str, content: str) -> None:
+        if kind == "final_report":
+            self.printer.update_item(kind, content, is_done=True)
+        else:
+            self.results[kind] = content
+
+    def close(self) -> None:
+        self.printer.end()
+        for kind, title in (
+            ("full_report", "REPORT"),
+            ("follow_up_questions", "FOLLOW UP QUESTIONS"),
+            ("verification", "VERIFICATION"),
+        ):
+            if kind in self.results:
+                print(f"\n\n====={title}=====\n\n")
+                print(self.results[kind])
+
+
+class EventSink(ProgressSink):
+    """
+    Progress and results as stream updates, `publish(type, content, is_done)`, which the web
+    apps send to their SSE clients. Report chunks go out as "report_chunk" updates.
+    """
+
+    def __init__(self, publish: Callable[[str, str, bool], None]) -> None:
+        self.publish = publish
+        self._writing = False
+
+    def update(self, stage: str, content: str, is_done: bool = False) -> None:
+        self.publish(stage, content, is_done)
+
+    def report_chunk(self, chunk: str, words: int) -> None:
+        if not self._writing:
+            self._writing = True
+            self.publish("writing", "Writing report...", False)
+        self.publish("report_chunk", chunk, False)
+
+    def result(self, kind: str, content: str) -> None:
+        self.publish(kind, content, True)
+
+
+class ResultSink(ProgressSink):
+    """Keeps the latest results and ignores progress, for unattended (batch) runs."""
+
+    def __init__(self) -> None:
+        self.results: dict[str, str] = {}
+
+    def update(self, stage: str, content: str, is_done: bool = False) -> None:
+        pass
+
+    def result(self, kind: str, content: str) -> None:
+        self.results[kind] = content
+
+
+class StageHook:
+    """
+    Runs around every stage ("planning", "searching", "writing", "refining", "verifying") of
+    every pipeline run, from the CLI and the web app alike. Override `stage`, an async context
+    manager entered for the duration of the stage, to time, log or bound stages, and
+    `milestone` to observe points such as the first report going out.
+    """
+
+    @contextlib.asynccontextmanager
+    async def stage(self, name: str) -> AsyncIterator[None]:
+        yield
+
+    def milestone(self, name: str, seconds: float) -> None:
+        """Milestone `name` (e.g. "first_report") was reached `seconds` into the run."""
+
+
+class StageMetrics(StageHook):
+    """Duration percentiles and failures per stage, and time to each milestone, for /metrics."""
+
+    def __init__(self, milestones: Iterable[str] = ()) -> None:
+        self.durations: dict[str, LatencyStats] = {}
+        self.failures: Counter[str] = Counter()
+        self.milestones = {name: LatencyStats() for name in milestones}
+
+    @contextlib.asynccontextmanager
+    async def stage(self, name: str) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.failures[name] += 1
+            raise
+        self.durations.setdefault(name, LatencyStats()).record(time.perf_counter() - started)
+
+    def milestone(self, name: str, seconds: float) -> None:
+        self.milestones.setdefault(name, LatencyStats()).record(seconds)
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "stages": {
+                name: {**stats.summary(), "failures": self.failures[name]}
+                for name, stats in self.durations.items()
+            },
+            **{f"time_to_{name}": stats.summary() for name, stats in self.milestones.items()},
+        }
+
+
+class StageLog(StageHook):
+    """Logs each finished stage and its duration at debug level."""
+
+    def __init__(self, logger_name: str, **log_fields: Any) -> None:
+        self.logger = get_logger(logger_name)
+        self.log_fields = log_fields
+
+    @contextlib.asynccontextmanager
+    async def stage(self, name: str) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        yield
+        self.logger.debug(
+            "Stage completed", extra=fields(**self.log_fields, stage=name, duration_ms=elapsed_ms(started))
+        )
+
+
+class ResearchPipeline:
+    """
+    Plan, search and write one research report: the engine behind both the CLI and the web
+    app of each research example, which differ only in the `ProgressSink` they pass in.
+
+    Subclasses name their agents and shared resources as class attributes and may add stages
+    by overriding `_report` (the financial example verifies the report). Searches go through
+    `cache`, `limiter` and `limits` (see `SearchPhase`); every stage runs inside the `hooks`,
+    the class's own followed by those passed to the constructor. Search plans are reused
+    from `plan_cache`, near-duplicate planned searches are merged by `dedup`, and finished
+    reports are kept in `archive`, if set.
+    """
+
+    trace_name = "Research trace"
+    start_update = ("start", "Starting research...")
+
+    planner: Agent[Any]
+    searcher: Agent[Any]
+    writer: Agent[Any]
+    report_type: type[Any]
+
+    limits: SearchLimits
+    limiter: ConcurrencyLimiter
+    cache: ResultCache
+    plan_cache: ResultCache
+    dedup: SearchDeduplicator | None = None
+    archive: ReportArchive | None = None
+    hooks: Sequence[StageHook] = ()
+
+    def __init__(
+        self, sink: ProgressSink, hooks: Sequence[StageHook] = (), log_fields: dict[str, Any] | None = None
+    ) -> None:
+        self.sink = sink
+        self.hooks = [*type(self).hooks, *hooks]
+        self.log_fields = log_fields or {}
+        self.logger = get_logger(type(self).__module__)
+        # Tokens used by this run's own model calls; searches served from the cache cost none
+        self.usage = Usage()
+        # The published verification result, for subclasses that verify the report
+        self.verification: str | None = None
+        self.searches_saved = 0
+        self._started = time.perf_counter()
+        self._milestones: dict[str, float] = {}
+
+    def search_input(self, item: Any) -> str:
+        return f"Search term: {item.query}\nReason for searching: {item.reason}"
+
+    def writer_input(self, query: str, search_results: Sequence[str]) -> str:
+        return f"Original query: {query}\nSummarized search results: {list(search_results)}"
+
+    async def run(self, query: str) -> None:
+        trace_id = gen_trace_id()
+        self._started = time.perf_counter()
+        try:
+            with trace(self.trace_name, trace_id=trace_id):
+                self.sink.update(
+                    "trace_id",
+                    f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}",
+                    is_done=True,
+                )
+                self.sink.update(*self.start_update, is_done=True)
+                async with self._stage("planning"):
+                    search_plan = await self._plan_searches(query)
+                    search_items = self._dedupe_searches(search_plan.searches)
+                searches = SearchPhase((self._search(item) for item in search_items), self.limits)
+                try:
+                    async with self._stage("searching"):
+                        search_results = await self._perform_searches(searches)
+                    report = await self._report(query, search_results, searches)
+                finally:
+                    # Drop searches that are still running: the budget is spent or this run was cancelled
+                    searches.cancel()
+            if self.archive is not None:
+                self.archive.store(query, search_items, report, self.verification)
+            self.logger.info(
+                "Research completed",
+                extra=fields(
+                    **self.log_fields,
+                    trace_id=trace_id,
+                    duration_ms=elapsed_ms(self._started),
+                    tokens=self.usage.total_tokens,
+                    searches_saved=self.searches_saved,
+                    **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in self._milestones.items()},
+                ),
+            )
+        finally:
+            self.sink.close()
+
+    def replay(self, archived: ArchivedReport) -> None:
+        """Publish a report from the archive, written earlier for a (nearly) identical query."""
+        try:
+            minutes = max(1, round((time.time() - archived.created) / 60))
+            self.sink.update(
+                "archived",
+                f"Reusing the report written {minutes} min ago for: {archived.query}",
+                is_done=True,
+            )
+            self._publish_report(self.report_type.model_validate(archived.report))
+            if archived.verification is not None:
+                self.sink.result("verification", archived.verification)
+        finally:
+            self.sink.close()
+
+    async def _report(self, query: str, search_results: list[str], searches: SearchPhase) -> Any:
+        """Write the report from the quorum's results, then refine it with the late ones."""
+        async with self._stage("writing"):
+            report = await self._write_report(query, search_results)
+        self._publish_report(report)
+        self._milestone("first_report")
+        if searches.pending:
+            report = await self._refine(query, search_results, searches) or report
+        return report
+
+    async def _run(self, agent: Agent[Any], input: str) -> RunResult:
+        result = await Runner.run(agent, input)
+        self.usage.add(result.context_wrapper.usage)
+        return result
+
+    @contextlib.asynccontextmanager
+    async def _stage(self, name: str) -> AsyncIterator[None]:
+        async with contextlib.AsyncExitStack() as stack:
+            for hook in self.hooks:
+                await stack.enter_async_context(hook.stage(name))
+            yield
+
+    def _milestone(self, name: str) -> None:
+        seconds = time.perf_counter() - self._started
+        self._milestones[name] = seconds
+        for hook in self.hooks:
+            hook.milestone(name, seconds)
+
+    def _publish_report(self, report: Any) -> None:
+        self.sink.result("final_report", f"Report summary\n\n{report.short_summary}")
+        self.sink.result("full_report", report.markdown_report)
+        self.sink.result("follow_up_questions", "\n".join(report.follow_up_questions))
+
+    async def _plan_searches(self, query: str) -> Any:
+        self.sink.update("planning", "Planning searches...")
+        # Identical queries (after normalization) share one plan, across runs and users
+        plan = await self.plan_cache.get_or_compute(query, lambda: self._run_planner(query))
+        return self.planner.output_type.model_validate(plan)
+
+    async def _run_planner(self, query: str) -> dict[str, Any]:
+        result = await self._run(self.planner, f"Query: {query}")
+        return result.final_output.model_dump()
+
+    def _dedupe_searches(self, items: Sequence[Any]) -> list[Any]:
+        """The planned searches with near-duplicates merged; each one merged is a search saved."""
+        searches = self.dedup.dedupe(items) if self.dedup is not None else list(items)
+        self.searches_saved = len(items) - len(searches)
+        message = f"Will perform {len(searches)} searches"
+        if self.searches_saved:
+            message += f" ({self.searches_saved} near-duplicates merged)"
+        self.sink.update("planning", message, is_done=True)
+        return searches
+
+    async def _perform_searches(self, searches: SearchPhase) -> list[str]:
+        with custom_span("Search the web"):
+            self.sink.update("searching", "Searching...")
+            results = await searches.quorum(
+                lambda completed, total: self.sink.update(
+                    "searching", f"Searching... {completed}/{total} completed"
+                )
+            )
+            late = searches.pending
+            if not late:
+                self.sink.update("searching", "Search completed", is_done=True)
+            elif searches.budget_spent:
+                searches.cancel()
+                self.sink.update(
+                    "searching",
+                    f"Search time budget reached, continuing with {len(results)} results",
+                    is_done=True,
+                )
+            elif self.limits.late_results == "refine":
+                self.sink.update(
+                    "searching",
+                    f"Writing with {len(results)} results, {late} searches still running",
+                    is_done=True,
+                )
+            else:
+                searches.cancel()
+                self.sink.update(
+                    "searching",
+                    f"Continuing with {len(results)} results, dropped {late} slower searches",
+                    is_done=True,
+                )
+            return results
+
+    async def _search(self, item: Any) -> str | None:
+        # Identical queries (after normalization) share one search, across runs and users
+        return await self.cache.get_or_compute(item.query, lambda: self._run_search(item))
+
+    async def _run_search(self, item: Any) -> str | None:
+        try:
+            async with self.limiter.slot():
+                result = await asyncio.wait_for(
+                    self._run(self.searcher, self.search_input(item)), timeout=self.limits.search_timeout
+                )
+            return str(result.final_output)
+        except Exception as exc:
+            self.logger.warning(
+                "Search failed", extra=fields(**self.log_fields, query=item.query, error=repr(exc))
+            )
+            return None
+
+    async def _write_report(
+        self, query: str, search_results: Sequence[str], on_chunk: Callable[[str], None] | None = None
+    ) -> Any:
+        self.sink.update("writing", "Thinking about report...")
+        result = Runner.run_streamed(self.writer, self.writer_input(query, search_results))
+
+        # Forward the report's markdown as it is generated
+        report_stream = ReportStream(flush_interval=self.sink.chunk_interval)
+
+        def forward(chunk: str) -> None:
+            self.sink.report_chunk(chunk, report_stream.words)
+            if on_chunk is not None:
+                on_chunk(chunk)
+
+        async for event in result.stream_events():
+            chunk = report_stream.feed(event)
+            if chunk:
+                forward(chunk)
+        chunk = report_stream.flush()
+        if chunk:
+            forward(chunk)
+
+        self.usage.add(result.context_wrapper.usage)
+        self.sink.update("writing", "Report completed", is_done=True)
+        return result.final_output_as(self.report_type)
+
+    async def _refine(self, query: str, search_results: list[str], searches: SearchPhase) -> Any:
+        """
+        Rewrite the report once the searches left running (SEARCH_LATE_RESULTS=refine) are in,
+        and publish it in place of the first one. None if they brought nothing new.
+        """
+        async with self._stage("refining"):
+            self.sink.update("refining", f"Waiting for {searches.pending} more searches...")
+            late_results = await searches.rest()
+            if not late_results:
+                self.sink.update("refining", "No further search results", is_done=True)
+                return None
+            self.sink.update("refining", f"Refining report with {len(late_results)} more search results...")
+            result = await self._run(self.writer, self.writer_input(query, [*search_results, *late_results]))
+            report = result.final_output_as(self.report_type)
+            self.sink.update("refining", "Report refined", is_done=True)
+        self._publish_report(report)
+        self._milestone("refined_report")
+        return report
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+from .session_store import SessionStore
+
+
+class Topic:
+    """
+    Append-only log of items for a single stream (a research run or a conversation).
+
+    Publishing wakes every subscriber immediately; a subscriber with nothing left to read
+    parks on an `asyncio.Event` and uses no CPU until the next publish or close.
+
+    Transient items (e.g. token deltas) are delivered to subscribers that are connected when
+    they are broadcast, but are not kept: they are dropped as soon as the next durable item
+    is published, so replays only ever see durable items.
+    """
+
+    def __init__(self) -> None:
+        self.items: list[Any] = []
+        self.closed = False
+        self._changed = asyncio.Event()
+        self._transient: list[Any] = []
+        self._transient_base = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def publish(self, item: Any) -> None:
+        self.items.append(item)
+        self._transient_base += len(self._transient)
+        self._transient = []
+        self._notify()
+
+    def broadcast(self, item: Any) -> None:
+        """Deliver a transient item to current subscribers without storing it."""
+        self._transient.append(item)
+        self._notify()
+
+    def close(self) -> None:
+        """Mark the stream as finished. Subscribers drain what is left and then stop."""
+        self.closed = True
+        self._notify()
+
+    def _notify(self) -> None:
+        # Swap in a fresh event so waiters that wake up re-arm on the new one.
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self, start: int = 0) -> AsyncIterator[Any]:
+        """Yield every item from index `start`, then each new item as it is published."""
+        idx = start
+        transient_seen = self._transient_base + len(self._transient)
+        while True:
+            while idx < len(self.items):
+                yield self.items[idx]
+                idx += 1
+            # Transient items follow the last durable item, so they are only sent once we have
+            # caught up with the log. Anything superseded while we were suspended is skipped,
+            # and a durable item published meanwhile is sent before any newer transients.
+            while idx == len(self.items):
+                transient_seen = max(transient_seen, self._transient_base)
+                position = transient_seen - self._transient_base
+                if position >= len(self._transient):
+                    break
+                yield self._transient[position]
+                transient_seen += 1
+            if idx < len(self.items):
+                continue
+            if self.closed:
+                return
+            await self._changed.wait()
+
+
+class Broker:
+    """
+    Keyed collection of topics, one per stream id.
+
+    Topics live in a `SessionStore`, so the broker inherits its LRU/TTL eviction and memory
+    ceiling. `sizeof` reports how many bytes each published item costs; evicted topics are
+    closed so their subscribers finish cleanly.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore | None = None,
+        sizeof: Callable[[Any], int] | None = None,
+    ) -> None:
+        self.store = store if store is not None else SessionStore(
+            max_sessions=2**31, ttl_seconds=float("inf"), max_bytes=2**63
+        )
+        self._store_on_evict = self.store.on_evict
+        self.store.on_evict = self._on_evict
+        self.sizeof = sizeof
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def create(self, key: str) -> Topic:
+        topic = Topic()
+        self.store.put(key, topic)
+        return topic
+
+    def get(self, key: str) -> Topic | None:
+        return self.store.get(key)
+
+    def __getitem__(self, key: str) -> Topic:
+        return self.store[key]
+
+    def publish(self, key: str, item: Any) -> None:
+        topic = self.store.get(key)
+        if topic is None:
+            # The stream was evicted while its producer was still running.
+            return
+        topic.publish(item)
+        if self.sizeof is not None:
+            self.store.grow(key, self.sizeof(item))
+
+    def broadcast(self, key: str, item: Any) -> None:
+        topic = self.store.get(key)
+        if topic is not None:
+            topic.broadcast(item)
+
+    def close(self, key: str) -> None:
+        topic = self.store.get(key)
+        if topic is not None:
+            topic.close()
+            self.store.mark_finished(key)
+
+    def remove(self, key: str) -> None:
+        topic = self.store.remove(key)
+        if topic is not None:
+            topic.close()
+
+    def _on_evict(self, key: str, topic: Topic) -> None:
+        topic.close()
+        if self._store_on_evict is not None:
+            self._store_on_evict(key, topic)
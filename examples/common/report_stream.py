@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from openai.types.responses import ResponseTextDeltaEvent
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class StreamingJSONFieldParser:
+    """
+    Incremental parser for a JSON object that arrives in arbitrary text fragments.
+
+    It decodes the string values of the requested top-level `fields` as they stream in,
+    including escape sequences split across fragments, and ignores everything else. This is
+    what lets a structured output such as `ReportData` be shown before the model finishes.
+    """
+
+    def __init__(self, fields: Iterable[str]) -> None:
+        self.fields = set(fields)
+        self.reset()
+
+    def reset(self) -> None:
+        self._depth = 0
+        self._expect_key = False
+        self._in_string = False
+        self._is_key = False
+        self._escape = False
+        self._unicode: str | None = None
+        self._high_surrogate: int | None = None
+        self._key_chars: list[str] = []
+        self._key: str | None = None
+        self._capture: str | None = None
+        self._out: list[tuple[str, str]] = []
+
+    def feed(self, text: str) -> list[tuple[str, str]]:
+        """Consume the next fragment and return newly decoded `(field, text)` pieces."""
+        i, n = 0, len(text)
+        while i < n:
+            if self._in_string:
+                if self._unicode is not None:
+                    self._unicode += text[i]
+                    i += 1
+                    if len(self._unicode) == 4:
+                        code, self._unicode = int(self._unicode, 16), None
+                        self._emit_code_point(code)
+                    continue
+                if self._escape:
+                    self._escape = False
+                    if text[i] == "u":
+                        self._unicode = ""
+                    else:
+                        self._emit(_ESCAPES.get(text[i], text[i]))
+                    i += 1
+                    continue
+                # Fast path: copy everything up to the next quote or backslash in one slice.
+                match = _STRING_SPECIAL.search(text, i)
+                end = match.start() if match else n
+                if end > i:
+                    self._emit(text[i:end])
+                    i = end
+                    continue
+                if text[i] == '"':
+                    self._end_string()
+                else:
+                    self._escape = True
+                i += 1
+                continue
+
+            ch = text[i]
+            if ch == '"':
+                self._start_string()
+            elif ch == "{" or ch == "[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = ch == "{"
+            elif ch == "}" or ch == "]":
+                self._depth -= 1
+            elif self._depth == 1 and ch == ":":
+                self._expect_key = False
+            elif self._depth == 1 and ch == ",":
+                self._expect_key = True
+            i += 1
+
+        out, self._out = self._out, []
+        return out
+
+    def _start_string(self) -> None:
+        self._in_string = True
+        self._is_key = self._depth == 1 and self._expect_key
+        if not self._is_key and self._depth == 1 and self._key in self.fields:
+            self._capture = self._key
+
+    def _end_string(self) -> None:
+        if self._is_key:
+            self._key = "".join(self._key_chars)
+            self._key_chars = []
+        self._in_string = False
+        self._is_key = False
+        self._capture = None
+
+    def _emit_code_point(self, code: int) -> None:
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._emit(chr(code))
+
+    def _emit(self, text: str) -> None:
+        if self._is_key:
+            self._key_chars.append(text)
+        elif self._capture is not None:
+            if self._out and self._out[-1][0] == self._capture:
+                self._out[-1] = (self._capture, self._out[-1][1] + text)
+            else:
+                self._out.append((self._capture, text))
+
+
+class ReportStream:
+    """
+    Pulls the markdown report out of a writer agent's streamed structured output.
+
+    Feed it every event from `RunResultStreaming.stream_events()`. Decoded report text is
+    buffered and handed back at most once per `flush_interval` seconds, so each chunk sent
+    to clients holds a few hundred characters instead of a single token.
+    """
+
+    def __init__(self, field: str = "markdown_report", flush_interval: float = 0.25) -> None:
+        self.parser = StreamingJSONFieldParser([field])
+        self.flush_interval = flush_interval
+        self.chars = 0
+        self.words = 0
+        # Whether the text so far ends mid-word, so a word split across deltas counts once
+        self._in_word = False
+        self._pending: list[str] = []
+        self._last_flush = time.monotonic()
+
+    def feed(self, event: Any) -> str | None:
+        """Consume a stream event; return a chunk of report text when one is due."""
+        if event.type != "raw_response_event" or not isinstance(event.data, ResponseTextDeltaEvent):
+            return None
+        for _, text in self.parser.feed(event.data.delta):
+            self._pending.append(text)
+            self.chars += len(text)
+            self.words += len(text.split()) - (self._in_word and not text[0].isspace())
+            self._in_word = not text[-1].isspace()
+        if self._pending and time.monotonic() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return None
+
+    def flush(self) -> str:
+        """Return whatever report text is still buffered (possibly empty)."""
+        text = "".join(self._pending)
+        self._pending = []
+        self._last_flush = time.monotonic()
+        return text
+
+
+class MarkdownSections:
+    """
+    Splits streamed markdown into sections at its headings, so each finished section can be
+    processed while the rest is still being written. A section is only cut off once the
+    next heading has arrived and it holds at least `min_chars` characters; shorter ones are
+    merged into the following section.
+    """
+
+    _HEADING = re.compile(r"^#{1,6} ", re.MULTILINE)
+
+    def __init__(self, min_chars: int = 800) -> None:
+        self.min_chars = min_chars
+        self.count = 0
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Consume the next piece of markdown and return the sections it completed."""
+        self._buffer += text
+        sections = []
+        while True:
+            cut = next(
+                (m.start() for m in self._HEADING.finditer(self._buffer, 1) if m.start() >= self.min_chars),
+                None,
+            )
+            if cut is None:
+                break
+            sections.append(self._buffer[:cut])
+            self._buffer = self._buffer[cut:]
+        self.count += len(sections)
+        return sections
+
+    def flush(self) -> str | None:
+        """Return the last, unterminated section once the markdown is complete."""
+        section, self._buffer = self._buffer, ""
+        if not section.strip():
+            return None
+        self.count += 1
+        return section
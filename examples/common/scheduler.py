@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .metrics import LatencyStats
+
+
+class QueueFullError(Exception):
+    """Raised by `JobScheduler.submit` when the wait queue is full."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """
+    Admission control for long-running background jobs such as research runs.
+
+    At most `workers` jobs run at once; up to `max_queue` more wait in FIFO order and
+    anything beyond that is rejected with `QueueFullError`. Jobs are started as soon as a
+    running one finishes, so an idle scheduler has no tasks of its own. Running jobs are
+    referenced until they finish, so they cannot be garbage-collected mid-run.
+
+    `on_position(job_id, position)` is called whenever a queued job's position changes;
+    position 0 means the job has just started.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 32,
+        on_position: Callable[[str, int], None] | None = None,
+    ) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self.on_position = on_position
+        self._queue: OrderedDict[str, tuple[Callable[[], Awaitable[Any]], float]] = OrderedDict()
+        self._running: dict[str, asyncio.Task[Any]] = {}
+        self.submitted = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.queue_wait = LatencyStats()
+        self.run_time = LatencyStats()
+
+    @classmethod
+    def from_env(cls, prefix: str, **kwargs: Any) -> JobScheduler:
+        """Read `<PREFIX>_WORKERS` and `<PREFIX>_QUEUE_SIZE` from the environment."""
+        env = os.environ
+        if f"{prefix}_WORKERS" in env:
+            kwargs["workers"] = int(env[f"{prefix}_WORKERS"])
+        if f"{prefix}_QUEUE_SIZE" in env:
+            kwargs["max_queue"] = int(env[f"{prefix}_QUEUE_SIZE"])
+        return cls(**kwargs)
+
+    def submit(self, job_id: str, job: Callable[[], Awaitable[Any]]) -> int:
+        """
+        Start `job()` now or queue it. Returns the queue position (0 if started).
+
+        Raises QueueFullError, carrying a Retry-After estimate, if the queue is full.
+        """
+        if len(self._running) < self.workers and not self._queue:
+            self.submitted += 1
+            self._start(job_id, job, time.monotonic())
+            return 0
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+        self.submitted += 1
+        self._queue[job_id] = (job, time.monotonic())
+        position = len(self._queue)
+        if self.on_position is not None:
+            self.on_position(job_id, position)
+        return position
+
+    def cancel(self, job_id: str) -> str | None:
+        """
+        Cancel a job. Returns "queued" if it was removed from the queue (it never ran),
+        "running" if its task was cancelled, or None if the job is unknown or finished.
+        """
+        if self._queue.pop(job_id, None) is not None:
+            self.cancelled += 1
+            self._renumber()
+            return "queued"
+        task = self._running.get(job_id)
+        if task is not None and not task.done():
+            self.cancelled += 1
+            task.cancel()
+            return "running"
+        return None
+
+    def position(self, job_id: str) -> int | None:
+        if job_id in self._running:
+            return 0
+        for position, queued_id in enumerate(self._queue, start=1):
+            if queued_id == job_id:
+                return position
+        return None
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up, for the Retry-After header."""
+        average = self.run_time.total / self.run_time.count if self.run_time.count else 60.0
+        return max(1, math.ceil(average * (len(self._queue) + 1) / self.workers))
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "queued": len(self._queue),
+            "max_queue": self.max_queue,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "queue_wait": self.queue_wait.summary(),
+            "run_time": self.run_time.summary(),
+        }
+
+    def _start(self, job_id: str, job: Callable[[], Awaitable[Any]], enqueued_at: float) -> None:
+        started = time.monotonic()
+        self.queue_wait.record(started - enqueued_at)
+        task = asyncio.create_task(job())
+        self._running[job_id] = task
+        task.add_done_callback(lambda _: self._finished(job_id, started))
+
+    def _finished(self, job_id: str, started: float) -> None:
+        self._running.pop(job_id, None)
+        self.run_time.record(time.monotonic() - started)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        started_any = False
+        while self._queue and len(self._running) < self.workers:
+            job_id, (job, enqueued_at) = self._queue.popitem(last=False)
+            self._start(job_id, job, enqueued_at)
+            if self.on_position is not None:
+                self.on_position(job_id, 0)
+            started_any = True
+        if started_any:
+            self._renumber()
+
+    def _renumber(self) -> None:
+        if self.on_position is None:
+            return
+        for position, job_id in enumerate(self._queue, start=1):
+            self.on_position(job_id, position)
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import abc
+import os
+import sqlite3
+import zlib
+from dataclasses import dataclass
+from typing import Any
+
+
+class SeatError(Exception):
+    """Base class for seat assignment failures; the message is safe to show to a customer."""
+
+
+class UnknownSeatError(SeatError):
+    def __init__(self, seat: str) -> None:
+        super().__init__(f"There is no seat {seat} on this aircraft")
+        self.seat = seat
+
+
+class SeatUnavailableError(SeatError):
+    def __init__(self, seat: str) -> None:
+        super().__init__(f"Seat {seat} is already taken")
+        self.seat = seat
+
+
+@dataclass(frozen=True)
+class Seat:
+    label: str
+    row: int
+    cabin: str
+    """"business" or "economy"."""
+
+    exit_row: bool = False
+    economy_plus: bool = False
+
+
+class SeatMap:
+    """
+    Seat layout of an aircraft type. Seat `i` of the layout is bit `i` of a flight's bitmap,
+    and every seat attribute has a precomputed mask, so availability queries are a couple of
+    integer operations.
+    """
+
+    def __init__(self, seats: list[Seat]) -> None:
+        self.seats = seats
+        self.index = {seat.label: i for i, seat in enumerate(seats)}
+        self.all = (1 << len(seats)) - 1
+        self.masks = {
+            "business": self._mask(lambda seat: seat.cabin == "business"),
+            "economy": self._mask(lambda seat: seat.cabin == "economy"),
+            "exit_row": self._mask(lambda seat: seat.exit_row),
+            "economy_plus": self._mask(lambda seat: seat.economy_plus),
+        }
+
+    def _mask(self, predicate: Any) -> int:
+        return sum(1 << i for i, seat in enumerate(self.seats) if predicate(seat))
+
+    def bit(self, label: str) -> int:
+        try:
+            return self.index[label.strip().upper()]
+        except KeyError:
+            raise UnknownSeatError(label) from None
+
+    def seat(self, label: str) -> Seat:
+        return self.seats[self.bit(label)]
+
+    @classmethod
+    def standard(cls) -> SeatMap:
+        """
+        The 120-seat aircraft described in the FAQ: 22 business seats (rows 1-3 six abreast,
+        row 4 four abreast), 98 economy seats (rows 5-20 six abreast and two in row 21),
+        exit rows 4 and 16, and Economy Plus in rows 5-8.
+        """
+        seats = []
+        for row in range(1, 22):
+            letters = "ACDF" if row == 4 else "AF" if row == 21 else "ABCDEF"
+            for letter in letters:
+                seats.append(
+                    Seat(
+                        label=f"{row}{letter}",
+                        row=row,
+                        cabin="business" if row <= 4 else "economy",
+                        exit_row=row in (4, 16),
+                        economy_plus=5 <= row <= 8,
+                    )
+                )
+        return cls(seats)
+
+
+class SeatStore(abc.ABC):
+    """
+    Persistence for seat holds. `reserve` and `swap` must fail rather than overwrite when the
+    seat is already held, so that several processes sharing the store cannot double-book.
+    """
+
+    @abc.abstractmethod
+    def load(self, flight: str) -> dict[int, str]:
+        """Return `{seat index: holder}` for every held seat on `flight`."""
+
+    @abc.abstractmethod
+    def reserve(self, flight: str, seat: int, holder: str) -> bool:
+        """
+        Hold `seat` for `holder`, releasing any other seat they hold on `flight` in the same
+        transaction. Returns False if somebody already holds `seat`.
+        """
+
+    @abc.abstractmethod
+    def release(self, flight: str, seat: int, holder: str) -> None: ...
+
+    @abc.abstractmethod
+    def swap(self, flight: str, old: int, new: int, holder: str) -> bool:
+        """
+        Move `holder` from `old` to `new` in one transaction. False if `new` is held or
+        `holder` no longer holds `old`.
+        """
+
+
+class SQLiteSeatStore(SeatStore):
+    """Seat holds in a SQLite table whose primary key makes each seat holdable only once."""
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seat_holds ("
+            "flight TEXT NOT NULL, seat INTEGER NOT NULL, holder TEXT NOT NULL, "
+            "PRIMARY KEY (flight, seat))"
+        )
+
+    def load(self, flight: str) -> dict[int, str]:
+        rows = self._db.execute("SELECT seat, holder FROM seat_holds WHERE flight = ?", (flight,))
+        return dict(rows.fetchall())
+
+    def reserve(self, flight: str, seat: int, holder: str) -> bool:
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            taken = self._db.execute(
+                "SELECT 1 FROM seat_holds WHERE flight = ? AND seat = ?", (flight, seat)
+            ).fetchone()
+            if taken is not None:
+                return False
+            # Another process may have seated this holder since our view of the flight was
+            # loaded; they keep only the seat they are given now
+            self._db.execute("DELETE FROM seat_holds WHERE flight = ? AND holder = ?", (flight, holder))
+            self._db.execute(
+                "INSERT INTO seat_holds (flight, seat, holder) VALUES (?, ?, ?)", (flight, seat, holder)
+            )
+        return True
+
+    def release(self, flight: str, seat: int, holder: str) -> None:
+        self._db.execute(
+            "DELETE FROM seat_holds WHERE flight = ? AND seat = ? AND holder = ?", (flight, seat, holder)
+        )
+
+    def swap(self, flight: str, old: int, new: int, holder: str) -> bool:
+        try:
+            cursor = self._db.execute(
+                "UPDATE seat_holds SET seat = ? WHERE flight = ? AND seat = ? AND holder = ?",
+                (new, flight, old, holder),
+            )
+        except sqlite3.IntegrityError:
+            return False
+        # No row updated: another process has already moved or released this holder's seat
+        return cursor.rowcount == 1
+
+
+class _Flight:
+    __slots__ = ("taken", "holders", "seats_by_holder")
+
+    def __init__(self, holders: dict[int, str]) -> None:
+        self.taken = sum(1 << seat for seat in holders)
+        self.holders = holders
+        self.seats_by_holder = {holder: seat for seat, holder in holders.items()}
+
+
+class SeatInventory:
+    """
+    Seat assignments for every flight, one bitmap of taken seats per flight.
+
+    Each passenger (`holder`, e.g. a confirmation number) holds at most one seat per flight.
+    `reserve`, `release` and `swap` are synchronous and never await, so under asyncio each
+    one runs to completion before any other coroutine can touch the same flight: two
+    concurrent sessions can never both get a seat. With a `store`, every change is also
+    written through to it. Other processes sharing the store change it too, so a conflict
+    (in our bitmap or in the store) reloads the flight from the store and the change is
+    tried once more against that: a seat is reported unavailable only if the store says so.
+    """
+
+    def __init__(self, layout: SeatMap | None = None, store: SeatStore | None = None) -> None:
+        self.layout = layout or SeatMap.standard()
+        self.store = store
+        self._flights: dict[str, _Flight] = {}
+        self.reservations = 0
+        self.releases = 0
+        self.swaps = 0
+        self.conflicts = 0
+
+    def _flight(self, flight: str) -> _Flight:
+        state = self._flights.get(flight)
+        if state is None:
+            state = _Flight(self.store.load(flight) if self.store is not None else {})
+            self._flights[flight] = state
+        return state
+
+    def _resync(self, flight: str) -> None:
+        # Drop our view of the flight; the next access reloads it from the store
+        self._flights.pop(flight, None)
+
+    def seat_of(self, flight: str, holder: str) -> str | None:
+        seat = self._flight(flight).seats_by_holder.get(holder)
+        return self.layout.seats[seat].label if seat is not None else None
+
+    def reserve(self, flight: str, seat: str, holder: str) -> str:
+        """
+        Give `holder` the seat `seat`, moving them from any seat they already hold on the
+        flight. Returns the canonical seat label. Raises UnknownSeatError or
+        SeatUnavailableError, in which case nothing changes.
+        """
+        bit = self.layout.bit(seat)
+        try:
+            return self._reserve(flight, bit, holder)
+        except SeatUnavailableError:
+            self.conflicts += 1
+            if self.store is None:
+                raise
+        # Our view of the flight may be stale: another process may have freed the seat or
+        # moved this holder. Reload it and try once more.
+        self._resync(flight)
+        try:
+            return self._reserve(flight, bit, holder)
+        except SeatUnavailableError:
+            self._resync(flight)
+            raise
+
+    def _reserve(self, flight: str, bit: int, holder: str) -> str:
+        state = self._flight(flight)
+        current = state.seats_by_holder.get(holder)
+        if current == bit:
+            return self.layout.seats[bit].label
+        if state.taken >> bit & 1:
+            raise SeatUnavailableError(self.layout.seats[bit].label)
+
+        if self.store is not None:
+            stored = (
+                self.store.reserve(flight, bit, holder)
+                if current is None
+                else self.store.swap(flight, current, bit, holder)
+            )
+            if not stored:
+                raise SeatUnavailableError(self.layout.seats[bit].label)
+
+        if current is not None:
+            state.taken &= ~(1 << current)
+            del state.holders[current]
+            self.swaps += 1
+        else:
+            self.reservations += 1
+        state.taken |= 1 << bit
+        state.holders[bit] = holder
+        state.seats_by_holder[holder] = bit
+        return self.layout.seats[bit].label
+
+    def swap(self, flight: str, holder: str, new_seat: str) -> str | None:
+        """Move `holder` to `new_seat` atomically. Returns their previous seat, if any."""
+        previous = self.seat_of(flight, holder)
+        self.reserve(flight, new_seat, holder)
+        return previous
+
+    def release(self, flight: str, holder: str) -> str | None:
+        """Free whatever seat `holder` holds on `flight`. Returns its label, if any."""
+        state = self._flight(flight)
+        bit = state.seats_by_holder.pop(holder, None)
+        if bit is None:
+            return None
+        if self.store is not None:
+            self.store.release(flight, bit, holder)
+        state.taken &= ~(1 << bit)
+        del state.holders[bit]
+        self.releases += 1
+        return self.layout.seats[bit].label
+
+    def available(
+        self, flight: str, cabin: str | None = None, exit_row: bool | None = None,
+        economy_plus: bool | None = None, limit: int | None = None,
+    ) -> list[str]:
+        """Labels of free seats, front to back, optionally filtered by cabin and row type."""
+        free = self.layout.all & ~self._flight(flight).taken
+        if cabin is not None:
+            free &= self.layout.masks[cabin]
+        for name, wanted in (("exit_row", exit_row), ("economy_plus", economy_plus)):
+            if wanted is not None:
+                free &= self.layout.masks[name] if wanted else ~self.layout.masks[name]
+        labels = []
+        while free and (limit is None or len(labels) < limit):
+            lowest = free & -free
+            labels.append(self.layout.seats[lowest.bit_length() - 1].label)
+            free ^= lowest
+        return labels
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "flights": len(self._flights),
+            "seats_taken": sum(bin(state.taken).count("1") for state in self._flights.values()),
+            "reservations": self.reservations,
+            "swaps": self.swaps,
+            "releases": self.releases,
+            "conflicts": self.conflicts,
+            "persistent": self.store is not None,
+        }
+
+
+def flight_for_booking(confirmation_number: str) -> str:
+    """
+    The flight a booking is on. There is no reservation system behind the examples, so the
+    flight is derived from the confirmation number: the same booking always maps to the same
+    flight, and therefore to the same seat map.
+    """
+    return f"FLT-{100 + zlib.crc32(confirmation_number.strip().upper().encode()) % 900}"
+
+
+def create_seat_inventory() -> SeatInventory:
+    """
+    Build the inventory selected by `SEAT_INVENTORY_BACKEND`: `memory` (the default) or
+    `sqlite`, stored in `SEAT_INVENTORY_PATH` (default `.state/seats.sqlite3`).
+    """
+    env = os.environ
+    kind = env.get("SEAT_INVENTORY_BACKEND", "memory").lower()
+    if kind == "memory":
+        return SeatInventory()
+    if kind == "sqlite":
+        return SeatInventory(store=SQLiteSeatStore(env.get("SEAT_INVENTORY_PATH", ".state/seats.sqlite3")))
+    raise ValueError(f"Unknown SEAT_INVENTORY_BACKEND: {kind!r} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    last_access: float
+    finished: bool = False
+
+
+class SessionStore:
+    """
+    Bounded mapping of session id -> session state (a research run, a conversation, ...).
+
+    Entries are kept in least-recently-used order and evicted when they have been idle for
+    longer than `ttl_seconds`, or when the store holds more than `max_sessions` entries or
+    more than `max_bytes` of accounted payload. When over a limit, finished sessions are
+    evicted before sessions that are still running. Sizes are whatever the owner reports
+    through `grow` and `resize`; the store never inspects values itself.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 3600.0,
+        max_bytes: int = 256 * 1024 * 1024,
+        on_evict: Callable[[str, Any], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._evictions = {"ttl": 0, "finished": 0, "active": 0}
+
+    @classmethod
+    def from_env(cls, prefix: str, **kwargs: Any) -> SessionStore:
+        """
+        Build a store whose limits can be overridden with `<PREFIX>_MAX_SESSIONS`,
+        `<PREFIX>_TTL_SECONDS` and `<PREFIX>_MAX_BYTES` environment variables.
+        """
+        env = os.environ
+        if f"{prefix}_MAX_SESSIONS" in env:
+            kwargs["max_sessions"] = int(env[f"{prefix}_MAX_SESSIONS"])
+        if f"{prefix}_TTL_SECONDS" in env:
+            kwargs["ttl_seconds"] = float(env[f"{prefix}_TTL_SECONDS"])
+        if f"{prefix}_MAX_BYTES" in env:
+            kwargs["max_bytes"] = int(env[f"{prefix}_MAX_BYTES"])
+        return cls(**kwargs)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._entries.get(key)  # type: ignore[arg-type]
+        if entry is None:
+            return False
+        if self._expired(entry, self._clock()):
+            self._evict(key, "ttl")  # type: ignore[arg-type]
+            return False
+        return True
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.remove(key)
+
+    def get(self, key: str) -> Any | None:
+        """Return the session and mark it as recently used, or None if missing or expired."""
+        if key not in self:
+            return None
+        entry = self._entries[key]
+        entry.last_access = self._clock()
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def put(self, key: str, value: Any, size: int = 0) -> None:
+        if key in self._entries:
+            self.remove(key)
+        self._entries[key] = _Entry(value=value, size=size, last_access=self._clock())
+        self._bytes += size
+        self._enforce_limits(protect=key)
+
+    def remove(self, key: str) -> Any | None:
+        """Drop a session without calling `on_evict`."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._bytes -= entry.size
+        return entry.value
+
+    def grow(self, key: str, nbytes: int) -> None:
+        """Account `nbytes` more payload against a session (e.g. one appended update)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.size += nbytes
+        self._bytes += nbytes
+        self._enforce_limits(protect=key)
+
+    def resize(self, key: str, nbytes: int) -> None:
+        """Replace the accounted size of a session (e.g. after rebuilding its history)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        self._bytes += nbytes - entry.size
+        entry.size = nbytes
+        self._enforce_limits(protect=key)
+
+    def mark_finished(self, key: str) -> None:
+        """Flag a session as complete so it is the first candidate for eviction."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.finished = True
+
+    def evict_expired(self) -> int:
+        """Evict every session idle for longer than the TTL. Returns the number evicted."""
+        now = self._clock()
+        evicted = 0
+        # Entries are in access order, so expired ones are all at the front.
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._expired(entry, now):
+                break
+            self._evict(key, "ttl")
+            evicted += 1
+        return evicted
+
+    def metrics(self) -> dict[str, Any]:
+        finished = sum(1 for entry in self._entries.values() if entry.finished)
+        return {
+            "sessions": len(self._entries),
+            "finished_sessions": finished,
+            "active_sessions": len(self._entries) - finished,
+            "bytes": self._bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": dict(self._evictions),
+        }
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return now - entry.last_access > self.ttl_seconds
+
+    def _evict(self, key: str, reason: str) -> None:
+        value = self.remove(key)
+        self._evictions[reason] += 1
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def _enforce_limits(self, protect: str) -> None:
+        self.evict_expired()
+        while len(self._entries) > self.max_sessions or self._bytes > self.max_bytes:
+            victim = self._pick_victim(protect)
+            if victim is None:
+                return
+            self._evict(victim, "finished" if self._entries[victim].finished else "active")
+
+    def _pick_victim(self, protect: str) -> str | None:
+        # Least recently used finished session first, then least recently used active one.
+        # The session being written to is never evicted by its own write.
+        for key, entry in self._entries.items():
+            if entry.finished and key != protect:
+                return key
+        for key in self._entries:
+            if key != protect:
+                return key
+        return None
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is used instead
+    orjson = None
+
+if TYPE_CHECKING:
+    from fastapi import Request
+
+# Sent once a stream has been closed and fully delivered, so clients know not to reconnect
+END_EVENT = b"event: end\ndata: {}\n\n"
+
+
+def encode_json(item: Any) -> bytes:
+    """Compact UTF-8 JSON, encoded with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(item)
+    return json.dumps(item, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def sse_frame(item: dict[str, Any]) -> bytes:
+    """
+    Encode a stream item as an SSE event. Durable items carry their sequence number as the
+    event id, which the browser sends back as `Last-Event-ID` when it reconnects; transient
+    items (token deltas) have none and leave the client's last id unchanged.
+
+    Backends build each item's frame once, when it is published, and every subscriber is
+    sent those same bytes.
+    """
+    return sse_payload_frame(encode_json(item), item.get("seq"))
+
+
+def sse_payload_frame(payload: bytes, seq: int | None = None) -> bytes:
+    """`sse_frame` for an item that is already JSON-encoded."""
+    if seq is not None:
+        return b"id: %d\ndata: %s\n\n" % (seq, payload)
+    return b"data: %s\n\n" % payload
+
+
+def resume_start(request: Request, since: int | None = None) -> int:
+    """
+    Index of the first stream item a (re)connecting client still needs: one past the later
+    of its `Last-Event-ID` header and the `since` query parameter, or 0 for a new client.
+    """
+    last = since
+    header = request.headers.get("last-event-id", "")
+    if header.isdigit():
+        last = int(header) if last is None else max(last, int(header))
+    return 0 if last is None else last + 1
@@ -1,8 +1,7 @@
 from __future__ import annotations
 
-import asyncio
-import json
-import random
+import os
+import time
 import uuid
 from typing import Dict, List, Optional
 
@@ -18,7 +17,9 @@ from agents import (
     ItemHelpers,
     MessageOutputItem,
     RunContextWrapper,
+    RunItem,
     Runner,
+    RunResultStreaming,
     ToolCallItem,
     ToolCallOutputItem,
     TResponseInputItem,
@@ -27,6 +28,24 @@ from agents import (
     trace,
 )
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
+from openai.types.responses import ResponseTextDeltaEvent
+
+from examples.common.backends import create_backend
+from examples.common.entities import extract_entities
+from examples.common.faq import FAQFastPath, FAQIndex
+from examples.common.history import ConversationWindow, HistoryBudget, HistoryManager
+from examples.common.log import elapsed_ms, fields, get_logger
+from examples.common.metrics import LatencyStats
+from examples.common.mock_model import mock_models_enabled, use_mock_models
+from examples.common.seats import (
+    SeatUnavailableError,
+    UnknownSeatError,
+    create_seat_inventory,
+    flight_for_booking,
+)
+from examples.common.sse import END_EVENT, resume_start, sse_frame
+
+logger = get_logger(__name__)
 
 app = FastAPI()
 
@@ -42,8 +61,17 @@ app.add_middleware(
 # Mount static files
 app.mount("/static", StaticFiles(directory="examples/customer_service/static"), name="static")
 
-# Store active conversations
-active_conversations: Dict[str, Dict] = {}
+# Per conversation: a stream of chat messages (appending wakes SSE subscribers directly) and a
+# state document with the current agent, input history and context. STATE_BACKEND=sqlite
+# shares both between uvicorn workers; the CONVERSATION_* variables bound what is kept.
+conversations = create_backend(
+    "conversation",
+    sizeof=lambda message: len(message["content"]) + 128,
+)
+
+# Latency from receiving a message to the first streamed token, and to the end of the turn
+time_to_first_token = LatencyStats()
+turn_latency = LatencyStats()
 
 
 ### CONTEXT
@@ -58,26 +86,20 @@ class AirlineAgentContext(BaseModel):
 
 ### TOOLS
 
+# FAQ answers come from faq.json (or FAQ_PATH), ranked with BM25 and reloaded when it changes
+faq_index = FAQIndex(os.environ.get("FAQ_PATH", os.path.join(os.path.dirname(__file__), "faq.json")))
+
+# Seat assignments per flight; SEAT_INVENTORY_BACKEND=sqlite persists them and shares them
+# between processes
+seat_inventory = create_seat_inventory()
+
 
 @function_tool(
     name_override="faq_lookup_tool", description_override="Lookup frequently asked questions."
 )
 async def faq_lookup_tool(question: str) -> str:
-    if "bag" in question or "baggage" in question:
-        return (
-            "You are allowed to bring one bag on the plane. "
-            "It must be under 50 pounds and 22 inches x 14 inches x 9 inches."
-        )
-    elif "seats" in question or "plane" in question:
-        return (
-            "There are 120 seats on the plane. "
-            "There are 22 business class seats and 98 economy seats. "
-            "Exit rows are rows 4 and 16. "
-            "Rows 5-8 are Economy Plus, with extra legroom. "
-        )
-    elif "wifi" in question:
-        return "We have free wifi on the plane, join Airline-Wifi"
-    return "I'm sorry, I don't know the answer to that question."
+    answer = faq_index.answer(question)
+    return answer or "I'm sorry, I don't know the answer to that question."
 
 
 @function_tool
@@ -91,20 +113,32 @@ async def update_seat(
         confirmation_number: The confirmation number for the flight.
         new_seat: The new seat to update to.
     """
+    confirmation_number = confirmation_number.strip().upper()
+    flight_number = flight_for_booking(confirmation_number)
+    # Reserving the new seat releases the old one in the same step, so the customer never
+    # holds two seats and two customers can never be given the same one
+    try:
+        seat = seat_inventory.reserve(flight_number, new_seat, confirmation_number)
+    except UnknownSeatError as e:
+        return f"{e}. Seats are numbered by row (1-21) and letter, for example 12C."
+    except SeatUnavailableError as e:
+        cabin = seat_inventory.layout.seat(e.seat).cabin
+        alternatives = seat_inventory.available(flight_number, cabin=cabin, limit=6)
+        return f"{e}. Available {cabin} seats include: {', '.join(alternatives) or 'none'}."
     # Update the context based on the customer's input
     context.context.confirmation_number = confirmation_number
-    context.context.seat_number = new_seat
-    # Ensure that the flight number has been set by the incoming handoff
-    assert context.context.flight_number is not None, "Flight number is required"
-    return f"Updated seat to {new_seat} for confirmation number {confirmation_number}"
+    context.context.flight_number = flight_number
+    context.context.seat_number = seat
+    return f"Updated seat to {seat} on flight {flight_number} for confirmation number {confirmation_number}"
 
 
 ### HOOKS
 
 
 async def on_seat_booking_handoff(context: RunContextWrapper[AirlineAgentContext]) -> None:
-    flight_number = f"FLT-{random.randint(100, 999)}"
-    context.context.flight_number = flight_number
+    # The flight follows from the booking; without a confirmation number yet, update_seat sets it
+    if context.context.confirmation_number:
+        context.context.flight_number = flight_for_booking(context.context.confirmation_number)
 
 
 ### AGENTS
@@ -122,17 +156,31 @@ faq_agent = Agent[AirlineAgentContext](
     tools=[faq_lookup_tool],
 )
 
-seat_booking_agent = Agent[AirlineAgentContext](
-    name="Seat Booking Agent",
-    handoff_description="A helpful agent that can update a seat on a flight.",
-    instructions=f"""{RECOMMENDED_PROMPT_PREFIX}
+
+def seat_booking_instructions(
+    context: RunContextWrapper[AirlineAgentContext], agent: Agent[AirlineAgentContext]
+) -> str:
+    # Details the customer already gave (possibly in turns since folded into a summary) are
+    # stated up front, so the agent does not ask for them again
+    confirmation_number = context.context.confirmation_number
+    if confirmation_number:
+        first_step = f"1. The confirmation number is {confirmation_number}; do not ask for it again."
+    else:
+        first_step = "1. Ask for their confirmation number."
+    return f"""{RECOMMENDED_PROMPT_PREFIX}
     You are a seat booking agent. If you are speaking to a customer, you probably were transferred to from the triage agent.
     Use the following routine to support the customer.
     # Routine
-    1. Ask for their confirmation number.
-    2. Ask the customer what their desired seat number is.
+    {first_step}
+    2. Ask the customer what their desired seat number is, unless they already said.
     3. Use the update seat tool to update the seat on the flight.
-    If the customer asks a question that is not related to the routine, transfer back to the triage agent. """,
+    If the customer asks a question that is not related to the routine, transfer back to the triage agent. """
+
+
+seat_booking_agent = Agent[AirlineAgentContext](
+    name="Seat Booking Agent",
+    handoff_description="A helpful agent that can update a seat on a flight.",
+    instructions=seat_booking_instructions,
     tools=[update_seat],
 )
 
@@ -152,6 +200,42 @@ triage_agent = Agent[AirlineAgentContext](
 faq_agent.handoffs.append(triage_agent)
 seat_booking_agent.handoffs.append(triage_agent)
 
+summarizer_agent = Agent(
+    name="Conversation Summarizer",
+    instructions=(
+        "You maintain a running summary of a customer service conversation for an airline. "
+        "Merge the new turns into the summary so far. Keep the customer's name, confirmation "
+        "number, flight and seat, what they asked for and what was done or promised. Use at "
+        "most 120 words."
+    ),
+    model=os.environ.get("HISTORY_SUMMARIZER_MODEL", "gpt-4o-mini"),
+)
+
+# Conversation state stores agents by name so that it can be shared across processes
+agents_by_name: Dict[str, Agent[AirlineAgentContext]] = {
+    agent.name: agent for agent in (triage_agent, faq_agent, seat_booking_agent)
+}
+
+# Each turn sends only a rolling summary plus the most recent turns. Budgets (in estimated
+# tokens) are per agent and can be overridden with HISTORY_<AGENT>_MAX_TOKENS / _MIN_TURNS.
+history = HistoryManager(
+    summarizer_agent,
+    budgets={
+        triage_agent.name: HistoryBudget.from_env("HISTORY_TRIAGE", max_tokens=1500),
+        faq_agent.name: HistoryBudget.from_env("HISTORY_FAQ", max_tokens=1000),
+        seat_booking_agent.name: HistoryBudget.from_env("HISTORY_SEAT_BOOKING", max_tokens=2500),
+    },
+)
+
+# Confident FAQ matches are answered without the model, or sent straight to the FAQ agent
+# (FAQ_FAST_PATH=off disables this; FAQ_FAST_PATH_*_THRESHOLD tune it). Requests to act on
+# a booking, and messages giving booking details, always go through triage.
+faq_fast_path = FAQFastPath.from_env(faq_index)
+
+# MOCK_MODEL=1 runs every agent on the offline mock model (MOCK_MODEL_* tune it), for load tests
+if mock_models_enabled():
+    use_mock_models([*agents_by_name.values(), summarizer_agent])
+
 
 ### API MODELS
 
@@ -165,6 +249,8 @@ class Message(BaseModel):
 
 class ConversationRequest(BaseModel):
     message: str
+    stream: bool = False
+    """Push text deltas, tool calls and handoffs to the SSE stream while the turn runs."""
 
 
 class ConversationResponse(BaseModel):
@@ -172,6 +258,126 @@ class ConversationResponse(BaseModel):
     messages: List[Message]
 
 
+def _save_conversation(
+    conversation_id: str,
+    current_agent: Agent[AirlineAgentContext],
+    window: ConversationWindow,
+    context: AirlineAgentContext,
+) -> None:
+    conversations.put_state(
+        conversation_id,
+        {
+            "current_agent": current_agent.name,
+            "input_items": window.items,
+            "summary": window.summary,
+            "context": context.dict(),
+        },
+    )
+
+
+def _load_conversation(
+    conversation_id: str,
+) -> tuple[Agent[AirlineAgentContext], ConversationWindow, AirlineAgentContext] | None:
+    state = conversations.get_state(conversation_id)
+    if state is None:
+        return None
+    return (
+        agents_by_name[state["current_agent"]],
+        ConversationWindow(list(state["input_items"]), state.get("summary")),
+        AirlineAgentContext(**state["context"]),
+    )
+
+
+def _publish_message(conversation_id: str, message: Message) -> int | None:
+    return conversations.publish(conversation_id, message.dict())
+
+
+def _item_to_message(new_item: RunItem, message_id: str | None = None) -> Message | None:
+    agent_name = new_item.agent.name
+    if isinstance(new_item, MessageOutputItem):
+        message_content = ItemHelpers.text_message_output(new_item)
+        return Message(
+            id=message_id or str(uuid.uuid4()),
+            role="assistant", 
+            content=message_content, 
+            agent_name=agent_name, 
+            type="message"
+        )
+    elif isinstance(new_item, HandoffOutputItem):
+        handoff_message = f"Handed off from {new_item.source_agent.name} to {new_item.target_agent.name}"
+        return Message(
+            id=str(uuid.uuid4()),
+            role="system", 
+            content=handoff_message, 
+            type="handoff"
+        )
+    elif isinstance(new_item, ToolCallItem):
+        # Access the function name from the tool call
+        function_name = new_item.function.name if hasattr(new_item, 'function') else "unknown tool"
+        tool_call_message = f"Calling tool: {function_name}"
+        return Message(
+            id=str(uuid.uuid4()),
+            role="system", 
+            content=tool_call_message, 
+            agent_name=agent_name, 
+            type="tool_call"
+        )
+    elif isinstance(new_item, ToolCallOutputItem):
+        tool_output_message = f"Tool result: {new_item.output}"
+        return Message(
+            id=str(uuid.uuid4()),
+            role="system", 
+            content=tool_output_message, 
+            agent_name=agent_name, 
+            type="tool_output"
+        )
+    return None
+
+
+async def _run_streamed(
+    conversation_id: str,
+    current_agent: Agent[AirlineAgentContext],
+    input_items: list[TResponseInputItem],
+    context: AirlineAgentContext,
+    started: float,
+) -> RunResultStreaming:
+    """
+    Run a turn with `Runner.run_streamed`, pushing each text delta to the conversation's
+    subscribers as a transient "delta" message and each tool call, tool output, handoff and
+    completed message as soon as the SDK reports it.
+
+    Deltas carry the id of the assistant message they belong to, so the client can grow a
+    single bubble and then replace it with the final text.
+    """
+    result = Runner.run_streamed(current_agent, input_items, context=context)
+    stream_message_id = str(uuid.uuid4())
+    first_token = True
+    async for event in result.stream_events():
+        if event.type == "raw_response_event":
+            if isinstance(event.data, ResponseTextDeltaEvent) and event.data.delta:
+                if first_token:
+                    time_to_first_token.record(time.perf_counter() - started)
+                    first_token = False
+                conversations.broadcast(
+                    conversation_id,
+                    Message(
+                        id=stream_message_id,
+                        role="assistant",
+                        content=event.data.delta,
+                        agent_name=result.current_agent.name,
+                        type="delta",
+                    ).dict(),
+                )
+        elif event.type == "run_item_stream_event":
+            message = _item_to_message(event.item, message_id=stream_message_id)
+            if message is None:
+                continue
+            _publish_message(conversation_id, message)
+            if isinstance(event.item, MessageOutputItem):
+                stream_message_id = str(uuid.uuid4())
+    return result
+
+
 ### API ROUTES
 
 @app.get("/")
@@ -183,159 +389,146 @@ async def root():
 @app.post("/conversation")
 async def start_conversation():
     conversation_id = uuid.uuid4().hex[:16]
-    active_conversations[conversation_id] = {
-        "current_agent": triage_agent,
-        "input_items": [],
-        "context": AirlineAgentContext(),
-        "messages": []
-    }
+    conversations.create(conversation_id)
+    _save_conversation(conversation_id, triage_agent, ConversationWindow(), AirlineAgentContext())
+    logger.debug("Conversation started", extra=fields(conversation_id=conversation_id))
     return {"conversation_id": conversation_id}
 
 
 @app.post("/conversation/{conversation_id}/message")
-async def send_message(conversation_id: str, request: ConversationRequest):
-    if conversation_id not in active_conversations:
+async def send_message(conversation_id: str, request: ConversationRequest, since: Optional[int] = None):
+    conversation = _load_conversation(conversation_id)
+    if conversation is None:
         return {"error": "Conversation not found"}
     
-    conversation = active_conversations[conversation_id]
-    current_agent = conversation["current_agent"]
-    input_items = conversation["input_items"]
-    context = conversation["context"]
+    current_agent, window, context = conversation
     
     # Add user message to conversation
     user_message = Message(id=str(uuid.uuid4()), role="user", content=request.message)
-    conversation["messages"].append(user_message)
+    user_seq = _publish_message(conversation_id, user_message)
     
-    # Try to extract passenger name from the message
-    if context.passenger_name is None:
-        # Simple name extraction - look for common name patterns
-        name_patterns = [
-            r"my name is ([A-Z][a-z]+ [A-Z][a-z]+)",
-            r"name is ([A-Z][a-z]+ [A-Z][a-z]+)",
-            r"I am ([A-Z][a-z]+ [A-Z][a-z]+)",
-            r"I'm ([A-Z][a-z]+ [A-Z][a-z]+)",
-            r"this is ([A-Z][a-z]+ [A-Z][a-z]+)"
-        ]
-        
-        for pattern in name_patterns:
-            import re
-            match = re.search(pattern, request.message)
-            if match:
-                context.passenger_name = match.group(1)
-                break
+    # Pick up the name, confirmation and flight number from the message. The seat mentioned is
+    # usually the one wanted, so the context's seat is left to update_seat.
+    if extract_entities(request.message).apply(context, exclude=("seat_number",)):
+        if context.confirmation_number and context.flight_number is None:
+            context.flight_number = flight_for_booking(context.confirmation_number)
     
-    # Process message with agent
-    with trace("Customer service", group_id=conversation_id):
-        input_items.append({"content": request.message, "role": "user"})
-        result = await Runner.run(current_agent, input_items, context=context)
-        
-        for new_item in result.new_items:
-            agent_name = new_item.agent.name
-            if isinstance(new_item, MessageOutputItem):
-                message_content = ItemHelpers.text_message_output(new_item)
-                conversation["messages"].append(
-                    Message(
-                        id=str(uuid.uuid4()),
-                        role="assistant", 
-                        content=message_content, 
-                        agent_name=agent_name, 
-                        type="message"
-                    )
-                )
-            elif isinstance(new_item, HandoffOutputItem):
-                handoff_message = f"Handed off from {new_item.source_agent.name} to {new_item.target_agent.name}"
-                conversation["messages"].append(
-                    Message(
-                        id=str(uuid.uuid4()),
-                        role="system", 
-                        content=handoff_message, 
-                        type="handoff"
-                    )
-                )
-            elif isinstance(new_item, ToolCallItem):
-                # Access the function name from the tool call
-                function_name = new_item.function.name if hasattr(new_item, 'function') else "unknown tool"
-                tool_call_message = f"Calling tool: {function_name}"
-                conversation["messages"].append(
-                    Message(
-                        id=str(uuid.uuid4()),
-                        role="system", 
-                        content=tool_call_message, 
-                        agent_name=agent_name, 
-                        type="tool_call"
-                    )
-                )
-            elif isinstance(new_item, ToolCallOutputItem):
-                tool_output_message = f"Tool result: {new_item.output}"
-                conversation["messages"].append(
-                    Message(
-                        id=str(uuid.uuid4()),
-                        role="system", 
-                        content=tool_output_message, 
-                        agent_name=agent_name, 
-                        type="tool_output"
-                    )
-                )
+    started = time.perf_counter()
+    window.items.append({"content": request.message, "role": "user"})
+    
+    # Pre-routing, while the customer is with triage or FAQ: answer clear-cut FAQ questions
+    # straight from the knowledge base, or skip the triage hop to the FAQ agent
+    action = None
+    if current_agent.name in (triage_agent.name, faq_agent.name):
+        decision = faq_fast_path.classify(request.message)
+        if decision.action == "answer" or current_agent is triage_agent:
+            action = decision.action
+    
+    if action == "answer":
+        answer = decision.match.entry.answer
+        _publish_message(
+            conversation_id,
+            Message(id=str(uuid.uuid4()), role="assistant", content=answer, agent_name=faq_agent.name, type="message"),
+        )
+        window.items.append({"content": answer, "role": "assistant"})
+        await history.compact(window, current_agent.name)
+        _save_conversation(conversation_id, current_agent, window, context)
+    else:
+        if action == "route":
+            handoff_message = f"Handed off from {triage_agent.name} to {faq_agent.name}"
+            _publish_message(
+                conversation_id,
+                Message(id=str(uuid.uuid4()), role="system", content=handoff_message, type="handoff"),
+            )
+            current_agent = faq_agent
         
-        # Update conversation state
-        conversation["input_items"] = result.to_input_list()
-        conversation["current_agent"] = result.last_agent
+        # Process message with agent
+        with trace("Customer service", group_id=conversation_id):
+            input_items = window.to_input()
+            if request.stream:
+                result = await _run_streamed(conversation_id, current_agent, input_items, context, started)
+            else:
+                result = await Runner.run(current_agent, input_items, context=context)
+                for new_item in result.new_items:
+                    message = _item_to_message(new_item)
+                    if message is not None:
+                        _publish_message(conversation_id, message)
+            turn_latency.record(time.perf_counter() - started)
+            
+            # Update conversation state, trimmed to the budget of the agent taking the next turn
+            window.after_run(result.to_input_list())
+            await history.compact(window, result.last_agent.name)
+            _save_conversation(conversation_id, result.last_agent, window, context)
+    faq_fast_path.record(action, time.perf_counter() - started)
+    logger.info(
+        "Turn completed",
+        extra=fields(
+            conversation_id=conversation_id, agent=current_agent.name, path=action or "agent",
+            latency_ms=elapsed_ms(started),
+        ),
+    )
     
-    return {"conversation_id": conversation_id, "messages": conversation["messages"]}
+    # Only this turn's messages, or everything after the client's `since` cursor
+    start = since + 1 if since is not None else (user_seq or 0)
+    return {"conversation_id": conversation_id, "messages": conversations.items(conversation_id, start)}
 
 
 @app.get("/conversation/{conversation_id}")
-async def get_conversation(conversation_id: str):
-    if conversation_id not in active_conversations:
+async def get_conversation(conversation_id: str, since: Optional[int] = None):
+    state = conversations.get_state(conversation_id)
+    if state is None:
         return {"error": "Conversation not found"}
     
     return {
         "conversation_id": conversation_id,
-        "messages": active_conversations[conversation_id]["messages"],
-        "context": active_conversations[conversation_id]["context"]
+        "messages": conversations.items(conversation_id, since + 1 if since is not None else 0),
+        "context": state["context"]
     }
 
 
 @app.get("/conversation/{conversation_id}/stream")
-async def stream_conversation(conversation_id: str, request: Request):
+async def stream_conversation(conversation_id: str, request: Request, since: Optional[int] = None):
+    # A reconnecting client only gets the messages after the last one it saw
+    start = resume_start(request, since)
+
     async def event_generator():
-        if conversation_id not in active_conversations:
-            yield f"data: {json.dumps({'error': 'Conversation not found'})}\n\n"
+        if not conversations.exists(conversation_id):
+            yield sse_frame({"error": "Conversation not found"})
+            yield END_EVENT
             return
-        
-        # Send all existing messages
-        for message in active_conversations[conversation_id]["messages"]:
-            message_dict = message.dict()
-            print(f"Sending message via SSE: {message_dict}")
-            yield f"data: {json.dumps(message_dict)}\n\n"
-        
-        # Keep track of the last message index
-        last_idx = len(active_conversations[conversation_id]["messages"])
-        
-        # Keep connection open for new messages
-        while True:
-            # Check if client disconnected
-            if await request.is_disconnected():
-                print(f"Client disconnected from SSE for conversation {conversation_id}")
-                break
-            
-            # Check for new messages
-            if conversation_id in active_conversations:
-                current_messages = active_conversations[conversation_id]["messages"]
-                if len(current_messages) > last_idx:
-                    print(f"New messages available: {len(current_messages) - last_idx}")
-                    for message in current_messages[last_idx:]:
-                        message_dict = message.dict()
-                        print(f"Sending new message via SSE: {message_dict}")
-                        yield f"data: {json.dumps(message_dict)}\n\n"
-                    last_idx = len(current_messages)
-            
-            # Wait a bit before checking again
-            await asyncio.sleep(0.5)
+
+        # Replay missed messages, then block until the next one is appended.
+        # StreamingResponse cancels the generator when the client disconnects.
+        logger.debug("SSE client connected", extra=fields(conversation_id=conversation_id, start=start))
+        sent = 0
+        try:
+            # Frames were encoded once when published; every subscriber is sent the same bytes
+            async for frame in conversations.subscribe_frames(conversation_id, start):
+                logger.debug(
+                    "SSE message sent", extra=fields(sample=True, conversation_id=conversation_id, bytes=len(frame))
+                )
+                sent += 1
+                yield frame
+            yield END_EVENT
+        finally:
+            logger.debug("SSE client disconnected", extra=fields(conversation_id=conversation_id, sent=sent))
     
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "conversations": conversations.metrics(),
+        "time_to_first_token": time_to_first_token.summary(),
+        "turn_latency": turn_latency.summary(),
+        "history": history.metrics(),
+        "faq": faq_index.metrics(),
+        "faq_fast_path": faq_fast_path.metrics(),
+        "seats": seat_inventory.metrics(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
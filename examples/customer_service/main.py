@@ -2,7 +2,6 @@ from __future__ import annotations as _annotations
 
 import asyncio
 import os
-import random
 import sys
 import uuid
 
@@ -24,6 +23,15 @@ from agents import (
 )
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
 
+from examples.common.entities import extract_entities
+from examples.common.faq import FAQIndex
+from examples.common.seats import (
+    SeatUnavailableError,
+    UnknownSeatError,
+    create_seat_inventory,
+    flight_for_booking,
+)
+
 ### CONTEXT
 
 
@@ -36,26 +44,20 @@ class AirlineAgentContext(BaseModel):
 
 ### TOOLS
 
+# FAQ answers come from faq.json (or FAQ_PATH), ranked with BM25 and reloaded when it changes
+faq_index = FAQIndex(os.environ.get("FAQ_PATH", os.path.join(os.path.dirname(__file__), "faq.json")))
+
+# Seat assignments per flight; SEAT_INVENTORY_BACKEND=sqlite persists them and shares them
+# between processes
+seat_inventory = create_seat_inventory()
+
 
 @function_tool(
     name_override="faq_lookup_tool", description_override="Lookup frequently asked questions."
 )
 async def faq_lookup_tool(question: str) -> str:
-    if "bag" in question or "baggage" in question:
-        return (
-            "You are allowed to bring one bag on the plane. "
-            "It must be under 50 pounds and 22 inches x 14 inches x 9 inches."
-        )
-    elif "seats" in question or "plane" in question:
-        return (
-            "There are 120 seats on the plane. "
-            "There are 22 business class seats and 98 economy seats. "
-            "Exit rows are rows 4 and 16. "
-            "Rows 5-8 are Economy Plus, with extra legroom. "
-        )
-    elif "wifi" in question:
-        return "We have free wifi on the plane, join Airline-Wifi"
-    return "I'm sorry, I don't know the answer to that question."
+    answer = faq_index.answer(question)
+    return answer or "I'm sorry, I don't know the answer to that question."
 
 
 @function_tool
@@ -69,20 +71,32 @@ async def update_seat(
         confirmation_number: The confirmation number for the flight.
         new_seat: The new seat to update to.
     """
+    confirmation_number = confirmation_number.strip().upper()
+    flight_number = flight_for_booking(confirmation_number)
+    # Reserving the new seat releases the old one in the same step, so the customer never
+    # holds two seats and two customers can never be given the same one
+    try:
+        seat = seat_inventory.reserve(flight_number, new_seat, confirmation_number)
+    except UnknownSeatError as e:
+        return f"{e}. Seats are numbered by row (1-21) and letter, for example 12C."
+    except SeatUnavailableError as e:
+        cabin = seat_inventory.layout.seat(e.seat).cabin
+        alternatives = seat_inventory.available(flight_number, cabin=cabin, limit=6)
+        return f"{e}. Available {cabin} seats include: {', '.join(alternatives) or 'none'}."
     # Update the context based on the customer's input
     context.context.confirmation_number = confirmation_number
-    context.context.seat_number = new_seat
-    # Ensure that the flight number has been set by the incoming handoff
-    assert context.context.flight_number is not None, "Flight number is required"
-    return f"Updated seat to {new_seat} for confirmation number {confirmation_number}"
+    context.context.flight_number = flight_number
+    context.context.seat_number = seat
+    return f"Updated seat to {seat} on flight {flight_number} for confirmation number {confirmation_number}"
 
 
 ### HOOKS
 
 
 async def on_seat_booking_handoff(context: RunContextWrapper[AirlineAgentContext]) -> None:
-    flight_number = f"FLT-{random.randint(100, 999)}"
-    context.context.flight_number = flight_number
+    # The flight follows from the booking; without a confirmation number yet, update_seat sets it
+    if context.context.confirmation_number:
+        context.context.flight_number = flight_for_booking(context.context.confirmation_number)
 
 
 ### AGENTS
@@ -100,17 +114,30 @@ faq_agent = Agent[AirlineAgentContext](
     tools=[faq_lookup_tool],
 )
 
-seat_booking_agent = Agent[AirlineAgentContext](
-    name="Seat Booking Agent",
-    handoff_description="A helpful agent that can update a seat on a flight.",
-    instructions=f"""{RECOMMENDED_PROMPT_PREFIX}
+
+def seat_booking_instructions(
+    context: RunContextWrapper[AirlineAgentContext], agent: Agent[AirlineAgentContext]
+) -> str:
+    # Details the customer already gave are stated up front, so the agent does not ask again
+    confirmation_number = context.context.confirmation_number
+    if confirmation_number:
+        first_step = f"1. The confirmation number is {confirmation_number}; do not ask for it again."
+    else:
+        first_step = "1. Ask for their confirmation number."
+    return f"""{RECOMMENDED_PROMPT_PREFIX}
     You are a seat booking agent. If you are speaking to a customer, you probably were transferred to from the triage agent.
     Use the following routine to support the customer.
     # Routine
-    1. Ask for their confirmation number.
-    2. Ask the customer what their desired seat number is.
+    {first_step}
+    2. Ask the customer what their desired seat number is, unless they already said.
     3. Use the update seat tool to update the seat on the flight.
-    If the customer asks a question that is not related to the routine, transfer back to the triage agent. """,
+    If the customer asks a question that is not related to the routine, transfer back to the triage agent. """
+
+
+seat_booking_agent = Agent[AirlineAgentContext](
+    name="Seat Booking Agent",
+    handoff_description="A helpful agent that can update a seat on a flight.",
+    instructions=seat_booking_instructions,
     tools=[update_seat],
 )
 
@@ -156,6 +183,9 @@ async def main():
 
     while True:
         user_input = input("Enter your message: ")
+        if extract_entities(user_input).apply(context, exclude=("seat_number",)):
+            if context.confirmation_number and context.flight_number is None:
+                context.flight_number = flight_for_booking(context.confirmation_number)
         with trace("Customer service", group_id=conversation_id):
             input_items.append({"content": user_input, "role": "user"})
             result = await Runner.run(current_agent, input_items, context=context)
@@ -12,6 +12,8 @@ document.addEventListener('DOMContentLoaded', function() {
     // Conversation state
     let conversationId = null;
     let eventSource = null;
+    let loadingElement = null;
+    let lastSeq = null;  // Sequence number of the last message received, to resume from
     
     // Initialize conversation
     initializeConversation();
@@ -57,8 +59,8 @@ document.addEventListener('DOMContentLoaded', function() {
             eventSource.close();
         }
         
-        // Connect to SSE endpoint
-        const sseUrl = `/conversation/${conversationId}/stream`;
+        // Connect to SSE endpoint, asking only for messages we have not seen yet
+        const sseUrl = `/conversation/${conversationId}/stream` + (lastSeq !== null ? `?since=${lastSeq}` : '');
         console.log('SSE URL:', sseUrl);
         eventSource = new EventSource(sseUrl);
         
@@ -68,6 +70,9 @@ document.addEventListener('DOMContentLoaded', function() {
         
         eventSource.onmessage = function(event) {
             console.log('SSE message received:', event.data);
+            if (event.lastEventId) {
+                lastSeq = parseInt(event.lastEventId, 10);
+            }
             try {
                 const data = JSON.parse(event.data);
                 
@@ -84,6 +89,12 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         };
         
+        // The server ends the stream for good (e.g. the conversation expired)
+        eventSource.addEventListener('end', function() {
+            eventSource.close();
+            addSystemMessage('This conversation has ended.');
+        });
+        
         eventSource.onerror = function(error) {
             console.error('EventSource failed:', error);
             eventSource.close();
@@ -120,8 +131,8 @@ document.addEventListener('DOMContentLoaded', function() {
         // Clear input
         messageInput.value = '';
         
-        // Add loading indicator
-        const loadingElement = document.createElement('div');
+        // Add loading indicator (removed by the first streamed token or the response)
+        loadingElement = document.createElement('div');
         loadingElement.className = 'message system loading';
         loadingElement.innerHTML = `<div class="message-content"><p>Processing your message...</p></div>`;
         chatMessages.appendChild(loadingElement);
@@ -133,13 +144,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ message })
+                body: JSON.stringify({ message, stream: true })
             });
             
-            // Remove loading indicator
-            if (loadingElement.parentNode) {
-                loadingElement.parentNode.removeChild(loadingElement);
-            }
+            removeLoadingIndicator();
             
             if (!response.ok) {
                 throw new Error('Failed to send message');
@@ -151,19 +159,26 @@ document.addEventListener('DOMContentLoaded', function() {
         } catch (error) {
             console.error('Error sending message:', error);
             
-            // Remove loading indicator
-            if (loadingElement.parentNode) {
-                loadingElement.parentNode.removeChild(loadingElement);
-            }
+            removeLoadingIndicator();
             
             addSystemMessage('Error sending message. Please try again.');
         }
     }
     
+    // Remove the "Processing your message..." indicator if it is still shown
+    function removeLoadingIndicator() {
+        if (loadingElement && loadingElement.parentNode) {
+            loadingElement.parentNode.removeChild(loadingElement);
+        }
+        loadingElement = null;
+    }
+    
     // Fetch conversation context
     async function fetchConversationContext() {
         try {
-            const response = await fetch(`/conversation/${conversationId}`);
+            // Only the context is needed, so skip the messages we already have
+            const since = lastSeq !== null ? `?since=${lastSeq}` : '';
+            const response = await fetch(`/conversation/${conversationId}${since}`);
             
             if (!response.ok) {
                 throw new Error('Failed to fetch conversation context');
@@ -197,6 +212,20 @@ document.addEventListener('DOMContentLoaded', function() {
             console.log('Generated ID for message:', message.id);
         }
         
+        // Token deltas grow a streaming bubble that the final message later replaces
+        if (message.type === 'delta') {
+            appendDelta(message);
+            return;
+        }
+        
+        // Replace a streaming bubble with the final message text
+        const streamingElement = document.querySelector(`[data-message-id="${message.id}"].streaming`);
+        if (streamingElement) {
+            streamingElement.classList.remove('streaming');
+            streamingElement.querySelector('.message-content p').textContent = message.content;
+            return;
+        }
+        
         // Skip if message already exists (for reconnections)
         if (document.querySelector(`[data-message-id="${message.id}"]`)) {
             console.log('Message already exists, skipping:', message.id);
@@ -271,6 +300,29 @@ document.addEventListener('DOMContentLoaded', function() {
         chatMessages.scrollTop = chatMessages.scrollHeight;
     }
     
+    // Append a streamed text delta to its assistant message, creating the bubble on first token
+    function appendDelta(message) {
+        let messageElement = document.querySelector(`[data-message-id="${message.id}"]`);
+        if (!messageElement) {
+            removeLoadingIndicator();
+            messageElement = document.createElement('div');
+            messageElement.className = 'message assistant message streaming';
+            messageElement.setAttribute('data-message-id', message.id);
+            messageElement.innerHTML = `<div class="message-header">${message.agent_name || ''}</div><div class="message-content"><p></p></div>`;
+            chatMessages.appendChild(messageElement);
+            
+            if (message.agent_name && currentAgent.textContent !== message.agent_name) {
+                currentAgent.textContent = message.agent_name;
+                currentAgent.classList.remove('highlight');
+                void currentAgent.offsetWidth; // Trigger reflow to restart animation
+                currentAgent.classList.add('highlight');
+            }
+        }
+        
+        messageElement.querySelector('.message-content p').textContent += message.content;
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    }
+    
     // Add system message
     function addSystemMessage(content) {
         const messageElement = document.createElement('div');
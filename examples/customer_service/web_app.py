@@ -12,11 +12,12 @@ import os
 import sys
 import uvicorn
 
+from examples.common.mock_model import mock_models_enabled
 from examples.customer_service.api import app
 
 if __name__ == "__main__":
     # Check if OPENAI_API_KEY is set
-    if not os.environ.get("OPENAI_API_KEY"):
+    if not os.environ.get("OPENAI_API_KEY") and not mock_models_enabled():
         print("ERROR: OPENAI_API_KEY environment variable is not set.")
         print("Please set it before running the application:")
         print("\nOn Linux/Mac:")
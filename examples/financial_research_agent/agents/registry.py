@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from agents import Agent, RunResult
+
+from examples.common.log import fields, get_logger
+from examples.common.mock_model import mock_models_enabled, use_mock_models
+
+from .financials_agent import financials_agent
+from .planner_agent import planner_agent
+from .risk_agent import risk_agent
+from .search_agent import search_agent
+from .verifier_agent import verifier_agent
+from .writer_agent import writer_agent
+
+logger = get_logger(__name__)
+
+
+async def _summary_extractor(run_result: RunResult) -> str:
+    """Custom output extractor for sub‑agents that return an AnalysisSummary."""
+    # The financial/risk analyst agents emit an AnalysisSummary with a `summary` field.
+    # We want the tool call to return just that summary text so the writer can drop it inline.
+    return str(run_result.final_output.summary)
+
+
+@dataclass(frozen=True)
+class FinancialAgents:
+    """
+    The financial research agent graph, built once and shared by every run.
+
+    Building it wraps the analyst agents as tools (which generates their JSON schemas) and
+    clones the writer with those tools attached. None of it depends on the query, so it is
+    done once per process rather than once per report. The agents must not be modified
+    afterwards: the SDK rejects runs whose shared agent has its tools changed mid-run.
+    """
+
+    planner: Agent[Any]
+    search: Agent[Any]
+    financials: Agent[Any]
+    risk: Agent[Any]
+    writer: Agent[Any]
+    """The writer with the financials and risk analysts attached as tools."""
+
+    verifier: Agent[Any]
+    build_seconds: float = 0.0
+
+    @classmethod
+    def build(cls) -> FinancialAgents:
+        started = time.perf_counter()
+        # MOCK_MODEL=1 runs every agent on the offline mock model (MOCK_MODEL_* tune it). This
+        # has to happen before the writer is cloned, since the clone copies the model.
+        if mock_models_enabled():
+            use_mock_models([planner_agent, search_agent, financials_agent, risk_agent, writer_agent, verifier_agent])
+
+        # Expose the specialist analysts as tools so the writer can invoke them inline
+        # and still produce the final FinancialReportData output.
+        fundamentals_tool = financials_agent.as_tool(
+            tool_name="fundamentals_analysis",
+            tool_description="Use to get a short write‑up of key financial metrics",
+            custom_output_extractor=_summary_extractor,
+        )
+        risk_tool = risk_agent.as_tool(
+            tool_name="risk_analysis",
+            tool_description="Use to get a short write‑up of potential red flags",
+            custom_output_extractor=_summary_extractor,
+        )
+        graph = cls(
+            planner=planner_agent,
+            search=search_agent,
+            financials=financials_agent,
+            risk=risk_agent,
+            writer=writer_agent.clone(tools=[fundamentals_tool, risk_tool]),
+            verifier=verifier_agent,
+            build_seconds=time.perf_counter() - started,
+        )
+        logger.info("Agent graph built", extra=fields(**graph.metrics()))
+        return graph
+
+    def all(self) -> list[Agent[Any]]:
+        return [self.planner, self.search, self.financials, self.risk, self.writer, self.verifier]
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "build_ms": round(self.build_seconds * 1000, 2),
+            "agents": len(self.all()),
+            "tools": sum(len(agent.tools) for agent in self.all()),
+        }
@@ -2,6 +2,7 @@ import asyncio
 import os
 import sys
 
+from examples.common.mock_model import mock_models_enabled
 from examples.financial_research_agent.manager import FinancialResearchManager
 
 
@@ -11,7 +12,7 @@ from examples.financial_research_agent.manager import FinancialResearchManager
 # "Write up an analysis of Apple Inc.'s most recent quarter."
 async def main() -> None:
     # Check if OPENAI_API_KEY is set
-    if not os.environ.get("OPENAI_API_KEY"):
+    if not os.environ.get("OPENAI_API_KEY") and not mock_models_enabled():
         print("ERROR: OPENAI_API_KEY environment variable is not set.")
         print("Please set it before running the application:")
         print("\nOn Linux/Mac:")
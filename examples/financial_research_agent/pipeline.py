@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from examples.common.archive import create_archive
+from examples.common.cache import create_cache
+from examples.common.dedup import SearchDeduplicator
+from examples.common.limits import ConcurrencyLimiter, SearchLimits, SearchPhase
+from examples.common.pipeline import ResearchPipeline, StageLog, StageMetrics
+
+from .agents.planner_agent import FinancialSearchItem, FinancialSearchPlan
+from .agents.registry import FinancialAgents
+from .agents.verifier_agent import VerificationResult
+from .agents.writer_agent import FinancialReportData
+from .verification import StreamingVerifier, pipelined_verification_enabled
+
+# Searches run at most SEARCH_CONCURRENCY at a time across all research jobs, each bounded by
+# SEARCH_TIMEOUT_SECONDS and each job's search phase by SEARCH_PHASE_BUDGET_SECONDS. The
+# report is started once SEARCH_QUORUM of the searches (or SEARCH_QUORUM_WAIT_SECONDS) is in.
+search_limits = SearchLimits.from_env()
+search_limiter = ConcurrencyLimiter(search_limits.concurrency)
+
+# Search summaries keyed on the normalized search term (SEARCH_CACHE_* variables). Use
+# SEARCH_CACHE_BACKEND=sqlite to reuse results across CLI runs.
+search_cache = create_cache("financial_research_agent.search", "SEARCH_CACHE")
+
+# Search plans keyed on the normalized query, kept for a day (PLAN_CACHE_* variables), so a
+# popular query skips the planner. PLAN_CACHE_WARM_START names a JSONL file of
+# {"query": ..., "value": <plan>} lines to load at startup.
+search_plan_cache = create_cache(
+    "financial_research_agent.plan", "PLAN_CACHE", default_ttl=86400.0, validate=FinancialSearchPlan.model_validate
+)
+
+# Planned searches that are near-identical wordings of one another are searched once
+# (SEARCH_DEDUP_THRESHOLD, 0 to turn it off)
+search_dedup = SearchDeduplicator.from_env()
+
+# Every finished report, with its search plan and verification, searchable by content and reused
+# for near-duplicate queries within REPORT_ARCHIVE_FRESH_SECONDS (REPORT_ARCHIVE_* variables)
+report_archive = create_archive("financial_research_agent")
+
+# The agents, with the analyst tools attached to the writer, are built once and shared by
+# every run. MOCK_MODEL=1 puts them on the offline mock model (MOCK_MODEL_* tune it).
+agent_graph = FinancialAgents.build()
+
+# Stage durations and time from the start of a run until its first report, the refined
+# report (SEARCH_LATE_RESULTS=refine) and the verification are published. With
+# VERIFY_MODE=pipelined (the default) the report no longer waits for the verifier.
+stage_metrics = StageMetrics(milestones=("first_report", "refined_report", "verification"))
+
+
+class FinancialResearchPipeline(ResearchPipeline):
+    """
+    Orchestrates the full flow: planning, searching, sub‑analysis, writing, and verification.
+    """
+
+    trace_name = "Financial research trace"
+    start_update = ("start", "Starting financial research...")
+
+    planner = agent_graph.planner
+    searcher = agent_graph.search
+    writer = agent_graph.writer
+    report_type = FinancialReportData
+
+    limits = search_limits
+    limiter = search_limiter
+    cache = search_cache
+    plan_cache = search_plan_cache
+    dedup = search_dedup
+    archive = report_archive
+    hooks = (stage_metrics, StageLog(__name__))
+
+    def search_input(self, item: FinancialSearchItem) -> str:
+        return f"Search term: {item.query}\nReason: {item.reason}"
+
+    async def _report(self, query: str, search_results: list[str], searches: SearchPhase) -> Any:
+        # Searches left running for the refinement pass (SEARCH_LATE_RESULTS=refine). The
+        # refined report is the one that gets verified, so the first one is not.
+        refining = searches.pending > 0
+        verifier = None
+        # Pipelined: sections are verified while the writer is still producing the rest,
+        # and the report goes out without waiting for the verdict
+        if pipelined_verification_enabled() and not refining:
+            verifier = StreamingVerifier(agent_graph.verifier, usage=self.usage)
+        try:
+            async with self._stage("writing"):
+                report = await self._write_report(
+                    query, search_results, None if verifier is None else self._feed_verifier(verifier)
+                )
+            if verifier is not None:
+                verifier.finish(report.markdown_report)
+            elif not refining:
+                verification = await self._verify_report(report)
+            self._publish_report(report)
+            self._milestone("first_report")
+
+            if refining:
+                report = await self._refine(query, search_results, searches) or report
+                verification = await self._verify_report(report)
+            elif verifier is not None:
+                verification = await self._finish_verification(verifier)
+        finally:
+            if verifier is not None:
+                verifier.cancel()
+
+        # Add verification result
+        self.verification = f"Verified: {verification.verified}\n\nIssues: {verification.issues}"
+        self.sink.result("verification", self.verification)
+        self._milestone("verification")
+        return report
+
+    def _feed_verifier(self, verifier: StreamingVerifier) -> Callable[[str], None]:
+        def feed(chunk: str) -> None:
+            started = verifier.started
+            verifier.feed(chunk)
+            if started == 0 and verifier.started:
+                self.sink.update("verifying", "Verifying sections as they are written...")
+
+        return feed
+
+    async def _finish_verification(self, verifier: StreamingVerifier) -> VerificationResult:
+        async with self._stage("verifying"):
+            self.sink.update("verifying", f"Verifying report ({verifier.started} sections)...")
+            verification = await verifier.result()
+            self.sink.update("verifying", "Verification completed", is_done=True)
+        return verification
+
+    async def _verify_report(self, report: FinancialReportData) -> VerificationResult:
+        async with self._stage("verifying"):
+            self.sink.update("verifying", "Verifying report...")
+            result = await self._run(agent_graph.verifier, report.markdown_report)
+            self.sink.update("verifying", "Verification completed", is_done=True)
+        return result.final_output_as(VerificationResult)
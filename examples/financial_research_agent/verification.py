@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+from agents import Agent, Runner
+from agents.usage import Usage
+
+from examples.common.log import fields, get_logger
+from examples.common.report_stream import MarkdownSections
+
+from .agents.verifier_agent import VerificationResult, verifier_agent
+
+logger = get_logger(__name__)
+
+
+def pipelined_verification_enabled() -> bool:
+    """
+    `VERIFY_MODE=pipelined` (the default) verifies the report section by section while it
+    is written; `VERIFY_MODE=sequential` verifies the finished report in one call.
+    """
+    return os.environ.get("VERIFY_MODE", "pipelined").lower() != "sequential"
+
+
+class StreamingVerifier:
+    """
+    Verifies a report while the writer is still producing it.
+
+    Feed it the report's markdown as it streams in. Each section (see `MarkdownSections`)
+    is handed to the verifier agent as soon as it is complete, concurrently with the rest
+    of the writing, so once the report is finished only its last section is still being
+    checked. `result()` combines the per-section verdicts into one `VerificationResult`.
+    """
+
+    def __init__(
+        self, agent: Agent = verifier_agent, min_chars: int | None = None, usage: Usage | None = None
+    ) -> None:
+        self.agent = agent
+        # Token usage of the verifier calls is added to `usage`, if given
+        self.usage = usage
+        if min_chars is None:
+            min_chars = int(os.environ.get("VERIFY_SECTION_MIN_CHARS", "800"))
+        self.sections = MarkdownSections(min_chars)
+        self._tasks: list[tuple[str, asyncio.Task[VerificationResult]]] = []
+
+    @property
+    def started(self) -> int:
+        """Number of sections handed to the verifier so far."""
+        return len(self._tasks)
+
+    def feed(self, markdown: str) -> None:
+        for section in self.sections.feed(markdown):
+            self._start(section)
+
+    def finish(self, markdown_report: str) -> None:
+        """
+        Verify what is left once the report is complete. If nothing was streamed (the
+        writer's output could not be parsed incrementally), the whole report is verified.
+        """
+        last = self.sections.flush()
+        if self._tasks:
+            if last is not None:
+                self._start(last)
+        else:
+            self._start(last or markdown_report, whole=True)
+
+    async def result(self) -> VerificationResult:
+        verdicts = await asyncio.gather(*(task for _, task in self._tasks))
+        issues = [
+            f"{title}: {verdict.issues}" if len(verdicts) > 1 else verdict.issues
+            for (title, _), verdict in zip(self._tasks, verdicts)
+            if not verdict.verified or verdict.issues.strip()
+        ]
+        return VerificationResult(
+            verified=all(verdict.verified for verdict in verdicts), issues="\n\n".join(issues)
+        )
+
+    def cancel(self) -> None:
+        for _, task in self._tasks:
+            task.cancel()
+
+    def _start(self, section: str, whole: bool = False) -> None:
+        title = section.strip().splitlines()[0].lstrip("#").strip() if section.strip() else "Report"
+        number = len(self._tasks) + 1
+        if whole:
+            input_data = section
+        else:
+            input_data = (
+                f"Section {number} of a longer report. Verify this section on its own; other "
+                f"sections may cover what it leaves out.\n\n{section}"
+            )
+        self._tasks.append((title, asyncio.create_task(self._verify(input_data, number))))
+
+    async def _verify(self, input_data: str, number: int) -> VerificationResult:
+        try:
+            result = await Runner.run(self.agent, input_data)
+            if self.usage is not None:
+                self.usage.add(result.context_wrapper.usage)
+            return result.final_output_as(VerificationResult)
+        except Exception as exc:
+            logger.warning("Section verification failed", extra=fields(section=number, error=repr(exc)))
+            return VerificationResult(verified=False, issues=f"Could not be verified ({type(exc).__name__})")
@@ -1,22 +1,35 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import time
+import dataclasses
+import functools
+import os
 import uuid
-from typing import List, Optional
+from typing import Optional
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
-from agents import Runner, custom_span, gen_trace_id, trace
+from examples.common.backends import create_backend
+from examples.common.limits import SubscriberTracker
+from examples.common.log import fields, get_logger
+from examples.common.pipeline import EventSink
+from examples.common.scheduler import JobScheduler, QueueFullError
+from examples.common.sse import END_EVENT, resume_start, sse_frame
+from examples.research_bot.pipeline import (
+    WebResearchPipeline,
+    report_archive,
+    search_cache,
+    search_dedup,
+    search_limiter,
+    search_plan_cache,
+    stage_metrics,
+)
 
-from examples.research_bot.agents.planner_agent import WebSearchItem, WebSearchPlan, planner_agent
-from examples.research_bot.agents.search_agent import search_agent
-from examples.research_bot.agents.writer_agent import ReportData, writer_agent
+logger = get_logger(__name__)
 
 app = FastAPI()
 
@@ -32,9 +45,13 @@ app.add_middleware(
 # Mount static files
 app.mount("/static", StaticFiles(directory="examples/research_bot/static"), name="static")
 
-# Queue to store research updates
-research_updates = {}
-
+# One stream of research updates per research run; publishing wakes SSE subscribers directly.
+# STATE_BACKEND=sqlite shares the streams between uvicorn workers (see create_backend), and
+# the RESEARCH_* variables bound how many runs and bytes are kept.
+research_updates = create_backend(
+    "research",
+    sizeof=lambda update: len(update["content"]) + 128,
+)
 
 class ResearchRequest(BaseModel):
     query: str
@@ -47,161 +64,191 @@ class ResearchUpdate(BaseModel):
     is_done: bool = False
 
 
-class ResearchManager:
-    def __init__(self, research_id: str):
-        self.research_id = research_id
-        self.updates_queue = []
+def _publish_update(research_id: str, update_type: str, content: str, is_done: bool = False):
+    update = ResearchUpdate(
+        id=str(uuid.uuid4()),
+        type=update_type,
+        content=content,
+        is_done=is_done
+    )
+    research_updates.publish(research_id, update.dict())
 
-    def add_update(self, update_type: str, content: str, is_done: bool = False):
-        update = ResearchUpdate(
-            id=str(uuid.uuid4()),
-            type=update_type,
-            content=content,
-            is_done=is_done
-        )
-        self.updates_queue.append(update)
-        research_updates[self.research_id].append(update.dict())
-
-    async def run(self, query: str) -> None:
-        trace_id = gen_trace_id()
-        with trace("Research trace", trace_id=trace_id):
-            self.add_update(
-                "trace_id",
-                f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}",
-                is_done=True,
-            )
-
-            self.add_update(
-                "starting",
-                "Starting research...",
-                is_done=True,
-            )
-            search_plan = await self._plan_searches(query)
-            search_results = await self._perform_searches(search_plan)
-            report = await self._write_report(query, search_results)
-
-            final_report = f"Report summary\n\n{report.short_summary}"
-            self.add_update("final_report", final_report, is_done=True)
-
-            # Add the full report
-            self.add_update("full_report", report.markdown_report, is_done=True)
-            
-            # Add follow-up questions
-            follow_up_questions = "\n".join(report.follow_up_questions)
-            self.add_update("follow_up_questions", follow_up_questions, is_done=True)
-
-    async def _plan_searches(self, query: str) -> WebSearchPlan:
-        self.add_update("planning", "Planning searches...")
-        result = await Runner.run(
-            planner_agent,
-            f"Query: {query}",
-        )
-        self.add_update(
-            "planning",
-            f"Will perform {len(result.final_output.searches)} searches",
-            is_done=True,
-        )
-        return result.final_output_as(WebSearchPlan)
-
-    async def _perform_searches(self, search_plan: WebSearchPlan) -> list[str]:
-        with custom_span("Search the web"):
-            self.add_update("searching", "Searching...")
-            num_completed = 0
-            tasks = [asyncio.create_task(self._search(item)) for item in search_plan.searches]
-            results = []
-            for task in asyncio.as_completed(tasks):
-                result = await task
-                if result is not None:
-                    results.append(result)
-                num_completed += 1
-                self.add_update(
-                    "searching", f"Searching... {num_completed}/{len(tasks)} completed"
-                )
-            self.add_update("searching", "Search completed", is_done=True)
-            return results
-
-    async def _search(self, item: WebSearchItem) -> str | None:
-        input = f"Search term: {item.query}\nReason for searching: {item.reason}"
-        try:
-            result = await Runner.run(
-                search_agent,
-                input,
-            )
-            return str(result.final_output)
-        except Exception:
-            return None
-
-    async def _write_report(self, query: str, search_results: list[str]) -> ReportData:
-        self.add_update("writing", "Thinking about report...")
-        input = f"Original query: {query}\nSummarized search results: {search_results}"
-        result = Runner.run_streamed(
-            writer_agent,
-            input,
-        )
-        update_messages = [
-            "Thinking about report...",
-            "Planning report structure...",
-            "Writing outline...",
-            "Creating sections...",
-            "Cleaning up formatting...",
-            "Finalizing report...",
-            "Finishing report...",
-        ]
-
-        last_update = time.time()
-        next_message = 0
-        async for _ in result.stream_events():
-            if time.time() - last_update > 5 and next_message < len(update_messages):
-                self.add_update("writing", update_messages[next_message])
-                next_message += 1
-                last_update = time.time()
-
-        self.add_update("writing", "Report completed", is_done=True)
-        return result.final_output_as(ReportData)
+
+async def _watch_for_cancel(research_id: str) -> None:
+    # A DELETE served by another worker leaves a cancel request in the run's state document
+    while True:
+        state = research_updates.get_state(research_id)
+        if state is not None and state.get("cancel_requested"):
+            research_scheduler.cancel(research_id)
+            return
+        await asyncio.sleep(CANCEL_POLL_SECONDS)
+
+
+async def _run_research(research_id: str, query: str) -> None:
+    # The same pipeline as the CLI, reporting to this run's update stream instead of the console
+    pipeline = WebResearchPipeline(
+        EventSink(functools.partial(_publish_update, research_id)), log_fields={"research_id": research_id}
+    )
+    watcher = asyncio.create_task(_watch_for_cancel(research_id)) if research_updates.shared else None
+    try:
+        await pipeline.run(query)
+    except asyncio.CancelledError:
+        logger.info("Research cancelled", extra=fields(research_id=research_id))
+        _publish_update(research_id, "cancelled", "Research cancelled", is_done=True)
+        # Let the scheduler see the run as cancelled rather than finished
+        raise
+    except Exception:
+        # Nothing awaits the run's task, so this is the only place the error can surface
+        logger.exception("Research failed", extra=fields(research_id=research_id))
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        # Ends every open SSE stream for this run, whether it succeeded or failed.
+        research_updates.close(research_id)
+
+
+def _report_queue_position(research_id: str, position: int) -> None:
+    if position == 0:
+        _publish_update(research_id, "queued", "Leaving queue, starting research", is_done=True)
+    else:
+        _publish_update(research_id, "queued", f"Waiting in queue (position {position})")
+
+
+# At most RESEARCH_WORKERS runs execute at once and RESEARCH_QUEUE_SIZE more may wait; further
+# requests are rejected with 429 and a Retry-After estimate
+research_scheduler = JobScheduler.from_env("RESEARCH", on_position=_report_queue_position)
+
+# How often a run on a shared backend checks for a cancel request made on another worker
+CANCEL_POLL_SECONDS = float(os.environ.get("RESEARCH_CANCEL_POLL_SECONDS", "1"))
+
+
+def _cancel_research(research_id: str) -> bool:
+    status = research_scheduler.cancel(research_id)
+    if status == "queued":
+        # The run never started, so nothing else will close its stream
+        _publish_update(research_id, "cancelled", "Research cancelled", is_done=True)
+        research_updates.close(research_id)
+    return status is not None
+
+
+def _request_cancel(research_id: str) -> bool:
+    """Cancel a run whether this worker or another one sharing the backend has it."""
+    if _cancel_research(research_id):
+        return True
+    if research_updates.is_closed(research_id):
+        return False
+    # Queued or running on another worker, which picks this up within CANCEL_POLL_SECONDS
+    research_updates.put_state(research_id, {"cancel_requested": True})
+    return True
+
+
+# Runs whose last SSE client left (and did not come back within the grace period) are
+# cancelled, which also cancels their outstanding searches. Only clients of this worker are
+# counted, so with several workers this only cancels runs this worker is running.
+research_subscribers = SubscriberTracker(
+    _cancel_research,
+    grace_seconds=float(os.environ.get("RESEARCH_ABANDON_GRACE_SECONDS", "10")),
+)
 
 
 @app.post("/research")
 async def start_research(request: ResearchRequest):
     research_id = str(uuid.uuid4())
-    research_updates[research_id] = []
-    
-    # Start research in background task
-    manager = ResearchManager(research_id)
-    asyncio.create_task(manager.run(request.query))
+    research_updates.create(research_id)
+
+    # A near-duplicate of a recent query is answered with its archived report, without a run
+    archived = report_archive.find_recent(request.query) if report_archive is not None else None
+    if archived is not None:
+        logger.info(
+            "Research served from archive",
+            extra=fields(research_id=research_id, report_id=archived.id, similarity=round(archived.similarity, 3)),
+        )
+        WebResearchPipeline(EventSink(functools.partial(_publish_update, research_id))).replay(archived)
+        research_updates.close(research_id)
+        return {"research_id": research_id, "queue_position": 0, "archived_report": archived.id}
+
+    # Start research in background task, or queue it if all workers are busy
+    try:
+        position = research_scheduler.submit(
+            research_id, lambda: _run_research(research_id, request.query)
+        )
+    except QueueFullError as exc:
+        research_updates.remove(research_id)
+        return JSONResponse(
+            status_code=429,
+            content={"error": "Too many research requests, please retry later"},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
     
-    return {"research_id": research_id}
+    return {"research_id": research_id, "queue_position": position}
+
+
+@app.delete("/research/{research_id}")
+async def cancel_research(research_id: str):
+    if not research_updates.exists(research_id):
+        return JSONResponse(status_code=404, content={"error": "Research ID not found"})
+    return {"research_id": research_id, "cancelled": _request_cancel(research_id)}
 
 
 @app.get("/research/{research_id}/updates")
-async def get_research_updates(research_id: str, request: Request):
+async def get_research_updates(research_id: str, request: Request, since: Optional[int] = None):
+    # A reconnecting client only gets the updates after the last one it saw
+    start = resume_start(request, since)
+
     async def event_generator():
-        if research_id not in research_updates:
-            yield f"data: {json.dumps({'error': 'Research ID not found'})}\n\n"
+        if not research_updates.exists(research_id):
+            yield sse_frame({"error": "Research ID not found"})
+            yield END_EVENT
             return
 
-        # Send all existing updates
-        for update in research_updates[research_id]:
-            yield f"data: {json.dumps(update)}\n\n"
-        
-        # Keep connection open for new updates
-        last_idx = len(research_updates[research_id])
-        while True:
-            # Check if client disconnected
-            if await request.is_disconnected():
-                break
-
-            # Check for new updates
-            if len(research_updates[research_id]) > last_idx:
-                for update in research_updates[research_id][last_idx:]:
-                    yield f"data: {json.dumps(update)}\n\n"
-                last_idx = len(research_updates[research_id])
-            
-            # Wait a bit before checking again
-            await asyncio.sleep(0.5)
+        # Replay existing updates, then block until new ones are published. The stream ends
+        # once the run closes it; StreamingResponse cancels us if the client leaves.
+        research_subscribers.connect(research_id)
+        logger.debug("SSE client connected", extra=fields(research_id=research_id, start=start))
+        sent = 0
+        try:
+            # Frames were encoded once when published; every subscriber is sent the same bytes
+            async for frame in research_updates.subscribe_frames(research_id, start):
+                logger.debug("SSE update sent", extra=fields(sample=True, research_id=research_id, bytes=len(frame)))
+                sent += 1
+                yield frame
+            yield END_EVENT
+        finally:
+            research_subscribers.disconnect(research_id)
+            logger.debug("SSE client disconnected", extra=fields(research_id=research_id, sent=sent))
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 
+@app.get("/reports/search")
+async def search_reports(q: str, limit: int = 10):
+    if report_archive is None:
+        return JSONResponse(status_code=404, content={"error": "Report archive is disabled"})
+    return {"query": q, "reports": report_archive.search(q, limit=min(limit, 100))}
+
+
+@app.get("/reports/{report_id}")
+async def get_report(report_id: int):
+    archived = report_archive.get(report_id) if report_archive is not None else None
+    if archived is None:
+        return JSONResponse(status_code=404, content={"error": "Report not found"})
+    return dataclasses.asdict(archived)
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "research_sessions": research_updates.metrics(),
+        "search_cache": search_cache.metrics(),
+        "plan_cache": search_plan_cache.metrics(),
+        "search_limiter": search_limiter.metrics(),
+        "search_dedup": search_dedup.metrics(),
+        "report_archive": report_archive.metrics() if report_archive is not None else None,
+        "scheduler": research_scheduler.metrics(),
+        **stage_metrics.metrics(),
+    }
+
+
 @app.get("/")
 async def root():
     from fastapi.responses import FileResponse
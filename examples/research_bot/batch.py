@@ -0,0 +1,16 @@
+"""
+Batch mode: research every query in a JSONL or CSV file, several at a time.
+
+Queries share the search cache and the search concurrency limit, results are appended to a
+JSONL checkpoint as each query finishes, and a rerun skips the queries already done. A
+throughput summary (queries and tokens per minute) is printed at the end.
+
+Usage:
+    python -m examples.research_bot.batch queries.jsonl --output results.jsonl --concurrency 8
+"""
+
+from examples.common.batch import main
+from examples.research_bot.pipeline import WebResearchPipeline
+
+if __name__ == "__main__":
+    main(WebResearchPipeline, __doc__)
@@ -2,12 +2,13 @@ import asyncio
 import os
 import sys
 
+from examples.common.mock_model import mock_models_enabled
 from examples.research_bot.manager import ResearchManager
 
 
 async def main() -> None:
     # Check if OPENAI_API_KEY is set
-    if not os.environ.get("OPENAI_API_KEY"):
+    if not os.environ.get("OPENAI_API_KEY") and not mock_models_enabled():
         print("ERROR: OPENAI_API_KEY environment variable is not set.")
         print("Please set it before running the application:")
         print("\nOn Linux/Mac:")
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from examples.common.archive import create_archive
+from examples.common.cache import create_cache
+from examples.common.dedup import SearchDeduplicator
+from examples.common.limits import ConcurrencyLimiter, SearchLimits
+from examples.common.mock_model import mock_models_enabled, use_mock_models
+from examples.common.pipeline import ResearchPipeline, StageLog, StageMetrics
+
+from .agents.planner_agent import WebSearchPlan, planner_agent
+from .agents.search_agent import search_agent
+from .agents.writer_agent import ReportData, writer_agent
+
+# Searches run at most SEARCH_CONCURRENCY at a time across all research jobs, each bounded by
+# SEARCH_TIMEOUT_SECONDS and each job's search phase by SEARCH_PHASE_BUDGET_SECONDS. The
+# report is started once SEARCH_QUORUM of the searches (or SEARCH_QUORUM_WAIT_SECONDS) is in.
+search_limits = SearchLimits.from_env()
+search_limiter = ConcurrencyLimiter(search_limits.concurrency)
+
+# Search summaries keyed on the normalized search term (SEARCH_CACHE_* variables). Use
+# SEARCH_CACHE_BACKEND=sqlite to reuse results across CLI runs.
+search_cache = create_cache("research_bot.search", "SEARCH_CACHE")
+
+# Search plans keyed on the normalized query, kept for a day (PLAN_CACHE_* variables), so a
+# popular query skips the planner. PLAN_CACHE_WARM_START names a JSONL file of
+# {"query": ..., "value": <plan>} lines to load at startup.
+search_plan_cache = create_cache(
+    "research_bot.plan", "PLAN_CACHE", default_ttl=86400.0, validate=WebSearchPlan.model_validate
+)
+
+# Planned searches that are near-identical wordings of one another are searched once
+# (SEARCH_DEDUP_THRESHOLD, 0 to turn it off)
+search_dedup = SearchDeduplicator.from_env()
+
+# Every finished report, with its search plan, searchable by content and reused for
+# near-duplicate queries within REPORT_ARCHIVE_FRESH_SECONDS (REPORT_ARCHIVE_* variables)
+report_archive = create_archive("research_bot")
+
+# Stage durations and time to the first (and refined) report, for every run in this process
+stage_metrics = StageMetrics(milestones=("first_report", "refined_report"))
+
+# MOCK_MODEL=1 runs every agent on the offline mock model (MOCK_MODEL_* tune it)
+if mock_models_enabled():
+    use_mock_models([planner_agent, search_agent, writer_agent])
+
+
+class WebResearchPipeline(ResearchPipeline):
+    """The research bot's pipeline: plan web searches, run them and write a report."""
+
+    trace_name = "Research trace"
+    start_update = ("starting", "Starting research...")
+
+    planner = planner_agent
+    searcher = search_agent
+    writer = writer_agent
+    report_type = ReportData
+
+    limits = search_limits
+    limiter = search_limiter
+    cache = search_cache
+    plan_cache = search_plan_cache
+    dedup = search_dedup
+    archive = report_archive
+    hooks = (stage_metrics, StageLog(__name__))
@@ -17,6 +17,12 @@ document.addEventListener('DOMContentLoaded', function() {
     // Track progress items
     let progressItemsMap = {};
     
+    // Streaming report state: finished markdown blocks are rendered once and appended,
+    // only the unfinished tail is redrawn when a chunk arrives
+    let reportTail = '';
+    let reportRendered = null;
+    let reportPending = null;
+    
     // Current research ID
     let currentResearchId = null;
     let eventSource = null;
@@ -90,6 +96,10 @@ document.addEventListener('DOMContentLoaded', function() {
             });
             
             console.log('Response status:', response.status);
+            if (response.status === 429) {
+                const retryAfter = response.headers.get('Retry-After');
+                throw new Error(`The server is busy, please try again in ${retryAfter || 'a few'} seconds`);
+            }
             if (!response.ok) {
                 throw new Error('Failed to start research');
             }
@@ -108,22 +118,28 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Connect to event source for updates
-    function connectToEventSource(researchId) {
+    function connectToEventSource(researchId, since = null) {
         // Close existing connection if any
         if (eventSource) {
             eventSource.close();
         }
         
-        console.log('Connecting to SSE endpoint:', `${UPDATES_URL}${researchId}/updates`);
-        // Connect to SSE endpoint
-        eventSource = new EventSource(`${UPDATES_URL}${researchId}/updates`);
+        // Connect to SSE endpoint, resuming after the last update we saw
+        const url = `${UPDATES_URL}${researchId}/updates` + (since !== null ? `?since=${since}` : '');
+        console.log('Connecting to SSE endpoint:', url);
+        const source = new EventSource(url);
+        eventSource = source;
+        let lastSeq = since;
         
-        eventSource.onopen = function() {
+        source.onopen = function() {
             console.log('SSE connection opened');
         };
         
-        eventSource.onmessage = function(event) {
+        source.onmessage = function(event) {
             console.log('SSE message received:', event.data);
+            if (event.lastEventId) {
+                lastSeq = parseInt(event.lastEventId, 10);
+            }
             const data = JSON.parse(event.data);
             
             if (data.error) {
@@ -135,15 +151,40 @@ document.addEventListener('DOMContentLoaded', function() {
             handleUpdate(data);
         };
         
-        eventSource.onerror = function(error) {
+        // Sent once the run is over and every update has been delivered
+        source.addEventListener('end', function() {
+            source.close();
+        });
+        
+        source.onerror = function(error) {
             console.error('EventSource failed:', error);
-            eventSource.close();
+            source.close();
+            // Reconnect and pick up where we left off, unless a new research has started
+            setTimeout(() => {
+                if (eventSource === source && currentResearchId === researchId) {
+                    connectToEventSource(researchId, lastSeq);
+                }
+            }, 3000);
         };
     }
     
     // Handle update from SSE
     function handleUpdate(update) {
         switch (update.type) {
+            case 'queued':
+                updateProgressItem('queued', update.content, update.is_done);
+                break;
+                
+            case 'cancelled':
+                addProgressItem('cancelled', update.content, true);
+                loadingContainer.classList.add('hidden');
+                break;
+                
+            case 'archived':
+                // A recent report for the same question, served without a new run
+                addProgressItem('archived', update.content, update.is_done);
+                break;
+                
             case 'trace_id':
                 addProgressItem('trace_id', update.content, update.is_done);
                 break;
@@ -164,6 +205,12 @@ document.addEventListener('DOMContentLoaded', function() {
                 updateProgressItem('writing', update.content, update.is_done);
                 break;
                 
+            case 'refining':
+                // The first report is already shown; keep the progress visible while it is rewritten
+                updateProgressItem('refining', update.content, update.is_done);
+                loadingContainer.classList.toggle('hidden', update.is_done);
+                break;
+                
             case 'final_report':
                 updateProgressItem('final_report', update.content, update.is_done);
                 summaryContent.innerHTML = `<div class="report-summary">${update.content}</div>`;
@@ -171,7 +218,15 @@ document.addEventListener('DOMContentLoaded', function() {
                 resultsContainer.classList.remove('hidden');
                 break;
                 
+            case 'report_chunk':
+                appendReportChunk(update.content);
+                break;
+                
             case 'full_report':
+                // The complete report supersedes the incrementally rendered one
+                reportTail = '';
+                reportRendered = null;
+                reportPending = null;
                 reportContent.innerHTML = marked.parse(update.content, markedOptions);
                 // Apply syntax highlighting to code blocks
                 document.querySelectorAll('pre code').forEach((block) => {
@@ -183,16 +238,32 @@ document.addEventListener('DOMContentLoaded', function() {
                 const questions = update.content.split('\n').filter(q => q.trim());
                 const questionsList = questions.map(q => `<li>${q}</li>`).join('');
                 followUpContent.innerHTML = `<ul>${questionsList}</ul>`;
-                
-                // Close the event source when everything is done
-                if (eventSource) {
-                    eventSource.close();
-                    eventSource = null;
-                }
                 break;
         }
     }
     
+    // Append a chunk of the report as it is being written
+    function appendReportChunk(chunk) {
+        if (!reportRendered) {
+            reportContent.innerHTML = '<div class="report-rendered"></div><div class="report-pending"></div>';
+            reportRendered = reportContent.querySelector('.report-rendered');
+            reportPending = reportContent.querySelector('.report-pending');
+            resultsContainer.classList.remove('hidden');
+        }
+        reportTail += chunk;
+        
+        // Render everything up to the last blank line that is not inside a fenced code block
+        let split = reportTail.lastIndexOf('\n\n');
+        while (split > 0 && (reportTail.slice(0, split).match(/```/g) || []).length % 2 === 1) {
+            split = reportTail.lastIndexOf('\n\n', split - 1);
+        }
+        if (split > 0) {
+            reportRendered.insertAdjacentHTML('beforeend', marked.parse(reportTail.slice(0, split), markedOptions));
+            reportTail = reportTail.slice(split + 2);
+        }
+        reportPending.textContent = reportTail;
+    }
+    
     // Add a new progress item
     function addProgressItem(id, content, isDone = false) {
         if (progressItemsMap[id]) {
@@ -245,10 +316,21 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Reset UI for new research
     function resetUI() {
+        // Cancel the previous research if it is still queued or running
+        if (currentResearchId) {
+            fetch(`${API_URL}/${currentResearchId}`, { method: 'DELETE' }).catch(() => {});
+            currentResearchId = null;
+        }
+        
         // Clear progress items
         progressItems.innerHTML = '';
         progressItemsMap = {};
         
+        // Clear streaming report state
+        reportTail = '';
+        reportRendered = null;
+        reportPending = null;
+        
         // Clear results
         summaryContent.innerHTML = '';
         reportContent.innerHTML = '';
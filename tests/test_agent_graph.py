@@ -0,0 +1,41 @@
+import asyncio
+import importlib
+from collections import Counter
+
+from agents import Agent
+
+from examples.common.pipeline import EventSink
+
+
+def test_research_runs_reuse_the_agent_graph(monkeypatch):
+    # The pipeline module builds the graph when imported, on the mock model if MOCK_MODEL is set
+    monkeypatch.setenv("MOCK_MODEL", "1")
+    monkeypatch.setenv("MOCK_MODEL_LATENCY", "0")
+    monkeypatch.setenv("MOCK_MODEL_TOKENS_PER_SECOND", "0")
+    monkeypatch.setenv("REPORT_ARCHIVE_BACKEND", "off")
+    pipeline_module = importlib.import_module("examples.financial_research_agent.pipeline")
+    graph = pipeline_module.agent_graph
+    agents_before = graph.all()
+    writer_tools = list(graph.writer.tools)
+
+    calls = Counter()
+    for name in ("as_tool", "clone"):
+        original = getattr(Agent, name)
+
+        def counting(self, *args, _name=name, _original=original, **kwargs):
+            calls[_name] += 1
+            return _original(self, *args, **kwargs)
+
+        monkeypatch.setattr(Agent, name, counting)
+
+    async def run(query):
+        pipeline = pipeline_module.FinancialResearchPipeline(EventSink(lambda update_type, content, is_done: None))
+        await pipeline.run(query)
+
+    for query in ("Quarterly results of Acme Corp", "Outlook for Globex", "Risks facing Initech"):
+        asyncio.run(run(query))
+
+    assert calls == Counter()
+    assert pipeline_module.agent_graph is graph
+    assert all(a is b for a, b in zip(graph.all(), agents_before))
+    assert graph.writer.tools == writer_tools
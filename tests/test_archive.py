@@ -0,0 +1,23 @@
+from examples.common.archive import ReportArchive, create_archive
+
+REPORT = {"short_summary": "Rates squeeze margins", "markdown_report": "# Banks\n\nNet interest margins fell."}
+
+
+def test_mock_runs_default_to_memory_archive(monkeypatch):
+    monkeypatch.delenv("REPORT_ARCHIVE_BACKEND", raising=False)
+    monkeypatch.setenv("MOCK_MODEL", "1")
+    monkeypatch.setenv("REPORT_ARCHIVE_PATH", "/nonexistent/should-not-be-created.sqlite3")
+    archive = create_archive("test")
+    assert archive is not None
+    archive.store("Impact of rates on banks", [], REPORT)
+    assert len(archive) == 1
+
+
+def test_near_duplicate_query_is_found_but_other_year_is_not():
+    archive = ReportArchive("test", ":memory:")
+    archive.store("Impact of interest rates on regional banks in 2023", [], REPORT)
+
+    found = archive.find_recent("impact of interest rates on regional banks in 2023?")
+    assert found is not None and found.report == REPORT
+    assert archive.find_recent("Impact of interest rates on regional banks in 2024") is None
+    assert [hit["id"] for hit in archive.search("margins")] == [found.id]
@@ -0,0 +1,41 @@
+import time
+
+from examples.common.backends import SQLiteBackend
+
+
+def _backend(tmp_path, **kwargs):
+    return SQLiteBackend(str(tmp_path / "state.sqlite3"), namespace="test", sweep_interval=0.0, **kwargs)
+
+
+def test_sqlite_backend_drops_finished_sessions_first_beyond_max_sessions(tmp_path):
+    backend = _backend(tmp_path, max_sessions=2)
+    backend.create("finished")
+    backend.close("finished")
+    backend.create("running")
+    backend.create("new")
+
+    assert not backend.exists("finished")
+    assert backend.exists("running") and backend.exists("new")
+    assert backend.metrics()["evictions"] == {"ttl": 0, "finished": 1, "active": 0}
+
+
+def test_sqlite_backend_enforces_max_bytes_on_publish(tmp_path):
+    backend = _backend(tmp_path, max_bytes=1000)
+    backend.create("old")
+    backend.publish("old", {"content": "x" * 600})
+    backend.create("new")
+    backend.publish("new", {"content": "y" * 600})
+
+    assert not backend.exists("old")
+    assert backend.items("new")[0]["content"] == "y" * 600
+
+
+def test_sqlite_backend_purges_expired_sessions_on_write_not_on_metrics(tmp_path):
+    backend = _backend(tmp_path, ttl_seconds=0.05)
+    backend.create("stale")
+    time.sleep(0.1)
+
+    assert backend.metrics()["sessions"] == 1
+    backend.create("fresh")
+    assert not backend.exists("stale")
+    assert backend.metrics()["evictions"]["ttl"] == 1
@@ -0,0 +1,32 @@
+import json
+
+from examples.common.batch import Checkpoint
+
+
+def test_checkpoint_discards_truncated_last_line(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text(
+        json.dumps({"id": "a", "status": "ok"}) + "\n"
+        + json.dumps({"id": "b", "status": "error"}) + "\n"
+        + '{"id": "c", "stat',
+        encoding="utf-8",
+    )
+
+    checkpoint = Checkpoint(str(path))
+    assert checkpoint.done == {"a"}
+    checkpoint.record({"id": "c", "status": "ok"})
+    checkpoint.close()
+
+    assert [json.loads(line)["id"] for line in path.read_text(encoding="utf-8").splitlines()] == ["a", "b", "c"]
+    assert Checkpoint(str(path)).done == {"a", "c"}
+
+
+def test_checkpoint_completes_last_line_missing_its_newline(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text(json.dumps({"id": "a", "status": "ok"}), encoding="utf-8")
+
+    checkpoint = Checkpoint(str(path))
+    checkpoint.record({"id": "b", "status": "ok"})
+    checkpoint.close()
+
+    assert Checkpoint(str(path)).done == {"a", "b"}
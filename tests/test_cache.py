@@ -0,0 +1,49 @@
+import asyncio
+
+from examples.common.cache import ResultCache
+
+
+def test_caller_after_last_waiter_cancelled_gets_fresh_computation():
+    async def scenario():
+        cache = ResultCache("test")
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return f"value {calls}"
+
+        first = asyncio.create_task(cache.get_or_compute("apple earnings", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        # Let the first caller handle its cancellation, which cancels the shared computation,
+        # but not the computation itself, which is still unwinding
+        await asyncio.sleep(0)
+        second = await cache.get_or_compute("Apple earnings", compute)
+        return first, second, calls, cache
+
+    first, second, calls, cache = asyncio.run(scenario())
+    assert first.cancelled()
+    assert second == "value 2"
+    assert calls == 2
+    assert cache.metrics()["in_flight"] == 0
+
+
+def test_concurrent_callers_share_one_computation():
+    async def scenario():
+        cache = ResultCache("test")
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(cache.get_or_compute("q", compute) for _ in range(3)))
+        return results, calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == ["value"] * 3
+    assert calls == 1
@@ -0,0 +1,19 @@
+import pytest
+
+from examples.common.entities import extract_entities
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("My flight FLT123, ticket A1B2C3", {"flight_number": "FLT-123", "confirmation_number": "A1B2C3"}),
+        ("Ticket A1B2C3 on FLT-123", {"flight_number": "FLT-123", "confirmation_number": "A1B2C3"}),
+        ("I'm on FLT123", {"flight_number": "FLT-123", "confirmation_number": None}),
+        ("My confirmation number is abc123", {"flight_number": None, "confirmation_number": "ABC123"}),
+        ("Please move me to 14C", {"seat_number": "14C", "confirmation_number": None}),
+        ("This is Jane Smith, booking ZX9Q41", {"passenger_name": "Jane Smith", "confirmation_number": "ZX9Q41"}),
+    ],
+)
+def test_extract_entities(message, expected):
+    entities = extract_entities(message)
+    assert {name: getattr(entities, name) for name in expected} == expected
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from examples.common.faq import FAQFastPath, FAQIndex
+
+FAQ_PATH = os.path.join(os.path.dirname(__file__), "..", "examples", "customer_service", "faq.json")
+
+
+@pytest.fixture(scope="module")
+def fast_path():
+    return FAQFastPath(FAQIndex(FAQ_PATH))
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "My confirmation number is ABC123",
+        "Hi, my confirmation number is ABC123",
+        "Can you book me a wheelchair?",
+        "Could you please cancel my booking?",
+        "I'd like to change my seat to 14C",
+        "Please move me to an exit row seat",
+        "Is wifi available on flight FLT123?",
+        "Is seat 12A a window seat?",
+    ],
+)
+def test_messages_that_supply_data_or_ask_for_action_take_the_agent_path(fast_path, message):
+    assert fast_path.classify(message).action is None
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "can I bring my dog",
+        "what does a checked suitcase cost",
+        "do I need a passport",
+        "where can I find my confirmation number?",
+    ],
+)
+def test_plain_faq_questions_still_use_the_fast_path(fast_path, message):
+    assert fast_path.classify(message).action in ("answer", "route")
@@ -0,0 +1,21 @@
+import asyncio
+
+from examples.common.limits import SearchLimits, SearchPhase
+
+
+def test_search_cancelled_from_outside_counts_as_no_result():
+    async def scenario():
+        cancelled = asyncio.get_running_loop().create_future()
+
+        async def search():
+            await asyncio.sleep(0.01)
+            return "result"
+
+        phase = SearchPhase([cancelled, search()], SearchLimits())
+        cancelled.cancel()
+        return await phase.quorum(), phase
+
+    results, phase = asyncio.run(scenario())
+    assert results == ["result"]
+    assert phase.completed == 2
+    assert phase.pending == 0
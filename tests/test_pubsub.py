@@ -0,0 +1,86 @@
+import asyncio
+
+from examples.common.backends import SQLiteBackend
+from examples.common.pubsub import Topic
+
+
+def _collect(topic, start=0):
+    async def read():
+        return [item async for item in topic.subscribe(start)]
+
+    return asyncio.create_task(read())
+
+
+def test_transient_items_follow_the_durable_items_published_before_them():
+    async def scenario():
+        topic = Topic()
+        reader = _collect(topic)
+        await asyncio.sleep(0)
+        # Published in one go, without the reader getting a chance to run in between
+        topic.publish("final message A")
+        topic.broadcast("delta of B")
+        await asyncio.sleep(0)
+        topic.publish("final message B")
+        topic.close()
+        return await reader
+
+    assert asyncio.run(scenario()) == ["final message A", "delta of B", "final message B"]
+
+
+def test_durable_item_published_while_reader_is_suspended_precedes_newer_transients():
+    async def scenario():
+        topic = Topic()
+        seen = []
+        resume = asyncio.Event()
+
+        async def read():
+            async for item in topic.subscribe():
+                seen.append(item)
+                if item == "delta of A":
+                    await resume.wait()
+
+        reader = asyncio.create_task(read())
+        await asyncio.sleep(0)
+        topic.broadcast("delta of A")
+        await asyncio.sleep(0)
+        topic.publish("final message A")
+        topic.broadcast("delta of B")
+        resume.set()
+        await asyncio.sleep(0)
+        topic.close()
+        await reader
+        return seen
+
+    assert asyncio.run(scenario()) == ["delta of A", "final message A", "delta of B"]
+
+
+def test_replay_skips_transient_items():
+    async def scenario():
+        topic = Topic()
+        topic.broadcast("delta of A")
+        topic.publish("final message A")
+        topic.broadcast("delta of B")
+        topic.close()
+        return await _collect(topic)
+
+    assert asyncio.run(scenario()) == ["final message A"]
+
+
+def test_sqlite_backend_sends_transient_items_after_the_durable_items_before_them(tmp_path):
+    async def scenario():
+        backend = SQLiteBackend(str(tmp_path / "state.sqlite3"), namespace="test")
+        backend.create("chat")
+
+        async def read():
+            return [item["text"] async for item in backend.subscribe("chat")]
+
+        reader = asyncio.create_task(read())
+        await asyncio.sleep(0.01)
+        backend.publish("chat", {"text": "final message A"})
+        backend.broadcast("chat", {"text": "delta of B"})
+        await asyncio.sleep(0.01)
+        backend.publish("chat", {"text": "final message B"})
+        backend.close("chat")
+        return await reader
+
+    assert asyncio.run(scenario()) == ["final message A", "delta of B", "final message B"]
@@ -0,0 +1,25 @@
+import json
+from types import SimpleNamespace
+
+from openai.types.responses import ResponseTextDeltaEvent
+
+from examples.common.report_stream import ReportStream
+
+
+def _delta(text):
+    return SimpleNamespace(type="raw_response_event", data=ResponseTextDeltaEvent.model_construct(delta=text))
+
+
+def test_words_split_across_deltas_count_once():
+    report = "# Solar outlook\n\nPanel prices kept falling through 2024, and installs rose."
+    encoded = json.dumps({"short_summary": "Prices fell.", "markdown_report": report})
+    stream = ReportStream(flush_interval=0)
+
+    counts = []
+    for i in range(0, len(encoded), 3):
+        stream.feed(_delta(encoded[i : i + 3]))
+        counts.append(stream.words)
+
+    assert stream.words == len(report.split())
+    assert max(counts) == len(report.split())
+    assert counts == sorted(counts)
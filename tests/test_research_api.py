@@ -0,0 +1,76 @@
+import asyncio
+import importlib
+import sys
+
+import pytest
+
+from examples.common.backends import SQLiteBackend
+
+
+@pytest.fixture
+def api(monkeypatch):
+    # The app reads these when imported; MOCK_MODEL runs every agent offline
+    monkeypatch.setenv("MOCK_MODEL", "1")
+    monkeypatch.setenv("MOCK_MODEL_LATENCY", "0.05")
+    monkeypatch.setenv("REPORT_ARCHIVE_BACKEND", "off")
+    return importlib.import_module("examples.research_bot.api")
+
+
+def test_cancelled_run_ends_cancelled(api):
+    async def scenario():
+        api.research_updates.create("run")
+        api.research_scheduler.submit("run", lambda: api._run_research("run", "Solar panel prices"))
+        task = api.research_scheduler._running["run"]
+        await asyncio.sleep(0.01)
+        assert api._cancel_research("run")
+        await asyncio.gather(task, return_exceptions=True)
+        return task
+
+    task = asyncio.run(scenario())
+    assert task.cancelled()
+    assert api.research_updates.items("run")[-1]["type"] == "cancelled"
+
+
+@pytest.fixture
+def shared_api(monkeypatch, tmp_path):
+    """The app on a SQLite backend, plus the path another worker would share."""
+    path = str(tmp_path / "state.sqlite3")
+    monkeypatch.setenv("STATE_BACKEND", "sqlite")
+    monkeypatch.setenv("STATE_SQLITE_PATH", path)
+    monkeypatch.setenv("RESEARCH_CANCEL_POLL_SECONDS", "0.01")
+    monkeypatch.setenv("MOCK_MODEL", "1")
+    monkeypatch.setenv("MOCK_MODEL_LATENCY", "0.05")
+    monkeypatch.setenv("REPORT_ARCHIVE_BACKEND", "off")
+    monkeypatch.delitem(sys.modules, "examples.research_bot.api", raising=False)
+    return importlib.import_module("examples.research_bot.api"), path
+
+
+def test_cancel_request_from_another_worker_cancels_the_run(shared_api):
+    api, path = shared_api
+    other_worker = SQLiteBackend(path, namespace="research")
+
+    async def scenario():
+        api.research_updates.create("run")
+        api.research_scheduler.submit("run", lambda: api._run_research("run", "Solar panel prices"))
+        task = api.research_scheduler._running["run"]
+        await asyncio.sleep(0.01)
+        other_worker.put_state("run", {"cancel_requested": True})
+        await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), timeout=5)
+        return task
+
+    assert asyncio.run(scenario()).cancelled()
+    assert other_worker.items("run")[-1]["type"] == "cancelled"
+    assert other_worker.is_closed("run")
+
+
+def test_cancel_of_run_on_another_worker_is_handed_to_it(shared_api):
+    api, path = shared_api
+    other_worker = SQLiteBackend(path, namespace="research")
+    other_worker.create("running")
+    other_worker.create("finished")
+    other_worker.close("finished")
+
+    assert api._request_cancel("running")
+    assert other_worker.get_state("running") == {"cancel_requested": True}
+    assert not api._request_cancel("finished")
+    assert other_worker.get_state("finished") is None
@@ -0,0 +1,71 @@
+import pytest
+
+from examples.common.seats import SeatInventory, SeatUnavailableError, SQLiteSeatStore
+
+FLIGHT = "FLT-123"
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two inventories in different "processes", sharing one SQLite file."""
+    path = str(tmp_path / "seats.sqlite3")
+    return SeatInventory(store=SQLiteSeatStore(path)), SeatInventory(store=SQLiteSeatStore(path))
+
+
+def test_stale_swap_does_not_double_book(workers, tmp_path):
+    first, second = workers
+    first.reserve(FLIGHT, "10A", "ABC123")
+    assert second.seat_of(FLIGHT, "ABC123") == "10A"
+    # Another worker moves the passenger; the first still thinks they are in 10A
+    second.reserve(FLIGHT, "11A", "ABC123")
+
+    assert first.reserve(FLIGHT, "12A", "ABC123") == "12A"
+    assert first.seat_of(FLIGHT, "ABC123") == "12A"
+
+    third = SeatInventory(store=SQLiteSeatStore(str(tmp_path / "seats.sqlite3")))
+    assert third.seat_of(FLIGHT, "ABC123") == "12A"
+    with pytest.raises(SeatUnavailableError):
+        third.reserve(FLIGHT, "12A", "ZZZ999")
+    assert "11A" in third.available(FLIGHT)
+
+
+
+def test_stale_reserve_does_not_give_holder_a_second_seat(workers):
+    first, second = workers
+    assert first.seat_of(FLIGHT, "ABC123") is None
+    # Another worker seats the passenger; the first still thinks they have no seat
+    second.reserve(FLIGHT, "10A", "ABC123")
+
+    assert first.reserve(FLIGHT, "12A", "ABC123") == "12A"
+    assert first.store.load(FLIGHT) == {first.layout.bit("12A"): "ABC123"}
+    assert "10A" in SeatInventory(store=first.store).available(FLIGHT)
+
+def test_seat_taken_in_store_is_unavailable_and_resyncs(workers):
+    first, second = workers
+    assert "15A" in first.available(FLIGHT)
+    second.reserve(FLIGHT, "15A", "AAA111")
+
+    with pytest.raises(SeatUnavailableError):
+        first.reserve(FLIGHT, "15A", "BBB222")
+    assert "15A" not in first.available(FLIGHT)
+    assert first.seat_of(FLIGHT, "AAA111") == "15A"
+
+
+def test_seat_freed_by_another_worker_can_be_taken(workers):
+    first, second = workers
+    first.reserve(FLIGHT, "14A", "XYZ789")
+    assert second.seat_of(FLIGHT, "XYZ789") == "14A"
+    first.release(FLIGHT, "XYZ789")
+
+    # The second worker's bitmap still shows 14A as taken
+    assert second.reserve(FLIGHT, "14A", "QQQ000") == "14A"
+    assert first.available(FLIGHT, limit=200).count("14A") == 1
+    assert SeatInventory(store=second.store).seat_of(FLIGHT, "QQQ000") == "14A"
+
+
+def test_memory_inventory_rejects_taken_seat():
+    inventory = SeatInventory()
+    inventory.reserve(FLIGHT, "3C", "AAA111")
+    with pytest.raises(SeatUnavailableError):
+        inventory.reserve(FLIGHT, "3C", "BBB222")
+    assert inventory.metrics()["conflicts"] == 1